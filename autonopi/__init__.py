@@ -1,3 +1,37 @@
 #!/usr/bin/env python3
 
-"""Initialisation for autonopi module."""
+"""Initialisation for autonopi module.
+
+Submodules, and the main classes listed in EXPORTS, are imported when they are first used rather than with the
+ package, so `import autonopi` is fast, and only imports OpenCV, numpy or networkx when something needs them.
+"""
+
+import importlib
+
+SUBMODULES = ["blackboard", "concurrency", "cv", "geometry", "hardware", "management", "navigation", "pipeline",
+              "scheduling", "simulation", "telemetry", "tracing", "tracking", "tuning", "visualisation"]
+# Classes available from the package, by the submodule they are defined in.
+EXPORTS = {
+    "AsyncManager": "concurrency",
+    "Blackboard": "blackboard",
+    "DeadlineScheduler": "scheduling",
+    "FlightRecorder": "telemetry",
+    "LineDetector": "cv",
+    "Manager": "management",
+    "Navigation": "navigation",
+}
+
+
+def __getattr__(name: str) -> object:
+    """Import submodules and the classes in EXPORTS when they are first used."""
+    if name in SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+
+    if name in EXPORTS:
+        return getattr(importlib.import_module("." + EXPORTS[name], __name__), name)
+
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + SUBMODULES + list(EXPORTS))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""Blackboard module.
+
+Components which run at different rates share values through a blackboard, rather than passing them along a chain.
+ Each component writes what it finds, and reads the newest values others have written, so a slow component never
+ holds up a fast one, it just leaves an older value on the blackboard.
+"""
+
+import threading as thr
+import time
+
+
+class Blackboard:
+    """Newest value of each key, with the time it was found and how many times it has been written.
+
+    All access is protected by a lock, so components running in different threads can share it.
+    """
+
+    def __init__(self):
+        self.lock = thr.Lock()
+        self.entries = {}  # (value, timestamp, seq) by key.
+
+    def set(self, key: str, value: object, timestamp: float = None) -> int:
+        """Write a value.
+
+        Parameters
+        ----------
+        key : str
+            Name of the value, eg "lane_angle".
+        value : object
+            The value. It is shared rather than copied, so shouldn't be changed once written.
+        timestamp : float, optional
+            time.monotonic() the value was found, eg when its frame was captured. Defaults to now.
+
+        Returns
+        -------
+        int
+            The key's sequence number, which counts the times it has been written.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+
+        with self.lock:
+            seq = self.entries[key][2] + 1 if key in self.entries else 1
+            self.entries[key] = (value, timestamp, seq)
+
+        return seq
+
+    def read(self, key: str) -> tuple[object, float, int]:
+        """Read a value, with its timestamp and sequence number. Returns (None, None, 0) if it hasn't been written."""
+        with self.lock:
+            return self.entries.get(key, (None, None, 0))
+
+    def get(self, key: str, default: object = None, max_age: float = None) -> object:
+        """Read a value, or default if it hasn't been written, or was found more than max_age seconds ago."""
+        value, timestamp, seq = self.read(key)
+
+        if seq == 0 or (max_age is not None and time.monotonic() - timestamp > max_age):
+            return default
+
+        return value
+
+    def snapshot(self) -> dict:
+        """Copy of every value, by key, read at the same time."""
+        with self.lock:
+            return {key: entry[0] for key, entry in self.entries.items()}
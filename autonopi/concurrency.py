@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+"""Concurrent management system module.
+
+Kept separate from management, which imports it on first use, so that systems using the synchronous Manager don't
+ import asyncio and the executors at startup.
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING
+
+from .blackboard import Blackboard
+from .management import Manager
+from .scheduling import DeadlineScheduler
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .telemetry import FlightRecorder
+
+
+class AsyncManager(Manager):
+    """Management system base class, with the system split into components which run concurrently as coroutines.
+
+    Manager runs one synchronous run() at a time, so waiting for the camera, finding lanes, updating navigation and
+     commanding motion all happen one after another. Here each component is a coroutine, returned by components(),
+     and they run together on an asyncio event loop. Blocking work, such as OpenCV and networkx calls, is passed to
+     an executor with offload, so other components keep running while it completes. OpenCV releases the GIL, so
+     threads are enough for it to use several cores.
+
+    Components pass data to each other through bounded asyncio.Queue objects, usually created in components(). A
+     component putting into a full queue waits until the next component has caught up, so a slow stage holds back
+     the stages before it rather than letting work pile up.
+
+    Alternatively, components can be methods run at their own rates, declared in self.rates, eg motor updates at
+     100Hz and lane detection at 30Hz. Each runs in the executor, so these share their newest values through
+     self.blackboard (see blackboard.Blackboard) instead of queues, and a slow component never holds up a fast one.
+
+    The lifecycle is the same as Manager's: setup_components, setup_variables, start_capture, then exit once the loop
+     ends. By default the only component is run_loop, which runs self.run as Manager.mainloop does, so a Manager
+     subclass can inherit from this class first, then move parts of run into their own components.
+    """
+
+    workers = 4  # Threads in the executor used by offload. At least one more than there are rates is used.
+    processes = None  # Processes in the executor used by offload(..., process=True), defaults to the number of CPUs.
+    queue_size = 2  # Suggested size for queues between components.
+    # Methods to run periodically, as {name: rate in Hz}, see periodic. The first is the main component, which ticks
+    #  count, and whose rate is the default period.
+    rates = {}
+
+    def mainloop(self,
+                 ticks: int = None,
+                 period: float = None,
+                 policy: str = "skip",
+                 recorder: "FlightRecorder" = None,
+                 ) -> None:
+        """Main event loop of the program.
+
+        Runs the components until one of them returns, after which the system is safely exited and this returns. If
+         a component raises an error, the others are cancelled, the system is exited and the error is reraised.
+
+        ticks, period, policy and recorder are as for Manager.mainloop, and apply to the components which wait on
+         tick(), such as run_loop and the main component in self.rates.
+        """
+        self.recorder = recorder
+        self.ticks = ticks
+        self.count = 0  # Ticks started, see tick.
+
+        if period is None and len(self.rates) > 0:
+            period = 1 / next(iter(self.rates.values()))
+
+        self.scheduler = None
+        if period is not None:
+            self.scheduler = DeadlineScheduler(period, policy, on_degrade=self.degrade, on_recover=self.recover)
+        self.schedulers = {}  # Schedulers of the periodic components other than the main one, by name.
+
+        self.blackboard = Blackboard()
+        self.requested = {}  # Events which wake periodic components early, by name, see request.
+        self.loop = None
+
+        self.executor = ThreadPoolExecutor(max(self.workers, len(self.rates) + 1), thread_name_prefix="offload")
+        self.process_executor = None  # Created when first needed, see offload.
+
+        self.start_capture()
+
+        # The executors are shut down before exit, so nothing offloaded can move the vehicle after it has stopped.
+        try:
+            asyncio.run(self.main())
+            self.shutdown_executors()
+            self.exit()
+        except KeyboardInterrupt:
+            self.shutdown_executors()
+            self.exit()
+            sys.exit(130)
+        except Exception as e:
+            self.shutdown_executors()
+            self.exit()
+            raise e  # Reraise error, after the system has been safely exited.
+
+    def shutdown_executors(self) -> None:
+        """Cancel offloaded calls which haven't started, and wait for those already running to finish.
+
+        Cancelling a component's task doesn't stop a call it offloaded, which carries on in its executor thread.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.process_executor is not None:
+            self.process_executor.shutdown(wait=True, cancel_futures=True)
+
+    async def main(self) -> None:
+        """Run the components until the first one returns or raises an error, then cancel the rest."""
+        self.loop = asyncio.get_running_loop()
+        tasks = [asyncio.ensure_future(component) for component in self.components()]
+
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for task in done:
+            task.result()  # Reraise any error from the component.
+
+    def components(self) -> list:
+        """Coroutines of the components to run concurrently.
+
+        Called inside the event loop, so queues between components can be created here. Runs the methods in
+         self.rates if there are any, otherwise run_loop. Should be overwritten in an implementation which splits up
+         run in other ways.
+        """
+        if len(self.rates) > 0:
+            return [self.periodic(name, rate, main=n == 0) for n, (name, rate) in enumerate(self.rates.items())]
+
+        return [self.run_loop()]
+
+    async def run_loop(self) -> None:
+        """Component which runs self.run in the executor every tick, like Manager.mainloop."""
+        while await self.tick():
+            start = time.monotonic()
+            with span("Manager.run"):
+                await self.offload(self.run)
+
+            if self.recorder is not None:
+                self.record_tick(start)
+
+    async def periodic(self, name: str, rate: float, main: bool = False) -> None:
+        """Component which runs the method called name in the executor rate times a second.
+
+        The main component runs once per tick, see tick. Others run on their own DeadlineScheduler, stored in
+         self.schedulers, skipping missed deadlines if they overrun, and can be run early with request.
+        """
+        func = getattr(self, name)
+        label = "{}.{}".format(type(self).__name__, name)
+
+        if main:
+            while await self.tick():
+                start = time.monotonic()
+                with span(label):
+                    await self.offload(func)
+
+                if self.recorder is not None:
+                    self.record_tick(start)
+            return
+
+        scheduler = self.schedulers[name] = DeadlineScheduler(1 / rate)
+        requested = self.requested[name] = asyncio.Event()
+        while True:
+            delay = scheduler.next_deadline() - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(requested.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            requested.clear()
+            scheduler.start_tick()
+
+            with span(label):
+                await self.offload(func)
+
+    def request(self, name: str) -> None:
+        """Run a periodic component as soon as possible, rather than waiting for its next deadline.
+
+        For slow components which should also run on demand, eg recalculating routes when the destination changes.
+         Can be called from any thread.
+        """
+        if self.loop is not None and name in self.requested:
+            self.loop.call_soon_threadsafe(self.requested[name].set)
+
+    async def tick(self) -> bool:
+        """Wait for the next tick, as set by mainloop's period, and count it.
+
+        Returns False once mainloop's ticks have all been run, so the main component of a system can loop with
+         `while await self.tick():`.
+        """
+        if self.ticks is not None and self.count >= self.ticks:
+            return False
+
+        if self.scheduler is not None:
+            await self.scheduler.wait_async()
+
+        self.count += 1
+
+        return True
+
+    async def offload(self, func: callable, *args, process: bool = False, **kwargs) -> object:
+        """Run a blocking function in an executor, returning its result without blocking the event loop.
+
+        By default the function runs in a thread, so can use and change the system's components. With process=True
+         it runs in a separate process instead, which avoids the GIL for pure Python work, but the function and its
+         arguments must be picklable, and any changes it makes to them are lost.
+        """
+        executor = self.executor
+        if process:
+            if self.process_executor is None:
+                self.process_executor = ProcessPoolExecutor(self.processes)
+            executor = self.process_executor
+
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
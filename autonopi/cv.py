@@ -1,40 +1,160 @@
 #!/usr/bin/env python3
 
 """Computer Vision module."""
-from math import floor, inf
+from collections.abc import Sequence
+from functools import lru_cache
+from itertools import compress
+from math import floor, inf, prod
 
 import cv2
 import numpy as np
 import numpy.polynomial.polynomial as pl
 
-camera = cv2.VideoCapture(0)
+from .geometry import FrameRemap
+from .hardware.camera import open_camera
+from .tracing import span, traced
+
+
+def __getattr__(name: str) -> object:
+    """Get the default camera when autonopi.cv.camera is first used, rather than opening it on import.
+
+    New code should use hardware.camera.open_camera, which this wraps.
+    """
+    if name == "camera":
+        return open_camera()
+
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def hsv_ranges(hue: float, sat: list[float], val: list[float], hue_tol: float) -> list[tuple[np.ndarray]]:
+    """Calculate the lower and upper bounds used by cv2.inRange for a HSV filter.
+
+    See LineDetector.filter_hsv for a description of the parameters.
+
+    Returns
+    -------
+    list[tuple[np.ndarray]]
+        List of (lower, upper) bounds. If the range of hues wraps around past 0/180, this will contain two ranges,
+         one either side of the wrap, which should be combined. Otherwise it contains one.
+    """
+    hue = hue % 180
+    low, high = hue - hue_tol, hue + hue_tol
+
+    if high - low >= 179:  # All hues
+        hues = [(0, 179)]
+    elif low < 0:
+        hues = [(low + 180, 179), (0, high)]
+    elif high >= 180:
+        hues = [(low, 179), (0, high - 180)]
+    else:
+        hues = [(low, high)]
+
+    return [(np.array([h_low, sat[0], val[0]]), np.array([h_high, sat[1], val[1]])) for h_low, h_high in hues]
+
+
+@lru_cache(maxsize=16)
+def hsv_lut(hue: float, sat: tuple[float], val: tuple[float], hue_tol: float, bits: int = 5) -> np.ndarray:
+    """Build a lookup table, giving the result of a HSV filter for every colour in a quantised BGR cube.
+
+    Each channel is quantised to the given number of bits, and the table is indexed by
+     (b << 2 * bits) | (g << bits) | r, using the quantised values. Each entry is the filter result for the centre of
+     that cube, 0 or 255.
+    Tables are cached, so are only built once for each set of parameters. Note sat and val must be tuples for this.
+    """
+    levels = 1 << bits
+    centres = (np.arange(levels, dtype=np.uint8) << (8 - bits)) + (1 << (7 - bits))
+
+    b, g, r = np.meshgrid(centres, centres, centres, indexing="ij")
+    # cvtColor needs a 2D image, so arrange the cube as levels^2 rows of levels pixels. Row major, so order is kept.
+    cube = np.stack([b, g, r], axis=-1).reshape(levels * levels, levels, 3)
+    hsv_cube = cv2.cvtColor(cube, cv2.COLOR_BGR2HSV)
+
+    table = np.zeros((levels * levels, levels), dtype=np.uint8)
+    for low_bound, high_bound in hsv_ranges(hue, sat, val, hue_tol):
+        table |= cv2.inRange(hsv_cube, low_bound, high_bound)
+
+    return table.reshape(-1)
 
 
 class LineDetector:
     """Canny Line Detector."""
 
-    def __init__(self, cam: cv2.VideoCapture, rotate: int = None):
+    engines = ("hough", "windows")  # Lane finding engines available to find_lanes.
+
+    def __init__(self,
+                 cam: cv2.VideoCapture,
+                 rotate: int = None,
+                 track: bool = False,
+                 scale: float = 1.0,
+                 engine: str = "hough",
+                 remap: FrameRemap = None,
+                 ):
         self.cam = cam  # Store reference to the VideoCapture object
 
+        if engine not in self.engines:
+            raise ValueError("Unknown lane finding engine '{}', expected one of {}".format(engine, self.engines))
+        self.engine = engine  # Engine used by find_lanes: "hough" for process_frame, "windows" for sliding_windows.
+
         self.rotation = rotate  # How much to rotate a camera image when fetched.
+        # Undistortion and bird's-eye transform applied when fetched, in the same pass as the rotation.
+        self.remap = remap
+
+        self.scale = scale  # Factor to resize frames by before processing them, see process_frame.
+
+        ## Region of interest tracking, see process_frame
+        # If True, only search for lines in a corridor around the lane lines found in the previous frame.
+        self.tracking = track
+        self.track_margin = 0.08  # Half width of the corridor around each lane line, as a fraction of frame width.
+        self.track_strips = 3  # Number of horizontal strips the corridor is split into.
+        self.track_min_lines = 2  # Number of lines a side needs for its fit to be trusted for the next frame.
+        # Fit of each side's lane line from the last call to lane_slope, as (intercept, gradient) or None.
+        self.side_fits = (None, None)
+        self.tracked = False  # Whether the last call to process_frame used the corridor.
 
+        # Capture time and sequence number of the last fetched frame, if the camera provides them (see FrameGrabber).
+        self.frame_time = None
+        self.frame_seq = None
+
+        # Preallocated images used by process_frame, so that each stage can write its output in place.
+        self.buffers = {}
+
+        self.lut_bits = 5  # Bits per channel of the colour cube used by the HSV lookup table, see filter_hsv.
+
+    @traced()
     def fetch_image(self, flag: int = 1) -> np.ndarray:
-        """Read an image from camera."""
-        ret, frame = self.cam.read()
+        """Read an image from camera.
+
+        If the camera has a .read_latest() method, as hardware.camera.FrameGrabber does, this is used instead so that
+         the frame's capture time and sequence number are stored in self.frame_time and self.frame_seq.
+
+        If self.remap is set, the frame is corrected by it (see geometry.FrameRemap), with the rotation composed into
+         the same remap, rather than rotated separately.
+        """
+        if callable(getattr(self.cam, "read_latest", None)):
+            frame, self.frame_time, self.frame_seq = self.cam.read_latest()
+            ret = frame is not None
+        else:
+            ret, frame = self.cam.read()
+
         if ret:
-            if self.rotation is not None:
+            if self.remap is not None:
+                frame = self.remap.apply(frame, self.rotation)
+            elif self.rotation is not None:
                 frame = cv2.rotate(frame, self.rotation)
 
             return frame
         else:
             raise ValueError("Frame not Available.")
 
+    @traced()
     def filter_hsv(self,
                    frame: np.ndarray,
                    hue: float,
                    sat: list[float],
                    val: list[float],
-                   hue_tol: float = 45) -> np.ndarray:
+                   hue_tol: float = 45,
+                   lut: bool = False,
+                   ) -> np.ndarray:
         """Filter an image using a given HSV filter.
 
         Parameters
@@ -53,6 +173,12 @@ class LineDetector:
         hue_tol : float, default 22.5
             Tolerance in hue, defines a range of hues to allow.
             Note that since OpenCV uses 0 - 180 for hue, the default value is equivalent to 45°.
+            The range of hues wraps around, so eg a hue of 5 with tolerance 15 allows hues 170 - 180 and 0 - 20.
+        lut : bool, default False
+            If true, look the result up in a table built from a quantised BGR cube (see hsv_lut), instead of
+             converting the image to HSV. The table is only built once for each set of parameters, but colours are
+             quantised to self.lut_bits bits per channel, so the result is approximate near the edges of the range.
+            Which is faster depends on the platform, see benchmarks/bench_hsv.py.
 
         Returns
         -------
@@ -60,22 +186,55 @@ class LineDetector:
             A monochrome image, white representing areas of the image which
              match the filter conditions.
         """
+        if lut:
+            table = hsv_lut(hue, tuple(sat), tuple(val), hue_tol, self.lut_bits)
+            return self.apply_lut(frame, table, np.empty(frame.shape[:2], dtype=np.uint8))
+
         hsv_image = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
 
-        low_bound = np.array([(hue - hue_tol) % 180,
-                              sat[0],
-                              val[0],
-                              ])
+        return self.in_ranges(hsv_image, hsv_ranges(hue, sat, val, hue_tol))
+
+    def in_ranges(self, hsv_image: np.ndarray, ranges: list[tuple[np.ndarray]], name: str = None,
+                  extent: tuple[int] = None) -> np.ndarray:
+        """Find the pixels of a HSV image which lie in any of the given ranges, from hsv_ranges.
+
+        If name is given, the mask is written into preallocated buffers with that name and extent (see buffer).
+        """
+        size = hsv_image.shape[:2]
+        mask = None if name is None else self.buffer("mask" + name, size, extent=extent)
 
-        high_bound = np.array([(hue + hue_tol) % 180,  # Modulus allows hue to "wrap around"
-                               sat[1],
-                               val[1],
-                               ])
+        low_bound, high_bound = ranges[0]
+        mask = cv2.inRange(hsv_image, low_bound, high_bound, dst=mask)
 
-        mask = cv2.inRange(hsv_image, low_bound, high_bound)
+        for low_bound, high_bound in ranges[1:]:  # Hue wraps around, so combine with the other side.
+            other = None if name is None else self.buffer("wrap" + name, size, extent=extent)
+            mask = cv2.bitwise_or(mask, cv2.inRange(hsv_image, low_bound, high_bound, dst=other), dst=mask)
 
         return mask
 
+    def apply_lut(self, frame: np.ndarray, table: np.ndarray, mask: np.ndarray, name: str = "",
+                  extent: tuple[int] = None) -> np.ndarray:
+        """Look up the HSV filter result of every pixel of a BGR frame in a table from hsv_lut.
+
+        The result is written into mask, and the intermediate arrays are kept in buffers with the given name and
+         extent (see buffer), so no memory is allocated once these exist.
+        """
+        bits = self.lut_bits
+        index_type = np.uint16 if 3 * bits <= 16 else np.uint32
+
+        quantised = np.right_shift(frame, 8 - bits, out=self.buffer("lutq" + name, frame.shape, extent=extent))
+        index = self.buffer("luti" + name, frame.shape[:2], index_type, extent)
+
+        # index = (b << 2 * bits) | (g << bits) | r
+        np.copyto(index, quantised[..., 0])
+        np.left_shift(index, bits, out=index)
+        np.bitwise_or(index, quantised[..., 1], out=index)
+        np.left_shift(index, bits, out=index)
+        np.bitwise_or(index, quantised[..., 2], out=index)
+
+        return np.take(table, index, out=mask)
+
+    @traced()
     def v_crop(self, image: np.ndarray, top: float, bottom: float = 0.0, blkbar: bool = False) -> np.ndarray:
         """Crop an image vertically between bottom and top.
 
@@ -107,9 +266,7 @@ class LineDetector:
         else:
             height, width = image.shape
 
-        # Top and bottom in pixels
-        # Note, 1 - (top, bottom) is used since numpy indexes from the top of the image.
-        top_pix, bottom_pix = floor((1 - top) * height), floor((1 - bottom) * height)
+        top_pix, bottom_pix = self.crop_rows(height, top, bottom)
 
         if not blkbar:
             return image[top_pix:bottom_pix, 0:width]
@@ -151,6 +308,42 @@ class LineDetector:
 
             return result
 
+    def crop_rows(self, height: int, top: float, bottom: float = 0.0) -> tuple[int]:
+        """Convert the top and bottom of a vertical crop, as used by v_crop, into the rows of an image.
+
+        Returns
+        -------
+        int, int
+            The first row inside the crop and the first row below it, such that image[top_pix:bottom_pix] is the
+             cropped image.
+        """
+        # Note, 1 - (top, bottom) is used since numpy indexes from the top of the image.
+        return floor((1 - top) * height), floor((1 - bottom) * height)
+
+    def buffer(self, name: str, shape: tuple[int], dtype: type = np.uint8, extent: tuple[int] = None) -> np.ndarray:
+        """Get a preallocated image, for use as the output of a stage in process_frame.
+
+        The same array is returned each time, unless the shape or dtype requested changes, in which case it is
+         reallocated.
+
+        If extent is given, as the largest (rows, columns) the image will have, the array is allocated at that size,
+         and a view of its start with the requested shape is returned. The view is contiguous, so OpenCV writes into
+         it in place, and the array is only reallocated if the extent or dtype changes, not as the shape does. This is
+         used for the tracking windows, which change size from frame to frame.
+        """
+        size = shape if extent is None else (*extent, *shape[2:])
+        buf = self.buffers.get(name)
+
+        if buf is None or buf.shape != size or buf.dtype != dtype:
+            buf = np.empty(size, dtype=dtype)
+            self.buffers[name] = buf
+
+        if extent is None:
+            return buf
+
+        return buf.reshape(-1)[:prod(shape)].reshape(shape)
+
+    @traced()
     def canny(self, image: np.ndarray, lwr: int = 100, upr: int = 200, krnl: int = 3) -> np.ndarray:
         """Canny Edge detection algorithm.
 
@@ -174,6 +367,7 @@ class LineDetector:
 
         return result
 
+    @traced()
     def hough(self,
               image: np.ndarray,
               rho: float = 1,
@@ -204,6 +398,7 @@ class LineDetector:
 
         return hough
 
+    @traced()
     def houghP(self,
                image: np.ndarray,
                rho: float = 1,
@@ -238,6 +433,372 @@ class LineDetector:
 
         return hough
 
+    @traced()
+    def process_frame(self,
+                      frame: np.ndarray,
+                      hue: float,
+                      sat: list[float],
+                      val: list[float],
+                      hue_tol: float = 45,
+                      top: float = 1.0,
+                      bottom: float = 0.0,
+                      lwr: int = 100,
+                      upr: int = 200,
+                      krnl: int = 3,
+                      rho: float = 1,
+                      theta: float = np.pi / 180,
+                      thresh: float = 10,
+                      minL: float = 16,
+                      maxG: float = 4,
+                      lut: bool = False,
+                      ) -> np.ndarray:
+        """Run the full line detection process on a frame: filter_hsv, v_crop, canny, then houghP.
+
+        This gives the same result as running each stage separately, but is faster since:
+        - Only the rows inside the crop are processed, by taking a view of the frame instead of blacking out the rest.
+        - Each stage writes its output into an image which is allocated once and reused between frames.
+
+        Note that as a result, the images from each stage are overwritten on the next call.
+
+        If self.scale isn't 1, the crop is resized by this factor before any other stage, eg 0.5 processes a quarter
+         of the pixels. The Hough threshold, minL and maxG are scaled to match, and lines are scaled back up, so
+         the result is still in the coordinates of the full frame. For an image pyramid level n, use 0.5 ** n.
+
+        If self.tracking is True, and both lane lines were found confidently by the last call to lane_slope, only
+         windows around where the lines are expected to be are searched (see track_windows). Otherwise the whole crop
+         is searched, so tracking falls back to a full search whenever a side is lost.
+
+        Parameters
+        ----------
+        frame : np.ndarray
+            The BGR image to process.
+        hue, sat, val, hue_tol, lut
+            HSV filter parameters, see filter_hsv.
+        top, bottom
+            Vertical crop, see v_crop.
+        lwr, upr, krnl
+            Canny parameters, see canny.
+        rho, theta, thresh, minL, maxG
+            Probabilistic Hough parameters, see houghP.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (N, 4), where each row is a line [x0, y0, x1, y1] in the coordinates of the full frame.
+            If no lines are found, N is 0.
+        """
+        if bottom > top:
+            raise ValueError("Image bottom > top ({:1.2f} > {:1.2f})".format(bottom, top))
+
+        image, top_pix, bottom_pix = self.crop_scaled(frame, top, bottom)
+
+        scale = self.scale
+        if scale != 1:
+            # Votes and lengths are measured in pixels, so they shrink with the image.
+            thresh, minL, maxG = max(1, round(thresh * scale)), minL * scale, maxG * scale
+
+        ranges = hsv_ranges(hue, sat, val, hue_tol)
+        table = hsv_lut(hue, tuple(sat), tuple(val), hue_tol, self.lut_bits) if lut else None
+        params = (ranges, table, lwr, upr, krnl, rho, theta, thresh, minL, maxG)
+
+        windows = self.track_windows(frame.shape[1], top_pix, bottom_pix) if self.tracking else None
+        self.tracked = windows is not None
+
+        if windows is None:  # Search the whole crop.
+            windows = [(0, image.shape[0], 0, image.shape[1])]
+        else:  # Move windows from frame coordinates to the coordinates of image.
+            windows = [(round((y0 - top_pix) * scale), round((y1 - top_pix) * scale),
+                        round(x0 * scale), round(x1 * scale))
+                       for y0, y1, x0, x1 in windows]
+
+        found = []
+        for n, (y0, y1, x0, x1) in enumerate(windows):
+            if y1 <= y0 or x1 <= x0:
+                continue
+
+            # Slicing gives a view, not a copy. The window's buffers are sized to fit the whole crop, so they are
+            #  reused as the windows move and change size.
+            lines = self.detect_region(image[y0:y1, x0:x1], str(n), *params, extent=image.shape[:2])
+
+            if lines is not None:
+                lines = lines.reshape(-1, 4)
+                lines[:, 0::2] += x0  # Move from window coordinates to image coordinates
+                lines[:, 1::2] += y0
+                found.append(lines)
+
+        if len(found) == 0:
+            return np.empty((0, 4), dtype=np.int32)
+
+        lines = np.concatenate(found) if len(found) > 1 else found[0]
+
+        if scale != 1:  # Map pixel centres in the small image back to the full frame.
+            lines = np.rint((lines + 0.5) / scale - 0.5).astype(np.int32)
+
+        lines[:, 1::2] += top_pix  # Move y values from crop coordinates to frame coordinates
+
+        return lines
+
+    @traced()
+    def detect_region(self,
+                      region: np.ndarray,
+                      name: str,
+                      ranges: list[tuple[np.ndarray]],
+                      table: np.ndarray,
+                      lwr: int,
+                      upr: int,
+                      krnl: int,
+                      rho: float,
+                      theta: float,
+                      thresh: float,
+                      minL: float,
+                      maxG: float,
+                      extent: tuple[int] = None,
+                      ) -> np.ndarray:
+        """Run the stages of process_frame on one region of a frame.
+
+        Each region is given a name, so that it has its own set of buffers. If extent is given, as the largest
+         (rows, columns) the region will have, the buffers are allocated at that size, see buffer.
+        If table is given, it is used to filter the region instead of ranges, see filter_hsv.
+
+        Returns
+        -------
+        np.ndarray
+            The output of HoughLinesP, in the coordinates of the region. None if no lines are found.
+        """
+        size = region.shape[:2]
+
+        with span("LineDetector.detect_region.filter"):
+            mask = self.mask_region(region, name, ranges, table, extent)
+
+        with span("LineDetector.detect_region.canny"):
+            edges = cv2.Canny(mask, lwr, upr, edges=self.buffer("edges" + name, size, extent=extent),
+                              apertureSize=krnl)
+
+        with span("LineDetector.detect_region.hough"):
+            return cv2.HoughLinesP(edges, rho, theta, thresh, None, minL, maxG)
+
+    def track_windows(self, width: int, top_pix: int, bottom_pix: int) -> list[tuple[int]]:
+        """Predict the windows containing each lane line, using the fits from the last call to lane_slope.
+
+        The crop is split into self.track_strips horizontal strips. In each strip, a window is placed around where
+         each side's fitted line crosses it, widened by self.track_margin on either side. If the windows for the two
+         sides overlap, they are merged.
+
+        Returns
+        -------
+        list[tuple[int]]
+            Windows as (top row, bottom row, left column, right column), or None if either side doesn't have a
+             trusted fit, in which case the whole frame should be searched.
+        """
+        if any(fit is None for fit in self.side_fits):
+            return None
+
+        margin = self.track_margin * width
+        edges = np.linspace(top_pix, bottom_pix, self.track_strips + 1).astype(int).tolist()
+
+        windows = []
+        for y0, y1 in zip(edges[:-1], edges[1:]):
+            if y1 <= y0:
+                continue
+
+            spans = []
+            for intercept, grad in self.side_fits:
+                xs = (np.array([y0, y1]) - intercept) / grad  # Where the line crosses the top and bottom of the strip
+                x0 = max(0, floor(xs.min() - margin))
+                x1 = min(width, floor(xs.max() + margin) + 1)
+                if x1 > x0:
+                    spans.append([x0, x1])
+
+            spans.sort()
+            if len(spans) == 2 and spans[1][0] <= spans[0][1]:  # Overlapping, so merge
+                spans = [[spans[0][0], max(spans[0][1], spans[1][1])]]
+
+            windows.extend((y0, y1, x0, x1) for x0, x1 in spans)
+
+        return windows
+
+    def crop_scaled(self, frame: np.ndarray, top: float, bottom: float) -> tuple[np.ndarray, int, int]:
+        """Crop the rows of a frame, see v_crop, and resize them by self.scale.
+
+        Only the rows inside the crop are resized, once, so every stage after this works on the small image.
+
+        Returns
+        -------
+        np.ndarray, int, int
+            The cropped image, and the first and last (exclusive) rows of the crop in the frame. If self.scale is 1,
+             the image is a view of the frame. Otherwise it is overwritten on the next call.
+        """
+        top_pix, bottom_pix = self.crop_rows(frame.shape[0], top, bottom)
+        image = frame[top_pix:bottom_pix]  # View, not a copy.
+
+        if self.scale != 1:
+            size = (max(1, round(image.shape[1] * self.scale)), max(1, round(image.shape[0] * self.scale)))
+            image = cv2.resize(image, size, dst=self.buffer("scaled", (size[1], size[0], *image.shape[2:])),
+                               interpolation=cv2.INTER_AREA)
+
+        return image, top_pix, bottom_pix
+
+    def mask_region(self, region: np.ndarray, name: str, ranges: list[tuple[np.ndarray]], table: np.ndarray,
+                    extent: tuple[int] = None) -> np.ndarray:
+        """Filter a region of a frame by colour, into its own buffers with the given extent, see filter_hsv and buffer.
+
+        If table is given, it is used to filter the region instead of ranges.
+        """
+        size = region.shape[:2]
+
+        if table is not None:
+            return self.apply_lut(region, table, self.buffer("mask" + name, size, extent=extent), name, extent)
+        else:
+            hsv_image = cv2.cvtColor(region, cv2.COLOR_BGR2HSV,
+                                     dst=self.buffer("hsv" + name, region.shape, extent=extent))
+            return self.in_ranges(hsv_image, ranges, name, extent)
+
+    @traced()
+    def sliding_windows(self,
+                        frame: np.ndarray,
+                        hue: float,
+                        sat: list[float],
+                        val: list[float],
+                        hue_tol: float = 45,
+                        top: float = 1.0,
+                        bottom: float = 0.0,
+                        windows: int = 9,
+                        margin: float = 0.08,
+                        min_pixels: int = 20,
+                        lut: bool = False,
+                        ) -> tuple[np.ndarray]:
+        """Find the left and right lane lines by following them up the HSV mask with sliding windows.
+
+        This is an alternative to process_frame, which skips Canny and the Hough transform. The base of each line is
+         found from the peak in each half of a histogram of the mask's columns. The crop is split into horizontal
+         strips, and the histogram taken over the bottom strip (or the whole crop, if a half is empty there). In each
+         strip, a window centred on the line is searched, moving up to follow the mask pixels inside it.
+
+        If self.tracking is True, and a side was found confidently by the last call to lane_slope, its base is
+         predicted from that fit instead of the histogram.
+
+        Parameters
+        ----------
+        frame : np.ndarray
+            The BGR image to process.
+        hue, sat, val, hue_tol, lut
+            HSV filter parameters, see filter_hsv.
+        top, bottom
+            Vertical crop, see v_crop.
+        windows : int, default 9
+            Number of strips the crop is split into.
+        margin : float, default 0.08
+            Half width of each window, as a fraction of the frame width.
+        min_pixels : int, default 20
+            Number of mask pixels a window needs for the line to be found in it. Measured in the full frame, so it is
+             scaled down with self.scale.
+
+        Returns
+        -------
+        np.ndarray, np.ndarray
+            Left and right lane lines, each an array of shape (N, 4) joining the centres of the line in consecutive
+             windows, as [x0, y0, x1, y1] in the coordinates of the full frame. This is the format lane_slope takes.
+        """
+        if bottom > top:
+            raise ValueError("Image bottom > top ({:1.2f} > {:1.2f})".format(bottom, top))
+
+        image, top_pix, bottom_pix = self.crop_scaled(frame, top, bottom)
+        scale = self.scale
+
+        ranges = hsv_ranges(hue, sat, val, hue_tol)
+        table = hsv_lut(hue, tuple(sat), tuple(val), hue_tol, self.lut_bits) if lut else None
+        with span("LineDetector.sliding_windows.filter"):
+            mask = self.mask_region(image, "w", ranges, table)
+
+        height, width = mask.shape
+        half = max(1, round(margin * frame.shape[1] * scale))
+        min_count = max(1, round(min_pixels * scale * scale)) * 255  # Mask pixels are 255
+
+        strip = height / windows
+        first = max(1, round(strip))
+
+        # Column histogram of the first strip, counting mask pixels. The lines are diagonal, so a taller histogram
+        #  would smear each peak across the columns the line passes through.
+        histogram = cv2.reduce(mask[height - first:], 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S)[0]
+        mid = width // 2
+        halves = (slice(0, mid), slice(mid, width))
+        if not (histogram[halves[0]].any() and histogram[halves[1]].any()):
+            # A line can leave the side of the frame before reaching the bottom, so use the whole crop instead.
+            histogram += cv2.reduce(mask[:height - first], 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S)[0]
+
+        bases = [int(np.argmax(histogram[halves[0]])), mid + int(np.argmax(histogram[halves[1]]))]
+        found = [histogram[bases[0]] > 0, histogram[bases[1]] > 0]
+
+        fits = self.side_fits if self.tracking else (None, None)
+        self.tracked = False
+        for side, fit in enumerate(fits):
+            if fit is not None:  # Predict where the line enters the bottom of the crop.
+                intercept, grad = fit
+                base = ((bottom_pix - 1 - intercept) / grad + 0.5) * scale - 0.5
+                if 0 <= base < width:
+                    bases[side], found[side] = round(base), True
+                    self.tracked = True
+
+        result = []
+        for side in range(2):
+            points = []
+            centre = bases[side]
+
+            if found[side]:
+                for n in range(windows):
+                    y0, y1 = round(height - (n + 1) * strip), round(height - n * strip)
+                    x0, x1 = max(0, centre - half), min(width, centre + half + 1)
+                    if y1 <= y0 or x1 <= x0:
+                        continue
+
+                    columns = cv2.reduce(mask[y0:y1, x0:x1], 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S)[0]
+                    total = columns.sum()
+
+                    if total >= min_count:  # Recentre on the mean column of the pixels in the window.
+                        x = x0 + np.dot(columns, np.arange(len(columns))) / total
+                        points.append((x, (y0 + y1 - 1) / 2))
+                        centre = round(x)
+
+            points = np.array(points, dtype=np.float64).reshape(-1, 2)
+            points = (points + 0.5) / scale - 0.5  # Map pixel centres back to the full frame.
+            points[:, 1] += top_pix
+
+            result.append(np.hstack([points[:-1], points[1:]]))  # Join consecutive points into lines.
+
+        return tuple(result)
+
+    @traced()
+    def find_lanes(self,
+                   frame: np.ndarray,
+                   hue: float,
+                   sat: list[float],
+                   val: list[float],
+                   hue_tol: float = 45,
+                   top: float = 1.0,
+                   bottom: float = 0.0,
+                   bounds: list[float] = [0.0, 0.4],
+                   lut: bool = False,
+                   **kwargs,
+                   ) -> tuple[np.ndarray]:
+        """Find the left and right lane lines in a frame, using the engine chosen by self.engine.
+
+        "hough" runs process_frame, then split_lines with bounds. "windows" runs sliding_windows, which separates the
+         sides itself, so bounds are ignored. Any other keyword arguments are passed to the engine.
+
+        Returns
+        -------
+        np.ndarray, np.ndarray
+            Left and right lane lines, each an array of shape (N, 4), ready to pass to lane_slope.
+        """
+        params = {"hue": hue, "sat": sat, "val": val, "hue_tol": hue_tol, "top": top, "bottom": bottom, "lut": lut}
+
+        if self.engine == "windows":
+            return self.sliding_windows(frame, **params, **kwargs)
+        else:
+            lines = self.process_frame(frame, **params, **kwargs)
+            return self.split_lines(lines, frame.shape[1], bounds=bounds)
+
+    @traced()
     def arrange_lines(self, lines: list[list[int]]) -> list[list[int]]:
         """Take a list of line segments, and arrange their points such that the first point is below the second.
 
@@ -250,17 +811,23 @@ class LineDetector:
         -------
         list[list[int]]
             The arranged list in the same format as the input.
-            Note that if an iterable other than list is passed for lines, the return value with retain this type,
-             provided it has a .copy() method.
+            Note that if a numpy array is passed for lines, the return value will also be a numpy array, of the same
+             shape. Any other iterable will return a list.
         """
-        result = lines.copy()
+        array = np.asarray(lines)
+        flat = array.reshape(-1, 4)  # Also allows lines straight from houghP, with shape (N, 1, 4)
 
-        for line in result:
-            if line[1] > line[3]:
-                line[0], line[1], line[2], line[3] = line[2], line[3], line[0], line[1]
+        swap = flat[:, 1] > flat[:, 3]
 
-        return result
+        result = flat.copy()
+        result[swap] = flat[swap][:, [2, 3, 0, 1]]  # Swap the two points of every line which needs it, all at once.
+
+        if isinstance(lines, np.ndarray):
+            return result.reshape(array.shape)
+        else:
+            return result.tolist()
 
+    @traced()
     def split_lines(self,
                     lines: list[list[int]],
                     width: float,
@@ -288,55 +855,37 @@ class LineDetector:
         -------
         list[list[int]], list[list[int]] [, list[list[int]]]
             Left, right, and optionally out of bounds lines (according to keep_oob).
-            Note that if an iterable other than list is passed for lines, the return values with retain this type,
-             provided it has a .copy() method.
+            Note that the return values will have the same type as lines, which must be a numpy array or a sequence
+             such as a list.
         """
         l_bounds = [width * x for x in bounds]
         r_bounds = [width * (1 - x) for x in bounds]
 
-        if isinstance(lines, np.ndarray):
-            l_mask = np.ones(len(lines), dtype=bool)
-            r_mask = np.ones(len(lines), dtype=bool)
-            oob_mask = np.ones(len(lines), dtype=bool)
-
-            for n, line in enumerate(lines):
-                if l_bounds[0] <= line[0] < l_bounds[1]:
-                    r_mask[n] = False
-                    oob_mask[n] = False
-                elif r_bounds[1] < line[0] <= r_bounds[0]:
-                    l_mask[n] = False
-                    oob_mask[n] = False
-                else:
-                    l_mask[n] = False
-                    r_mask[n] = False
+        if not isinstance(lines, (np.ndarray, Sequence)):  # Don't know how to deal with this iterable
+            raise TypeError("lines is not a numpy array or a sequence (type '{}')".format(type(lines).__name__))
+
+        # Classify every line at once using the x coordinate of its first point.
+        x = np.asarray(lines).reshape(-1, 4)[:, 0]
 
+        l_mask = (l_bounds[0] <= x) & (x < l_bounds[1])
+        r_mask = ~l_mask & (r_bounds[1] < x) & (x <= r_bounds[0])  # Left takes priority if the bounds overlap.
+        oob_mask = ~(l_mask | r_mask)
+
+        if isinstance(lines, np.ndarray):
             l_lines = lines[l_mask]
             r_lines = lines[r_mask]
             oob_lines = lines[oob_mask]
-        elif callable(getattr(lines, "remove", None)):
-            l_lines = lines.copy()
-            r_lines = lines.copy()
-            oob_lines = lines.copy()
-
-            for line in lines:
-                if bounds[0] <= line[0] < bounds[1]:
-                    r_lines.remove(line)
-                    oob_lines.remove(line)
-                elif r_bounds[1] < line[0] <= r_bounds[0]:
-                    l_lines.remove(line)
-                    oob_lines.remove(line)
-                else:
-                    l_lines.remove(line)
-                    r_lines.remove(line)
-        else:  # Don't know how to deal with this iterable
-            raise TypeError("lines is not a numpy array or doesn't have .remove() method (type '{}')"
-                            .format(type(lines).__name__))
+        else:
+            l_lines = type(lines)(compress(lines, l_mask))
+            r_lines = type(lines)(compress(lines, r_mask))
+            oob_lines = type(lines)(compress(lines, oob_mask))
 
         if keep_oob:
             return l_lines, r_lines, oob_lines
         else:
             return l_lines, r_lines
 
+    @traced()
     def lane_slope(self, left: list[list[int]], right: list[list[int]]) -> tuple[int]:
         """Calculate the intercept and slope of the lane, based on a list of left and right lane lines.
 
@@ -357,7 +906,9 @@ class LineDetector:
             left_fit = pl.Polynomial.fit(left_points[:, 0], left_points[:, 1], 1)
             left_int, left_grad = left_fit.convert().coef
             left_theta = np.arctan(1 / left_grad)
+            left_track = (left_int, left_grad) if len(left) >= self.track_min_lines and left_grad != 0 else None
         else:
+            left_track = None
             left_int, left_theta = -inf, -inf
 
         if len(right) > 0:
@@ -365,9 +916,14 @@ class LineDetector:
             right_fit = pl.Polynomial.fit(right_points[:, 0], right_points[:, 1], 1)
             right_int, right_grad = right_fit.convert().coef
             right_theta = np.arctan(1 / right_grad)
+            right_track = (right_int, right_grad) if len(right) >= self.track_min_lines and right_grad != 0 else None
         else:
+            right_track = None
             right_int, right_theta = -inf, -inf
 
+        # If either side doesn't have enough lines to be confident, the next frame will be searched in full.
+        self.side_fits = (left_track, right_track)
+
         if len(right) == 0 or len(left) == 0:
             lane_theta, lane_int = max(left_theta, right_theta), max(left_int, right_int)
         else:
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+"""Geometric correction of camera frames.
+
+Lens undistortion, rotation and an inverse perspective (bird's-eye) transform are composed into a single pair of
+ cv2.remap maps, so correcting a frame takes one pass over it however many transforms are used. Building the maps is
+ slow, so they are built once per camera and resolution, and saved to disk to be loaded on later runs.
+"""
+
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+# Rotations supported by cv2.rotate, which LineDetector uses.
+ROTATIONS = (None, cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_180, cv2.ROTATE_90_COUNTERCLOCKWISE)
+
+
+class Calibration:
+    """Intrinsic calibration of a camera, as found by cv2.calibrateCamera."""
+
+    def __init__(self, camera_matrix: np.ndarray, dist_coeffs: np.ndarray, size: tuple[int]):
+        """Create a calibration.
+
+        Parameters
+        ----------
+        camera_matrix : np.ndarray
+            3x3 camera matrix.
+        dist_coeffs : np.ndarray
+            Distortion coefficients, in OpenCV's order (k1, k2, p1, p2[, k3...]).
+        size : tuple[int]
+            (width, height) of the frames the calibration was made at. Frames of other sizes with the same aspect
+             ratio can be corrected, by scaling the camera matrix.
+        """
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).reshape(-1)
+        self.size = tuple(size)
+
+    @classmethod
+    def from_file(cls, path: str) -> "Calibration":
+        """Load a calibration from a JSON file, with the keys "camera_matrix", "dist_coeffs" and "size"."""
+        with open(path) as f:
+            data = json.load(f)
+
+        return cls(data["camera_matrix"], data["dist_coeffs"], data["size"])
+
+    def save(self, path: str) -> None:
+        """Save the calibration to a JSON file, which can be loaded with from_file."""
+        with open(path, "w") as f:
+            json.dump({"camera_matrix": self.camera_matrix.tolist(),
+                       "dist_coeffs": self.dist_coeffs.tolist(),
+                       "size": list(self.size)}, f, indent=2)
+
+    def scaled_matrix(self, width: int, height: int) -> np.ndarray:
+        """Camera matrix for frames of a different size."""
+        matrix = self.camera_matrix.copy()
+        matrix[0] *= width / self.size[0]
+        matrix[1] *= height / self.size[1]
+
+        return matrix
+
+
+class FrameRemap:
+    """Corrects frames with a single cv2.remap, composing lens undistortion, rotation and a bird's-eye perspective.
+
+    The maps for each frame size and rotation are built the first time they are needed, and cached in memory and on
+     disk. Cached maps are found by a hash of the transforms, so changing the calibration or perspective builds new
+     maps rather than using stale ones.
+    """
+
+    def __init__(self,
+                 calibration: Calibration = None,
+                 src: list[list[float]] = None,
+                 dst: list[list[float]] = None,
+                 out_scale: float = 1.0,
+                 camera: str = "camera0",
+                 cache_dir: str = os.path.join(os.path.expanduser("~"), ".cache", "autonopi", "remap"),
+                 ):
+        """Create the remap stage.
+
+        Parameters
+        ----------
+        calibration : Calibration, optional
+            Lens calibration. If not given, frames aren't undistorted.
+        src, dst : list[list[float]], optional
+            Four points on the floor as seen in the upright, undistorted frame, and where they should be in the
+             bird's-eye view, as [x, y] fractions of the width and height of each. Typically src is a trapezium
+             along the lane lines, and dst a rectangle. If not given, no perspective transform is applied.
+        out_scale : float, default 1.0
+            Size of the output, relative to the upright frame.
+        camera : str, default "camera0"
+            Name of the camera, so that maps for different cameras are cached separately.
+        cache_dir : str, default ~/.cache/autonopi/remap
+            Directory to save maps in. If None, maps are only cached in memory.
+        """
+        if (src is None) != (dst is None):
+            raise ValueError("src and dst must be given together")
+
+        self.calibration = calibration
+        self.src = None if src is None else np.asarray(src, dtype=np.float32).reshape(4, 2)
+        self.dst = None if dst is None else np.asarray(dst, dtype=np.float32).reshape(4, 2)
+        self.out_scale = out_scale
+        self.camera = camera
+        self.cache_dir = cache_dir
+
+        self.maps = {}  # Fixed point maps, by (width, height, rotation).
+
+    def key(self, width: int, height: int, rotation: int) -> str:
+        """Name identifying the maps for a frame size and rotation, used for the cache file."""
+        params = [self.out_scale, rotation]
+        for array in [self.src, self.dst]:
+            params.append(None if array is None else array.tolist())
+        if self.calibration is not None:
+            params += [self.calibration.camera_matrix.tolist(), self.calibration.dist_coeffs.tolist(),
+                       self.calibration.size]
+
+        digest = hashlib.sha1(json.dumps(params).encode(), usedforsecurity=False).hexdigest()[:12]
+
+        return "{}_{}x{}_{}".format(self.camera, width, height, digest)
+
+    def build(self, width: int, height: int, rotation: int = None) -> tuple[np.ndarray]:
+        """Build the maps for frames of a size, as (map_x, map_y) floating point source coordinates.
+
+        Each output pixel is followed back through every transform: the inverse perspective, the rotation, and then
+         the lens distortion, to find the pixel of the raw frame it comes from.
+        """
+        if rotation not in ROTATIONS:
+            raise ValueError("Unsupported rotation {}, expected one of {}".format(rotation, ROTATIONS))
+
+        # Size of the frame after rotation.
+        up_w, up_h = (height, width) if rotation in (cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_90_COUNTERCLOCKWISE) \
+            else (width, height)
+        out_w, out_h = max(1, round(up_w * self.out_scale)), max(1, round(up_h * self.out_scale))
+
+        x, y = np.meshgrid(np.arange(out_w, dtype=np.float64), np.arange(out_h, dtype=np.float64))
+
+        # Bird's-eye view to upright frame.
+        if self.src is not None:
+            src = (self.src * [up_w, up_h]).astype(np.float32)
+            dst = (self.dst * [out_w, out_h]).astype(np.float32)
+            inverse = cv2.getPerspectiveTransform(dst, src).astype(np.float64)
+
+            w = inverse[2, 0] * x + inverse[2, 1] * y + inverse[2, 2]
+            x, y = ((inverse[0, 0] * x + inverse[0, 1] * y + inverse[0, 2]) / w,
+                    (inverse[1, 0] * x + inverse[1, 1] * y + inverse[1, 2]) / w)
+        else:
+            x, y = x / self.out_scale, y / self.out_scale
+
+        # Upright frame to raw frame, undoing cv2.rotate.
+        if rotation == cv2.ROTATE_180:
+            x, y = width - 1 - x, height - 1 - y
+        elif rotation == cv2.ROTATE_90_CLOCKWISE:
+            x, y = y, height - 1 - x
+        elif rotation == cv2.ROTATE_90_COUNTERCLOCKWISE:
+            x, y = width - 1 - y, x
+
+        # Undistorted raw frame to distorted raw frame, using the lens model.
+        if self.calibration is not None:
+            matrix = self.calibration.scaled_matrix(width, height)
+            points = np.stack([(x - matrix[0, 2]) / matrix[0, 0], (y - matrix[1, 2]) / matrix[1, 1],
+                               np.ones_like(x)], axis=-1).reshape(-1, 1, 3)
+            distorted, _ = cv2.projectPoints(points, np.zeros(3), np.zeros(3), matrix, self.calibration.dist_coeffs)
+            x, y = distorted[:, 0, 0].reshape(out_h, out_w), distorted[:, 0, 1].reshape(out_h, out_w)
+
+        return x.astype(np.float32), y.astype(np.float32)
+
+    def get_maps(self, width: int, height: int, rotation: int = None) -> tuple[np.ndarray]:
+        """Get the fixed point maps for frames of a size, loading or building them if needed."""
+        try:
+            return self.maps[(width, height, rotation)]
+        except KeyError:
+            pass
+
+        path = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, self.key(width, height, rotation) + ".npz")
+
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                maps = data["map1"], data["map2"]
+        else:
+            # Fixed point maps are smaller and faster to remap with than floating point.
+            maps = cv2.convertMaps(*self.build(width, height, rotation), cv2.CV_16SC2)
+
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.savez(path, map1=maps[0], map2=maps[1])
+
+        self.maps[(width, height, rotation)] = maps
+
+        return maps
+
+    def apply(self, frame: np.ndarray, rotation: int = None) -> np.ndarray:
+        """Correct a frame, rotating it by rotation (as cv2.rotate would) as part of the same pass."""
+        map1, map2 = self.get_maps(frame.shape[1], frame.shape[0], rotation)
+
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+
+"""Camera hardware interfaces.
+
+This file will include classes which wrap camera devices, eg the VideoCapture objects used by the CV system.
+"""
+
+import threading as thr
+import time
+
+import cv2
+import numpy as np
+
+from ...tracing import span
+
+
+class CameraSource:
+    """A camera device, opened the first time a frame is read from it rather than when it is created.
+
+    It has the same .read() interface as cv2.VideoCapture. Use open_camera to get one, so that every user of a device
+     with the same settings shares a single handle.
+    """
+
+    def __init__(self,
+                 device: int = 0,
+                 backend: int = cv2.CAP_ANY,
+                 width: int = None,
+                 height: int = None,
+                 fps: float = None,
+                 buffer_size: int = None,
+                 ):
+        """Describe the camera, without opening it.
+
+        Parameters
+        ----------
+        device : int, default 0
+            Device index, as passed to cv2.VideoCapture.
+        backend : int, default cv2.CAP_ANY
+            Capture API to use, eg cv2.CAP_V4L2.
+        width, height, fps : optional
+            Frame size and rate to request from the device. If not given, the device's defaults are used.
+        buffer_size : int, optional
+            Number of frames the driver queues. 1 keeps frames fresh, if the backend supports it.
+        """
+        self.device = device
+        self.backend = backend
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.buffer_size = buffer_size
+
+        self.capture = None  # The cv2.VideoCapture, once opened successfully.
+        self.lock = thr.RLock()  # Held while opening, reading and releasing, so the capture can't change mid read.
+
+        self.open_time = None  # Seconds taken to open the device and negotiate its settings.
+        self.settings = {}  # Settings the device actually agreed to, which may differ from those requested.
+
+    @property
+    def key(self) -> tuple:
+        """The settings identifying this source in the registry, see open_camera."""
+        return self.device, self.backend, self.width, self.height, self.fps, self.buffer_size
+
+    def open(self) -> bool:
+        """Open the device, if it isn't already. Returns whether it is open.
+
+        The capture is only kept if the device opened, so a failed open is tried again on the next read.
+        """
+        with self.lock:
+            if self.capture is None:
+                start = time.perf_counter()
+
+                capture = cv2.VideoCapture(self.device, self.backend)
+                for prop, value in [(cv2.CAP_PROP_FRAME_WIDTH, self.width),
+                                    (cv2.CAP_PROP_FRAME_HEIGHT, self.height),
+                                    (cv2.CAP_PROP_FPS, self.fps),
+                                    (cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)]:
+                    if value is not None:
+                        capture.set(prop, value)
+
+                self.open_time = time.perf_counter() - start
+
+                if not capture.isOpened():
+                    capture.release()
+                    return False
+
+                self.settings = {
+                    "backend": capture.getBackendName(),
+                    "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                    "fps": capture.get(cv2.CAP_PROP_FPS),
+                }
+                self.capture = capture
+
+            return self.capture.isOpened()
+
+    def isOpened(self) -> bool:  # Named to match cv2.VideoCapture
+        """Whether the device has been opened successfully. This doesn't open it."""
+        return self.capture is not None and self.capture.isOpened()
+
+    def read(self) -> tuple[bool, np.ndarray]:
+        """Read a frame, opening the device first if needed. Returns (False, None) if it can't be opened."""
+        with self.lock:
+            if not self.open():
+                return False, None
+
+            return self.capture.read()
+
+    def release(self) -> None:
+        """Close the device. It will be opened again if another frame is read."""
+        with self.lock:
+            if self.capture is not None:
+                self.capture.release()
+                self.capture = None
+
+
+# Camera sources by their settings, see open_camera.
+sources = {}
+sources_lock = thr.Lock()
+
+
+def open_camera(device: int = 0,
+                backend: int = cv2.CAP_ANY,
+                width: int = None,
+                height: int = None,
+                fps: float = None,
+                buffer_size: int = None,
+                ) -> CameraSource:
+    """Get the CameraSource for a device and settings, creating it if it doesn't exist yet.
+
+    The device isn't opened until a frame is read, so this is cheap and can be called at any time. Calls with the same
+     arguments return the same source, so a device is only opened once however many LineDetectors use it. See
+     CameraSource for a description of the parameters.
+    """
+    key = (device, backend, width, height, fps, buffer_size)
+
+    with sources_lock:
+        if key not in sources:
+            sources[key] = CameraSource(*key)
+
+        return sources[key]
+
+
+def release_cameras() -> None:
+    """Release every camera source opened by open_camera."""
+    with sources_lock:
+        for source in sources.values():
+            source.release()
+
+
+class FrameGrabber:
+    """Threaded frame capture, which always hands out the newest frame available.
+
+    Reading from a camera blocks until the driver has a frame ready, and frames which have been sitting in the driver's
+     queue may be old by the time they are processed. This class reads from the camera continuously in a background
+     thread, storing frames in a small ring buffer, so that the main thread can always take the most recent frame
+     without waiting on camera I/O.
+
+    It has the same .read() interface as cv2.VideoCapture, so it can be passed to LineDetector in place of a camera.
+    """
+
+    def __init__(self, cam: object, size: int = 2, timeout: float = 1.0, max_backoff: float = 1.0):
+        self.cam = cam  # Store reference to the VideoCapture (or similar) object
+
+        self.timeout = timeout  # How long .read() will wait for a new frame before giving up.
+
+        # Seconds to wait before reading again after a failed read, eg while a camera won't open. Starts at a frame
+        #  period, and doubles with each failure in a row up to max_backoff, so a missing camera isn't retried in a
+        #  busy loop.
+        fps = getattr(cam, "fps", None)
+        self.min_backoff = 1 / fps if fps else 1 / 30
+        self.max_backoff = max_backoff
+        self.backoff = self.min_backoff
+        self.failures = 0  # Failed reads.
+
+        # Ring buffer. Each slot is a tuple of (frame, timestamp, sequence number).
+        self.size = size
+        self.buffer = [None] * size
+
+        self.seq = -1  # Sequence number of the newest frame captured.
+        self.last_read = -1  # Sequence number of the last frame handed out.
+        self.dropped = 0  # Number of frames which were captured but never handed out.
+
+        self.running = False
+        self.new_frame = thr.Condition()
+
+        self.capture_thread = None  # Created by start.
+
+    def start(self) -> None:
+        """Start the capture thread. A new thread is created each time, so the grabber can be restarted after stop."""
+        if self.capture_thread is None or not self.capture_thread.is_alive():
+            self.running = True
+
+            # Defined as a daemon for the same reason as the movement thread, see hardware.motion.Motion.
+            self.capture_thread = thr.Thread(target=self.capture, daemon=True)
+            self.capture_thread.start()
+
+    def stop(self) -> None:
+        """Stop the capture thread, and wait for it to exit."""
+        self.running = False
+        with self.new_frame:
+            self.new_frame.notify_all()  # Wake anything waiting on a frame so it doesn't wait for the full timeout.
+
+        if self.capture_thread is not None and self.capture_thread.is_alive():
+            self.capture_thread.join()
+
+    def capture(self) -> None:
+        """Capture thread function.
+
+        Reads frames from the camera for as long as self.running is true, storing each in the ring buffer along with
+         the time it was captured and its sequence number.
+        """
+        while self.running:
+            with span("FrameGrabber.read"):
+                ret, frame = self.cam.read()
+            timestamp = time.monotonic()
+
+            if not ret:  # Camera isn't ready, or couldn't be opened, so back off rather than spin on it.
+                self.failures += 1
+                with self.new_frame:  # Woken early by stop.
+                    self.new_frame.wait_for(lambda: not self.running, self.backoff)
+                self.backoff = min(self.max_backoff, self.backoff * 2)
+                continue
+
+            self.backoff = self.min_backoff
+
+            with self.new_frame:
+                self.seq += 1
+                self.buffer[self.seq % self.size] = (frame, timestamp, self.seq)
+                self.new_frame.notify_all()
+
+    def read_latest(self) -> tuple[np.ndarray, float, int]:
+        """Get the newest frame, waiting for one if it has already been handed out.
+
+        Returns
+        -------
+        np.ndarray, float, int
+            The frame, the time it was captured (from time.monotonic()) and its sequence number.
+            Frame is None if no new frame arrives before self.timeout.
+        """
+        with self.new_frame:
+            if not self.new_frame.wait_for(lambda: self.seq > self.last_read or not self.running, self.timeout):
+                return None, None, None
+
+            if self.seq <= self.last_read:  # Woken by stop() rather than a new frame.
+                return None, None, None
+
+            frame, timestamp, seq = self.buffer[self.seq % self.size]
+
+            self.dropped += seq - self.last_read - 1  # Any frames between the last read and this one were skipped
+            self.last_read = seq
+
+        return frame, timestamp, seq
+
+    def read(self) -> tuple[bool, np.ndarray]:
+        """Get the newest frame, with the same return values as cv2.VideoCapture.read()."""
+        frame, _, _ = self.read_latest()
+
+        return frame is not None, frame
+
+    def release(self) -> None:
+        """Stop capturing and release the camera."""
+        self.stop()
+        self.cam.release()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+"""Recording and replay of camera frames.
+
+Frames are stored raw, one after another, after a short header giving their shape. Their timestamps are stored
+ alongside in an index file, with the same name plus ".idx", as 64-bit floats. Since every frame is the same size, a
+ recording can be memory mapped and any frame found without reading the others.
+"""
+
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"APFRAMES"
+VERSION = 1
+# Magic, version, height, width, channels, padded to 32 bytes.
+HEADER = struct.Struct("<8sIIII12x")
+
+
+class FrameRecorder:
+    """Records frames from a camera to disk, while passing them through.
+
+    It has the same .read() interface as cv2.VideoCapture, so can be placed between a camera and LineDetector (or
+     FrameGrabber) to record everything the CV system sees.
+    """
+
+    def __init__(self, cam: object, path: str):
+        self.cam = cam  # Camera to record from. Can be None if frames are only passed to record().
+        self.path = path
+
+        self.frames_file = None  # Files are opened on the first frame, when the shape is known.
+        self.index_file = None
+        self.shape = None
+        self.count = 0
+        self.closed = False
+
+    def record(self, frame: np.ndarray, timestamp: float = None) -> None:
+        """Write a frame to the recording.
+
+        Every frame must have the same shape. If timestamp isn't given, the current time.monotonic() is used.
+        """
+        if self.closed:
+            raise ValueError("Recording to {} has been closed".format(self.path))
+
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        if frame.dtype != np.uint8:
+            raise ValueError("Only 8 bit frames can be recorded (got {})".format(frame.dtype))
+
+        # Monochrome frames are stored with 1 channel.
+        shape = frame.shape if frame.ndim == 3 else (*frame.shape, 1)
+
+        if self.frames_file is None:
+            self.shape = shape
+            self.frames_file = open(self.path, "wb")
+            self.index_file = open(self.path + ".idx", "wb")
+            self.frames_file.write(HEADER.pack(MAGIC, VERSION, *shape))
+        elif shape != self.shape:
+            raise ValueError("Frame shape {} doesn't match recording shape {}".format(shape, self.shape))
+
+        self.frames_file.write(np.ascontiguousarray(frame).data)
+        self.index_file.write(struct.pack("<d", timestamp))
+        self.count += 1
+
+    def read(self) -> tuple[bool, np.ndarray]:
+        """Read a frame from the camera, recording it if successful."""
+        ret, frame = self.cam.read()
+
+        if ret:
+            self.record(frame)
+
+        return ret, frame
+
+    def close(self) -> None:
+        """Finish the recording, without releasing the camera. Closing again does nothing."""
+        if self.frames_file is not None:
+            self.frames_file.close()
+            self.index_file.close()
+
+        self.frames_file = None
+        self.index_file = None
+        self.closed = True
+
+    def release(self) -> None:
+        """Finish the recording and release the camera."""
+        self.close()
+
+        if self.cam is not None:
+            self.cam.release()
+
+
+class ReplayCapture:
+    """Replays a recording made by FrameRecorder, with the same .read() interface as cv2.VideoCapture.
+
+    This allows the CV system to be run without a camera, eg for profiling or regression testing on real footage.
+    """
+
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False, copy: bool = True):
+        """Open a recording.
+
+        Parameters
+        ----------
+        path : str
+            Path to the recording, as passed to FrameRecorder.
+        realtime : bool, default False
+            If True, read() waits so that frames are returned at the rate they were recorded at. Otherwise, frames
+             are returned as fast as they are read.
+        loop : bool, default False
+            If True, start again from the first frame at the end of the recording. Otherwise, read() fails.
+        copy : bool, default True
+            If False, read() returns read only views of the memory mapped file, which saves a copy per frame but
+             can't be drawn on.
+        """
+        self.realtime = realtime
+        self.loop = loop
+        self.copy = copy
+
+        with open(path, "rb") as f:
+            magic, version, *shape = HEADER.unpack(f.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a recording from FrameRecorder".format(path))
+
+        self.timestamps = np.fromfile(path + ".idx", dtype="<f8")
+
+        frames = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size)
+        count = min(len(self.timestamps), len(frames) // int(np.prod(shape)))  # In case the recording was cut short
+        self.frames = frames[:count * int(np.prod(shape))].reshape(count, *shape)
+        self.timestamps = self.timestamps[:count]
+
+        if shape[2] == 1:  # Monochrome
+            self.frames = self.frames[..., 0]
+
+        self.position = 0  # Index of the next frame.
+        self.start = None  # time.monotonic() at which the first frame (of this loop) was returned.
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def isOpened(self) -> bool:  # Named to match cv2.VideoCapture
+        """Whether there are frames to read."""
+        return len(self.frames) > 0
+
+    def read(self) -> tuple[bool, np.ndarray]:
+        """Get the next frame of the recording.
+
+        Returns (False, None) at the end of the recording, unless looping.
+        """
+        if self.position >= len(self.frames):
+            if not self.loop or len(self.frames) == 0:
+                return False, None
+
+            self.position = 0
+            self.start = None
+
+        if self.realtime:
+            if self.start is None:
+                self.start = time.monotonic()
+            else:
+                delay = self.start + (self.timestamps[self.position] - self.timestamps[0]) - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+        frame = self.frames[self.position]
+        self.position += 1
+
+        return True, frame.copy() if self.copy else frame
+
+    def release(self) -> None:
+        """Close the recording."""
+        self.frames = np.empty((0, *self.frames.shape[1:]), dtype=np.uint8)  # Drops the reference to the memory map
@@ -6,21 +6,64 @@ This file will include classes for available hardware interfaces for motion devi
 """
 
 import threading as thr
+import time
+from collections import deque
+
+import numpy as np
+
+from ...tracing import span
 
 
 class Motion:
-    """Base motion interface class."""
+    """Base motion interface class.
+
+    Movement is applied by a thread, see movement, which sleeps until the power or direction change, or until the
+     next control tick.
+
+    Commands should be given with command(power, direction), which sets both at once and records when they were
+     given. If no command arrives within self.deadline while moving, the watchdog stops the motors, so a stalled
+     control loop can't leave the vehicle driving blind.
+    """
 
     reverse = False  # Does this interface support reverse?
 
-    def __init__(self):
+    def __init__(self, rate: float = 50.0, deadline: float = 0.5):
+        """Create the interface and start its movement thread.
+
+        Parameters
+        ----------
+        rate : float, default 50.0
+            Control rate in Hz. While moving, self.move is called at least this often, as well as whenever the power
+             or direction change. If None, it is only called on changes.
+        deadline : float, default 0.5
+            Seconds a command stays fresh for. If no new command is given within this time while moving, movement
+             is stopped until start_move is called again. If None, commands never go stale.
+        """
         ## Current movement parameters
         # Are we currently moving?
         self.inmotion = False
-        # Power as a fraction (0.0 - 1.0) of the max power. Note if reverse is true, this can be negative
-        self.power = 0
-        # Direction as a signed fraction (-1.0 - 1.0) of the smallest turn radius
-        self.direction = 0
+        # (power, direction), see the power and direction properties. Stored together so they are read as a pair.
+        self.target = (0, 0)
+
+        self.command_time = time.monotonic()  # When the last command was given.
+        self.command_seq = 0  # Incremented whenever the target changes, so the movement thread can tell it's new.
+
+        self.rate = rate
+        self.deadline = deadline
+
+        # Notified whenever the movement thread has something new to apply, which is flagged by self.pending.
+        self.changed = thr.Condition()
+        self.pending = False
+        # Held while the hardware is moved or halted, so a move which is under way can't drive the motors after a halt.
+        self.hardware = thr.RLock()
+
+        ## Statistics, see stats
+        self.stats_start = time.monotonic()
+        self.moves = 0  # Calls to self.move.
+        self.writes = 0  # Writes to the hardware, and writes skipped since nothing changed. Counted by subclasses.
+        self.skipped_writes = 0
+        self.latencies = deque(maxlen=1000)  # Seconds from recent commands being given to being applied by self.move.
+        self.watchdog_stops = 0  # Times movement was stopped because the command went stale.
 
         # Movement thread
         # Defined as a daemon since it is simply providing functionality to the main program
@@ -28,6 +71,47 @@ class Motion:
         self.movement_thread = thr.Thread(target=self.movement, daemon=True)
         self.movement_thread.start()
 
+    @property
+    def power(self) -> float:
+        """Power as a fraction (0.0 - 1.0) of the max power. Note if reverse is true, this can be negative."""
+        return self.target[0]
+
+    @power.setter
+    def power(self, value: float) -> None:
+        self.command(value, self.target[1])
+
+    @property
+    def direction(self) -> float:
+        """Direction as a signed fraction (-1.0 - 1.0) of the smallest turn radius."""
+        return self.target[1]
+
+    @direction.setter
+    def direction(self, value: float) -> None:
+        self.command(self.target[0], value)
+
+    def command(self, power: float, direction: float, timestamp: float = None) -> None:
+        """Set the power and direction together, waking the movement thread if they have changed.
+
+        Setting self.power and self.direction separately works, but the movement thread may apply one before the
+         other is set. Every call counts as a fresh command for the watchdog, even if nothing has changed.
+
+        Parameters
+        ----------
+        power, direction : float
+            See the power and direction properties.
+        timestamp : float, optional
+            time.monotonic() the command was made at, eg the capture time of the frame it came from, which the
+             latency is measured from. Defaults to now.
+        """
+        with self.changed:
+            self.command_time = time.monotonic() if timestamp is None else timestamp
+
+            if (power, direction) != self.target:
+                self.target = (power, direction)
+                self.command_seq += 1
+                self.pending = True
+                self.changed.notify()
+
     def start_move(self) -> None:
         """Begin movement.
 
@@ -37,32 +121,120 @@ class Motion:
         if not self.movement_thread.is_alive():
             raise Exception("Motion Thread Died")
 
-        self.inmotion = True
+        with self.changed:
+            if not self.inmotion:
+                self.inmotion = True
+                self.command_time = max(self.command_time, time.monotonic())  # Starting counts as a fresh command.
+                self.pending = True
+                self.changed.notify()
 
     def stop_move(self) -> None:
         """Stop movement.
 
         When this is called, until start_move is called self.power and self.direction are ignored.
         Since it is not simple to just kill the movement thread, this function simply sets self.inmotion, so the thread
-         will stop the car when this is false, and the thread will exit.
+         will stop the car when this is false, and the thread will exit. The hardware is then stopped by self.halt,
+         once any move under way has finished.
         """
-        self.inmotion = False
+        with self.changed:
+            self.inmotion = False
+
+        with self.hardware:
+            self.halt()
+
+    def halt(self) -> None:
+        """Stop the hardware, without changing self.inmotion. Called by stop_move, and by the watchdog.
+
+        The base class has no hardware, so this does nothing. Subclasses which need to reset their hardware when the
+         vehicle stops should overwrite this, rather than stop_move.
+        """
+        pass
 
     def movement(self) -> None:
         """Movement thread function
 
         This function will be run in a thread in order to allow for constant updates to how the car is moved in the
-         main thread, and they can be applied without blocking execution. It will simply call self.move, while inmotion
-         is true.
+         main thread, and they can be applied without blocking execution. It will call self.move while inmotion is
+         true, whenever the power or direction change and at least once per control tick, sleeping in between.
         """
+        last_move = time.monotonic()
+        applied_seq = self.command_seq
+
         while True:
-            if self.inmotion:
-                self.move()
+            with self.changed:
+                while not self.pending:
+                    # Time until the next control tick or the command going stale, whichever is first.
+                    timeouts = []
+                    if self.inmotion and self.rate is not None:
+                        timeouts.append(last_move + 1 / self.rate)
+                    if self.inmotion and self.deadline is not None:
+                        timeouts.append(self.command_time + self.deadline)
+
+                    if len(timeouts) == 0:  # Nothing to do until something changes.
+                        self.changed.wait()
+                    elif min(timeouts) > time.monotonic():
+                        self.changed.wait(min(timeouts) - time.monotonic())
+                    else:
+                        break
+
+                self.pending = False
+                inmotion = self.inmotion
+                stale = self.deadline is not None and time.monotonic() - self.command_time > self.deadline
+                seq, command_time = self.command_seq, self.command_time
+
+                # Stop while still holding the lock, so a fresh command can't arrive between deciding the command is
+                #  stale and stopping. One arriving after this restarts movement as usual.
+                if inmotion and stale:
+                    self.inmotion = False
+
+            if inmotion and stale:  # Watchdog
+                self.watchdog_stops += 1
+                with self.hardware:
+                    self.halt()
+            elif inmotion:
+                last_move = time.monotonic()
+                with self.hardware:
+                    if not self.inmotion:  # Stopped since the target was read, and already halted.
+                        continue
+
+                    with span("Motion.move"):
+                        self.move()
+                self.moves += 1
+
+                if seq != applied_seq:  # A new command has been applied.
+                    self.latencies.append(time.monotonic() - command_time)
+                    applied_seq = seq
 
     def move(self) -> None:
         """Move the device.
 
-        This function will be run by self.movement, continually while inmotion is true. This thread will simply move
-         the car once, or update how it is moving, before exiting.
+        This function will be run by self.movement, while inmotion is true. This thread will simply move the car once,
+         or update how it is moving, before exiting.
         """
         raise NotImplementedError("Motion base class is not associated with any hardware. Cannot Stop Movement.")
+
+    def stats(self) -> dict:
+        """Statistics of the movement thread so far.
+
+        Returns
+        -------
+        dict
+            duration : seconds since the interface was created.
+            moves, move_rate : calls to self.move, and their rate per second.
+            writes, skipped_writes : writes to the hardware, and writes skipped since the value hadn't changed.
+            mean_latency, max_latency : seconds from recent commands being given to being applied.
+            watchdog_stops : times movement was stopped because no fresh command arrived within self.deadline.
+        """
+        duration = time.monotonic() - self.stats_start
+        latencies = np.array(self.latencies) if len(self.latencies) > 0 else np.zeros(1)
+
+        return {
+            "duration": duration,
+            "moves": self.moves,
+            "move_rate": self.moves / duration,
+            "writes": self.writes,
+            "skipped_writes": self.skipped_writes,
+            "mean_latency": latencies.mean(),
+            "max_latency": latencies.max(),
+            "watchdog_stops": self.watchdog_stops,
+        }
@@ -2,7 +2,6 @@
 
 """Motion class for the CamJam EduKit 3."""
 
-from gpiozero import CamJamKitRobot
 from numpy import cos, pi, sin
 
 from . import Motion
@@ -17,21 +16,28 @@ class EduKit3(Motion):
     reverse = True
 
     def __init__(self, left_pol: bool = False, right_pol: bool = False, *args, **kwargs):
+        # Imported here so this module can be imported on machines without gpiozero, eg to run in the simulator.
+        from gpiozero import CamJamKitRobot
+
         super().__init__(*args, **kwargs)  # Run the parent class init method, passing through any args.
 
         self.robot = CamJamKitRobot()
+        self.value = (0, 0)  # Last value written to the robot.
 
         self.pol = (left_pol, right_pol)  # Polarity of motors. If True, reverse any motion of that motor.
 
     def move(self) -> None:
         """Move the car.
 
-        This will take into account self.speed and self.direction and adjust the robot's `value` accordingly.
+        This will take into account self.speed and self.direction and adjust the robot's `value` accordingly. If the
+         value hasn't changed since it was last written, the write is skipped.
         """
-        theta = - pi * self.direction + (pi/4)  # Angle assumes right is negative, while negative direction is right
+        power, direction = self.target
+
+        theta = - pi * direction + (pi/4)  # Angle assumes right is negative, while negative direction is right
 
-        left_v = self.power * cos(theta)
-        right_v = self.power * sin(theta)
+        left_v = power * cos(theta)
+        right_v = power * sin(theta)
 
         if self.pol[0]:
             left_v = -left_v
@@ -47,13 +53,17 @@ class EduKit3(Motion):
         if right_v < -1.0:
             right_v = -1.0
 
-        self.robot.value = (left_v, right_v)
+        if (left_v, right_v) == self.value:
+            self.skipped_writes += 1
+            return
 
-    def stop_move(self) -> None:
-        """Stop movement.
+        self.robot.value = self.value = (left_v, right_v)
+        self.writes += 1
+
+    def halt(self) -> None:
+        """Stop the motors.
 
         This overwrites the base class to ensure that the motors are reset when the vehicle stops.
         """
-        super().stop_move()
-
-        self.robot.value = (0, 0)
+        self.robot.value = self.value = (0, 0)
+        self.writes += 1
@@ -1,18 +1,46 @@
 #!/usr/bin/env python3
 
-"""Management system module."""
+"""Management system module.
 
+Only imports what the main loop itself needs. The components, and with them OpenCV, numpy and networkx, are imported
+ when they are first used, so tools which only need part of the system start quickly.
+"""
+
+import importlib
 import sys
+import time
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from .scheduling import DeadlineScheduler
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .cv import LineDetector
+    from .hardware.motion import Motion
+    from .navigation import Navigation
+    from .telemetry import FlightRecorder
+
+# Names which can be imported from this module, but are defined in other modules, which are imported when the name is
+#  first used. See __getattr__.
+LAZY_NAMES = {"AsyncManager": ".concurrency"}
+
+
+def __getattr__(name: str) -> object:
+    """Import names in LAZY_NAMES when they are first used."""
+    if name in LAZY_NAMES:
+        return getattr(importlib.import_module(LAZY_NAMES[name], __package__), name)
 
-from .cv import LineDetector
-from .hardware.motion import Motion
-from .navigation import Navigation
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
 
 
 class Manager:
     """Management system base class. This will also include base classes for any components.
 
     In order to implement autonoPi, create a class which inherits from this class.
+
+    The base components are created when they are first used, so a system only creates, and imports, the ones it
+     needs. An implementation can replace them by setting them in setup_components.
     """
 
     def __init__(self):
@@ -22,11 +50,32 @@ class Manager:
     def setup_components(self) -> None:
         """Setup components required by the system.
 
-        This only uses the base classes for most systems so should be overwritten in an implmentation.
+        The base classes of the components are created when first used, see line_detector, motion and navigation, so
+         this is blank. It should be overwritten in an implementation, to set the components it uses.
         """
-        self.line_detector = LineDetector()
-        self.motion = Motion()
-        self.navigation = Navigation()
+        pass
+
+    @cached_property
+    def line_detector(self) -> "LineDetector":
+        """Line detector on the default camera, created when first used. The camera is opened on its first read."""
+        from .cv import LineDetector
+        from .hardware.camera import open_camera
+
+        return LineDetector(open_camera())
+
+    @cached_property
+    def motion(self) -> "Motion":
+        """Base motion component, created when first used."""
+        from .hardware.motion import Motion
+
+        return Motion()
+
+    @cached_property
+    def navigation(self) -> "Navigation":
+        """Navigation system, created when first used."""
+        from .navigation import Navigation
+
+        return Navigation()
 
     def setup_variables(self) -> None:
         """Setup variables required by the system.
@@ -37,14 +86,48 @@ class Manager:
         """
         pass
 
-    def mainloop(self) -> None:
+    def mainloop(self,
+                 ticks: int = None,
+                 period: float = None,
+                 policy: str = "skip",
+                 recorder: "FlightRecorder" = None,
+                 ) -> None:
         """Main event loop of the program.
 
-        Will simply run self.run continuously.
+        Will simply run self.run continuously. If ticks is given, self.run is only run that many times, after which the
+         system is safely exited and this returns.
+
+        If period is given, self.run is run once every period seconds instead of back to back, by a
+         scheduling.DeadlineScheduler with the given overrun policy, which is stored in self.scheduler for its
+         statistics. With the "degrade" policy, self.degrade and self.recover are called as the loop falls behind and
+         catches up.
+
+        If recorder is given, each tick is recorded by it, with the values from self.telemetry. See
+         telemetry.FlightRecorder. The recorder isn't closed when the loop ends.
         """
+        self.recorder = recorder
+        self.scheduler = None
+        if period is not None:
+            self.scheduler = DeadlineScheduler(period, policy, on_degrade=self.degrade, on_recover=self.recover)
+
+        self.start_capture()
+
         try:
-            while True:
-                self.run()
+            count = 0
+            while ticks is None or count < ticks:
+                if self.scheduler is not None:
+                    self.scheduler.wait()
+
+                start = time.monotonic()
+                with span("Manager.run"):
+                    self.run()
+
+                if self.recorder is not None:
+                    self.record_tick(start)
+
+                count += 1
+
+            self.exit()
         except KeyboardInterrupt:
             self.exit()
             sys.exit(130)
@@ -52,6 +135,16 @@ class Manager:
             self.exit()
             raise e  # Reraise error, after the system has been safely exited.
 
+    def start_capture(self) -> None:
+        """Start capturing from the cameras used by the system.
+
+        This is called by mainloop before the first run, so that devices are only opened and background capture
+         started when the system is about to use them, rather than when components are set up. Cameras from
+         hardware.camera.open_camera are opened on their first read, so this only needs overwriting to start
+         threads such as hardware.camera.FrameGrabber.
+        """
+        pass
+
     def run(self) -> None:
         """The main event loop code goes here.
 
@@ -59,6 +152,32 @@ class Manager:
         """
         raise NotImplementedError("Manager() is the base management class, and subclasses must overwrite run().")
 
+    def telemetry(self) -> dict:
+        """Values describing the last tick, recorded by mainloop's recorder.
+
+        Returns keyword arguments for telemetry.FlightRecorder.record, eg {"steering": 0.1, "power": 0.3}. Values not
+         returned are recorded as unknown. Doesn't need to be overwritten.
+        """
+        return {}
+
+    def record_tick(self, start: float) -> None:
+        """Record the tick which started at time.monotonic() start, with self.recorder."""
+        self.recorder.record(start, time.monotonic() - start, **self.telemetry())
+
+    def degrade(self) -> None:
+        """Switch to cheaper processing, since the loop can't keep up with its period. See mainloop.
+
+        Doesn't need to be overwritten.
+        """
+        pass
+
+    def recover(self) -> None:
+        """Switch back from the cheaper processing used by degrade, since the loop has caught up.
+
+        Doesn't need to be overwritten.
+        """
+        pass
+
     def exit(self) -> None:
         """Used to allow safe exit of the program.
 
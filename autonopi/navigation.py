@@ -6,18 +6,31 @@ from math import inf
 from typing import List
 
 import networkx as nx
+import numpy as np
+
+from .tracing import traced
 
 
 class Navigation:
     """A class to contain the navigation system."""
 
-    def __init__(self):
+    engines = ("numpy", "python")  # Floyd-Warshall engines available to floyds.
+
+    def __init__(self, engine: str = "numpy"):
+        if engine not in self.engines:
+            raise ValueError("Unknown Floyd-Warshall engine '{}', expected one of {}".format(engine, self.engines))
+        # Engine used by floyds: "numpy" for floyds_numpy, "python" for floyds_python. Both give the same results.
+        self.engine = engine
+
         self.graph = nx.Graph()
 
         # This list will store a list of the node's IDs. This means the graph will only have to store an integer which
         # refers to an index in this list.
         self.nodes = []
 
+        # Whether floyds has been run since the graph last changed, see setup_edges.
+        self.routes_current = False
+
     def add_node(self, node: object) -> None:
         """Add a node to the navigation graph."""
         self.nodes.append(node)
@@ -41,10 +54,33 @@ class Navigation:
         self.floyds_routes = [[x for x in range(n)] for y in range(n)]
         self.routes_current = False
 
+    @traced()
     def floyds(self) -> None:
         """Run the Floyd-Warshall algorithm on the network.
 
-        This will generate the shortest paths between any two nodes, which can be used in pathfinding.
+        This will generate the shortest paths between any two nodes, which can be used in pathfinding. The engine used
+         is chosen by self.engine.
+        """
+        if self.engine == "numpy":
+            distances, routes = self.floyds_numpy()
+        else:
+            distances, routes = self.floyds_python()
+
+        # Update distance, route matrices at a class level, and set the current route flag.
+        self.floyds_distances = distances
+        self.floyds_routes = routes
+        # This flag will ensure that distance/route matrices are only used when they correspond
+        # to the current graph state.
+        self.routes_current = True
+
+    def floyds_python(self) -> tuple[dict, List[List[int]]]:
+        """Floyd-Warshall algorithm, in pure Python over the graph's dict of dicts.
+
+        Returns
+        -------
+        dict, List[List[int]]
+            The distances, as a dict of dicts of {"weight": distance}, with inf where there is no path, and the route
+             matrix, as used by shortest_path.
         """
         n = len(self.nodes)
         distances = nx.to_dict_of_dicts(self.graph)
@@ -76,12 +112,44 @@ class Navigation:
                         routes[y][x] = a
                         routes[x][y] = a
 
-        # Update distance, route matrices at a class level, and set the current route flag.
-        self.floyds_distances = distances
-        self.floyds_routes = routes
-        # This flag will ensure that distance/route matrices are only used when they correspond
-        # to the current graph state.
-        self.routes_current = True
+        return distances, routes
+
+    def floyds_numpy(self) -> tuple[dict, List[List[int]]]:
+        """Floyd-Warshall algorithm, on an n x n distance matrix, with each shaded node's relaxation done at once.
+
+        Gives the same results as floyds_python, in the same format, but without a dictionary lookup per relaxation,
+         so is practical for graphs of thousands of nodes rather than hundreds.
+        """
+        n = len(self.nodes)
+        distances = np.full((n, n), inf)
+        for y, x, weight in self.graph.edges(data="weight"):
+            distances[y, x] = distances[x, y] = weight
+
+        routes = np.tile(np.arange(n), (n, 1))
+        diagonal = distances.diagonal().copy()  # As in floyds_python, the diagonal is never relaxed.
+
+        # Reused for each shaded node, rather than allocated each time.
+        through = np.empty((n, n))
+        shorter = np.empty((n, n), dtype=bool)
+
+        for a in range(n):  # "Shaded" node
+            np.add(distances[:, a, np.newaxis], distances[np.newaxis, a, :], out=through)
+
+            np.less(through, distances, out=shorter)
+            np.fill_diagonal(shorter, False)
+            shorter[a, :] = False  # Paths through the shaded node to itself, which are never shorter anyway.
+            shorter[:, a] = False
+            np.putmask(routes, shorter, a)
+
+            # Taking the minimum everywhere is faster than only where shorter, and gives the same distances, since
+            #  weights aren't negative, except on the diagonal, which is put back.
+            np.minimum(distances, through, out=distances)
+            np.fill_diagonal(distances, diagonal)
+
+        distances = {y: {x: {"weight": weight} for x, weight in enumerate(row)}
+                     for y, row in enumerate(distances.tolist())}
+
+        return distances, routes.tolist()
 
     def shortest_path(self, a: int, b: int) -> List[int]:
         """Using floyd's distance and route matrices, find the shortest path between two nodes.
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+"""Parallel CV pipeline module.
+
+The line detection stages all run on whichever thread calls them, so only one core of the Raspberry Pi is used. This
+ module runs them in worker processes instead, with frames passed through shared memory rather than being pickled.
+"""
+
+import multiprocessing as mp
+import time
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty
+
+import numpy as np
+
+from .cv import LineDetector
+
+
+def detection_worker(names: list[str],
+                     shape: tuple[int],
+                     params: dict,
+                     tasks: mp.Queue,
+                     results: mp.Queue,
+                     ) -> None:
+    """Worker process function.
+
+    Attaches to the shared memory slots, then for each (sequence number, slot) task runs LineDetector.process_frame on
+     the frame in that slot, and puts (sequence number, slot, lines) in results. If process_frame raises an error, the
+     error is put in place of the lines, so the slot is still freed. Exits when it receives None.
+    """
+    memory = [SharedMemory(name=name) for name in names]
+    frames = [np.ndarray(shape, dtype=np.uint8, buffer=m.buf) for m in memory]
+
+    line_detector = LineDetector(None)  # No camera needed, frames come from the main process.
+
+    try:
+        while (task := tasks.get()) is not None:
+            seq, slot = task
+            try:
+                lines = line_detector.process_frame(frames[slot], **params)
+            except Exception as e:
+                lines = e  # Reraised by PipelineRunner.get, in the main process.
+            results.put((seq, slot, lines))
+    finally:
+        del frames  # Views must be released before the memory can be closed.
+        for m in memory:
+            m.close()
+
+
+class PipelineRunner:
+    """Runs LineDetector.process_frame on a stream of frames, using several worker processes.
+
+    Each frame submitted is copied into a free shared memory slot, and a worker is told which slot to process. Since
+     each worker has a frame to itself, frames are processed in parallel, and throughput scales with the number of
+     cores. Results are returned in the order the frames were submitted, tagged with their sequence numbers.
+
+    Note that as each worker has its own LineDetector, region of interest tracking (see LineDetector.track_windows)
+     isn't available.
+    """
+
+    def __init__(self, shape: tuple[int], workers: int = 3, slots: int = None, **params):
+        """Create the pipeline.
+
+        Parameters
+        ----------
+        shape : tuple[int]
+            Shape of the frames which will be processed, eg (height, width, 3).
+        workers : int, default 3
+            Number of worker processes. On a Raspberry Pi 4 this leaves one core for the main process.
+        slots : int, default 2 * workers
+            Number of frames which can be in the pipeline at once.
+        **params
+            Keyword arguments passed to LineDetector.process_frame, eg hue, sat and val.
+        """
+        self.shape = tuple(shape)
+        self.params = params
+
+        slots = 2 * workers if slots is None else slots
+        size = int(np.prod(self.shape))
+
+        self.memory = [SharedMemory(create=True, size=size) for _ in range(slots)]
+        self.frames = [np.ndarray(self.shape, dtype=np.uint8, buffer=m.buf) for m in self.memory]
+        self.free = list(range(slots))  # Slots not currently in the pipeline.
+
+        self.tasks = mp.Queue()
+        self.results = mp.Queue()
+
+        names = [m.name for m in self.memory]
+        self.workers = [mp.Process(target=detection_worker,
+                                   args=(names, self.shape, params, self.tasks, self.results),
+                                   daemon=True,
+                                   )
+                        for _ in range(workers)]
+
+        self.seq = 0  # Sequence number of the next frame submitted.
+        self.next_result = 0  # Sequence number of the next result to return.
+        self.finished = {}  # Results which have arrived before the ones before them, by sequence number.
+
+        self.running = False
+        self.poll = 0.1  # Seconds between checks that the workers are alive, while waiting for results.
+
+    def start(self) -> None:
+        """Start the worker processes."""
+        for worker in self.workers:
+            worker.start()
+
+        self.running = True
+
+    def stop(self) -> None:
+        """Stop the worker processes and free the shared memory."""
+        if self.running:
+            for _ in self.workers:
+                self.tasks.put(None)
+
+            for worker in self.workers:
+                worker.join()
+
+            self.running = False
+
+        self.frames = []
+        for m in self.memory:
+            m.close()
+            m.unlink()
+        self.memory = []
+
+    def __enter__(self) -> "PipelineRunner":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def pending(self) -> int:
+        """Number of frames submitted whose results haven't been returned by get()."""
+        return self.seq - self.next_result
+
+    def submit(self, frame: np.ndarray) -> int:
+        """Add a frame to the pipeline.
+
+        If all slots are in use, this blocks until a worker finishes with one.
+
+        Returns
+        -------
+        int
+            The sequence number of the frame.
+        """
+        if frame.shape != self.shape:
+            raise ValueError("Frame shape {} doesn't match pipeline shape {}".format(frame.shape, self.shape))
+
+        while len(self.free) == 0:
+            self.collect()
+
+        slot = self.free.pop()
+        np.copyto(self.frames[slot], frame)
+
+        seq = self.seq
+        self.seq += 1
+        self.tasks.put((seq, slot))
+
+        return seq
+
+    def collect(self, timeout: float = None) -> bool:
+        """Wait for a result from a worker, and store it until it is returned by get().
+
+        Returns False if no result arrived before timeout. Raises RuntimeError if a worker has died, since its frame
+         would never be returned.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.poll if deadline is None else min(self.poll, max(0.0, deadline - time.monotonic()))
+            try:
+                seq, slot, lines = self.results.get(timeout=wait)
+                break
+            except Empty:
+                pass
+
+            dead = [worker for worker in self.workers if not worker.is_alive()]
+            if self.running and len(dead) > 0:
+                raise RuntimeError("{} pipeline worker(s) exited unexpectedly, with exit codes {}".format(
+                    len(dead), [worker.exitcode for worker in dead]))
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+        self.free.append(slot)
+        self.finished[seq] = lines
+
+        return True
+
+    def get(self, timeout: float = None) -> tuple[int, np.ndarray]:
+        """Get the result for the oldest frame in the pipeline.
+
+        Results are always returned in the order frames were submitted.
+
+        Returns
+        -------
+        int, np.ndarray
+            The sequence number of the frame, and the lines found, as returned by LineDetector.process_frame.
+            If the result isn't ready before timeout, returns None, None.
+
+        If process_frame raised an error for the frame, it is reraised here, and the frame is removed from the
+         pipeline, so the next call returns the next frame.
+        """
+        if self.pending == 0:
+            raise ValueError("No frames in the pipeline.")
+
+        while self.next_result not in self.finished:
+            if not self.collect(timeout):
+                return None, None
+
+        seq = self.next_result
+        self.next_result += 1
+
+        lines = self.finished.pop(seq)
+        if isinstance(lines, Exception):
+            raise lines
+
+        return seq, lines
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+"""Scheduling module.
+
+Runs the control loop at a fixed rate, rather than as fast as possible, so that steering behaves the same however
+ long each tick takes, and the CPU is free between ticks.
+"""
+
+import time
+from collections import deque
+from math import ceil
+
+
+class DeadlineScheduler:
+    """Paces a loop to one tick per period, with deadlines on a fixed grid.
+
+    Call wait() at the start of every tick. It sleeps until the tick's deadline, and measures how late each tick
+     starts (jitter), and how many ticks run past the start of the next (overruns).
+
+    What happens after an overrun depends on the policy:
+    - "skip": deadlines which have already passed are skipped, and the loop waits for the next one on the grid.
+    - "catchup": the missed ticks are run back to back, until the loop is back on schedule. If it falls more than
+       max_catchup ticks behind, the rest are skipped.
+    - "degrade": as "skip", but after degrade_after overruns in a row, on_degrade is called, eg to switch to cheaper
+       processing. Once recover_after ticks in a row have taken less than half the period, on_recover is called.
+    """
+
+    policies = ("skip", "catchup", "degrade")
+
+    def __init__(self,
+                 period: float,
+                 policy: str = "skip",
+                 spin: float = 0.0005,
+                 max_catchup: int = 5,
+                 on_degrade: callable = None,
+                 on_recover: callable = None,
+                 degrade_after: int = 3,
+                 recover_after: int = 50,
+                 clock: callable = time.monotonic,
+                 sleep: callable = time.sleep,
+                 ):
+        """Create the scheduler.
+
+        Parameters
+        ----------
+        period : float
+            Seconds between deadlines.
+        policy : str, default "skip"
+            What to do after an overrun: "skip", "catchup" or "degrade", see the class description.
+        spin : float, default 0.0005
+            The last part of each wait, in seconds, is spent polling the clock instead of sleeping, since sleeps can
+             overshoot. 0 to always sleep.
+        max_catchup : int, default 5
+            For "catchup", the most ticks behind the loop can be before the rest are skipped.
+        on_degrade, on_recover : callable, optional
+            For "degrade", called with no arguments when the loop degrades, and when it recovers.
+        degrade_after, recover_after : int
+            For "degrade", the number of overruns in a row to degrade after, and fast ticks in a row to recover after.
+        clock, sleep : callable, default time.monotonic and time.sleep
+            Functions used to read the time and to sleep, which can be replaced to run the scheduler on a simulated
+             clock, eg in tests. wait_async always sleeps with asyncio.sleep.
+        """
+        if policy not in self.policies:
+            raise ValueError("Unknown overrun policy '{}', expected one of {}".format(policy, self.policies))
+
+        self.period = period
+        self.policy = policy
+        self.spin = spin
+        self.max_catchup = max_catchup
+        self.on_degrade = on_degrade
+        self.on_recover = on_recover
+        self.degrade_after = degrade_after
+        self.recover_after = recover_after
+        self.clock = clock
+        self.sleep = sleep
+
+        self.deadline = None  # Deadline of the current tick.
+        self.tick_start = None  # self.clock() time the current tick started.
+        self.degraded = False
+        self.catching_up = False  # Whether the current tick was started late, to catch up after an overrun.
+
+        self.overrun_streak = 0  # Overruns in a row.
+        self.fast_streak = 0  # Ticks in a row which took less than half the period.
+
+        ## Statistics, see stats
+        self.start = None
+        self.ticks = 0
+        self.overruns = 0  # Ticks which ran past the next deadline.
+        self.skipped = 0  # Deadlines skipped after overruns.
+        self.busy = 0.0  # Seconds spent in ticks, rather than waiting.
+        self.jitter = deque(maxlen=1000)  # Seconds each of the recent ticks started after its deadline.
+
+    def wait(self) -> None:
+        """Wait until the next tick is due. Call at the start of every tick."""
+        self.sleep_until(self.next_deadline())
+        self.start_tick()
+
+    async def wait_async(self) -> None:
+        """Wait until the next tick is due, without blocking the event loop. Call at the start of every tick.
+
+        The wait is an asyncio.sleep, without spinning at the end, since spinning would stop other coroutines running,
+         so ticks start around a millisecond later than with wait.
+        """
+        import asyncio  # Already imported by the running event loop, imported here to keep it out of wait's startup.
+
+        delay = self.next_deadline() - self.clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.start_tick()
+
+    def next_deadline(self) -> float:
+        """Finish the current tick, if any, returning the self.clock() time the next is due."""
+        now = self.clock()
+
+        if self.deadline is None:  # First tick, which starts the grid.
+            self.start = now
+            self.deadline = now
+        else:
+            self.finish_tick(now)
+
+        return self.deadline
+
+    def start_tick(self) -> None:
+        """Record the start of a tick, once its deadline has been waited for."""
+        self.tick_start = self.clock()
+        if not self.catching_up:  # Catch up ticks are late on purpose.
+            self.jitter.append(max(0.0, self.tick_start - self.deadline))
+        self.ticks += 1
+
+    def finish_tick(self, now: float) -> None:
+        """Record how long the tick took, and set the next deadline."""
+        duration = now - self.tick_start
+        self.busy += duration
+        self.deadline += self.period
+
+        if duration < self.period / 2:
+            self.fast_streak += 1
+        else:
+            self.fast_streak = 0
+
+        if now <= self.deadline:
+            self.overrun_streak = 0
+            self.catching_up = False
+        else:
+            # A tick run late to catch up isn't an overrun itself, unless it took longer than the period.
+            if not self.catching_up or duration > self.period:
+                self.overruns += 1
+                self.overrun_streak += 1
+
+            behind = ceil((now - self.deadline) / self.period)  # Deadlines passed, not counting the next.
+            if self.policy == "catchup" and behind <= self.max_catchup:
+                self.catching_up = True  # Leave the deadline in the past, so the next tick starts straight away.
+            else:
+                # Skip to the first deadline which hasn't passed yet, staying on the grid.
+                self.deadline += behind * self.period
+                self.skipped += behind
+                self.catching_up = False
+
+        if self.policy == "degrade":
+            if not self.degraded and self.overrun_streak >= self.degrade_after:
+                self.degraded = True
+                self.fast_streak = 0
+                if self.on_degrade is not None:
+                    self.on_degrade()
+            elif self.degraded and self.fast_streak >= self.recover_after:
+                self.degraded = False
+                self.overrun_streak = 0
+                if self.on_recover is not None:
+                    self.on_recover()
+
+    def sleep_until(self, deadline: float) -> None:
+        """Sleep until a self.clock() value, spinning for the last self.spin seconds."""
+        remaining = deadline - self.clock()
+        if remaining > self.spin:
+            self.sleep(remaining - self.spin)
+
+        while self.clock() < deadline:
+            pass
+
+    def stats(self) -> dict:
+        """Statistics of the loop so far.
+
+        Returns
+        -------
+        dict
+            ticks, rate : ticks started, and their rate per second.
+            overruns, skipped : ticks which ran past the next deadline, and deadlines skipped as a result.
+            mean_jitter, p99_jitter, max_jitter : seconds recent ticks started after their deadlines, not counting
+             ticks run to catch up.
+            utilisation : fraction of the time spent running ticks rather than waiting.
+            degraded : whether the loop is currently degraded.
+        """
+        elapsed = self.clock() - self.start if self.start is not None else 0.0
+        jitter = sorted(self.jitter) if len(self.jitter) > 0 else [0.0]
+
+        return {
+            "ticks": self.ticks,
+            "rate": self.ticks / elapsed if elapsed > 0 else 0.0,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "mean_jitter": sum(jitter) / len(jitter),
+            "p99_jitter": jitter[min(len(jitter) - 1, int(len(jitter) * 0.99))],
+            "max_jitter": jitter[-1],
+            "utilisation": self.busy / elapsed if elapsed > 0 else 0.0,
+            "degraded": self.degraded,
+        }
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+
+"""Simulation module.
+
+A headless simulator of the vehicle on a track of coloured tape, so the whole system can be run without a Raspberry
+ Pi, camera or motors. Frames are rendered from the simulated vehicle's position, and motion commands move it.
+"""
+
+import threading as thr
+import time
+from math import cos, hypot, pi, sin, tan
+
+import cv2
+import numpy as np
+
+from .hardware.motion import Motion
+
+
+class Track:
+    """A circular lane, marked by two lines of coloured tape.
+
+    All distances are in metres, and the centre of the circle is at the origin.
+    """
+
+    def __init__(self,
+                 radius: float = 1.5,
+                 lane_width: float = 0.3,
+                 tape_width: float = 0.025,
+                 hue: int = 105,
+                 ):
+        self.radius = radius  # Radius of the centre of the lane.
+        self.lane_width = lane_width  # Distance between the centres of the two lines of tape.
+        self.tape_width = tape_width
+
+        # Colours, BGR. The tape's hue is in OpenCV's 0 - 180 range, as used by LineDetector.filter_hsv.
+        self.tape_colour = cv2.cvtColor(np.array([[[hue, 200, 180]]], dtype=np.uint8), cv2.COLOR_HSV2BGR)[0, 0]
+        self.floor_colour = np.array([60, 110, 160], dtype=np.uint8)  # Wooden floor
+        self.wall_colour = np.array([200, 200, 200], dtype=np.uint8)
+
+    def start_pose(self) -> tuple[float]:
+        """Pose (x, y, heading) on the centre of the lane, facing anticlockwise around the track."""
+        return self.radius, 0.0, pi / 2
+
+    def lane_error(self, x: float, y: float) -> float:
+        """Distance from the centre of the lane, positive being outside the circle."""
+        return hypot(x, y) - self.radius
+
+    def tape(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Find which points on the floor are covered by tape."""
+        error = np.abs(np.hypot(x, y) - self.radius)
+
+        return np.abs(error - self.lane_width / 2) < self.tape_width / 2
+
+
+class SimulatedCamera:
+    """Renders the view of the track from the vehicle, with the same .read() interface as cv2.VideoCapture.
+
+    The camera is a pinhole camera at a fixed height, pitched down towards the floor. The point on the floor seen by
+     each pixel only depends on the camera, so it is calculated once, and rendering a frame only needs to move these
+     points to the vehicle's position and check which are covered by tape.
+    """
+
+    def __init__(self,
+                 sim: "Simulator",
+                 width: int = 320,
+                 height: int = 240,
+                 fov: float = 1.3,
+                 camera_height: float = 0.25,
+                 pitch: float = 0.7,
+                 ):
+        """Create the camera.
+
+        Parameters
+        ----------
+        sim : Simulator
+            The simulator whose vehicle the camera is mounted on.
+        width, height : int
+            Size of the frames.
+        fov : float, default 1.3
+            Horizontal field of view, in radians.
+        camera_height : float, default 0.25
+            Height of the camera above the floor, in metres.
+        pitch : float, default 0.7
+            Angle the camera is pointed below horizontal, in radians.
+        """
+        self.sim = sim
+        self.width = width
+        self.height = height
+
+        focal = (width / 2) / tan(fov / 2)
+        u, v = np.meshgrid(np.arange(width) - (width - 1) / 2, np.arange(height) - (height - 1) / 2)
+
+        # Direction of the ray through each pixel, relative to the vehicle. Image y is down.
+        forward = focal * cos(pitch) - v * sin(pitch)
+        down = focal * sin(pitch) + v * cos(pitch)
+
+        self.sky = down <= 0  # Rays which never reach the floor.
+        distance = camera_height / np.where(self.sky, 1, down)
+        self.forward = np.where(self.sky, 0, forward * distance)  # Floor position, metres ahead of the vehicle
+        self.left = np.where(self.sky, 0, -u * distance)  # and metres to its left.
+
+        self.last_render = None  # time.monotonic() of the last frame rendered.
+
+    def render(self, x: float, y: float, heading: float) -> np.ndarray:
+        """Render the view from a pose."""
+        track = self.sim.track
+
+        floor_x = x + self.forward * cos(heading) - self.left * sin(heading)
+        floor_y = y + self.forward * sin(heading) + self.left * cos(heading)
+
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[:] = track.floor_colour
+        frame[track.tape(floor_x, floor_y) & ~self.sky] = track.tape_colour
+        frame[self.sky] = track.wall_colour
+
+        return frame
+
+    def read(self) -> tuple[bool, np.ndarray]:
+        """Render the view from the vehicle's current pose."""
+        x, y, heading = self.sim.pose()
+        frame = self.render(x, y, heading)
+
+        self.last_render = time.monotonic()
+        self.sim.record_frame(x, y)
+
+        return True, frame
+
+    def release(self) -> None:
+        """Nothing to release."""
+        pass
+
+
+class SimulatedMotion(Motion):
+    """Two wheels with differential steering, like hardware.motion.edukit.EduKit3, moving the simulated vehicle.
+
+    Each call to move() integrates the vehicle's pose over the time since the last call, at the wheel speeds power
+     and direction give.
+    """
+
+    reverse = True
+
+    def __init__(self, sim: "Simulator", max_speed: float = 0.5, wheelbase: float = 0.15, *args, **kwargs):
+        self.sim = sim
+        self.max_speed = max_speed  # Speed of a wheel at full power, in metres per second.
+        self.wheelbase = wheelbase  # Distance between the wheels, in metres.
+
+        self.last_move = None
+        self.last_command = None
+
+        super().__init__(*args, **kwargs)
+
+    def wheel_speeds(self, power: float, direction: float) -> tuple[float]:
+        """Speeds of the left and right wheels in metres per second, calculated as EduKit3.move does."""
+        theta = - pi * direction + (pi / 4)
+
+        left_v = min(max(power * cos(theta), -1.0), 1.0)
+        right_v = min(max(power * sin(theta), -1.0), 1.0)
+
+        return left_v * self.max_speed, right_v * self.max_speed
+
+    def move(self) -> None:
+        """Move the vehicle, according to the power and direction since the last call."""
+        now = time.monotonic()
+        power, direction = self.target
+
+        if (power, direction) != self.last_command:  # Command changed, so record how long since the frame it used.
+            self.last_command = power, direction
+            self.sim.record_latency(now)
+
+        last_move, self.last_move = self.last_move, now  # None after a halt.
+
+        if last_move is not None:
+            left_v, right_v = self.wheel_speeds(power, direction)
+            self.sim.integrate((left_v + right_v) / 2, (right_v - left_v) / self.wheelbase, now - last_move)
+
+    def halt(self) -> None:
+        """Stop movement, so time spent stopped isn't integrated on the next move."""
+        self.last_move = None
+
+
+class Simulator:
+    """Closed loop simulation of the vehicle on a track.
+
+    The simulator provides a camera (see SimulatedCamera) and motion interface (see SimulatedMotion), to use in place
+     of real hardware. While it runs, it measures how far the vehicle strays from the centre of the lane, and the time
+     between a frame being rendered and the motion command it leads to.
+    """
+
+    def __init__(self, track: Track = None, **camera_kwargs):
+        self.track = Track() if track is None else track
+
+        # The pose is read by the camera and written by the movement thread, and the statistics are written by both
+        #  and read by the control thread, so all are protected by this.
+        self.lock = thr.Lock()
+        self.x, self.y, self.heading = self.track.start_pose()
+
+        self.start = time.monotonic()
+        self.frames = 0
+        self.distance = 0.0
+        self.errors = []  # Lane error at each frame rendered
+        self.latencies = []
+
+        self.camera = SimulatedCamera(self, **camera_kwargs)
+        self.motion = SimulatedMotion(self)
+
+    def pose(self) -> tuple[float]:
+        """The vehicle's current position and heading, (x, y, heading)."""
+        with self.lock:
+            return self.x, self.y, self.heading
+
+    def integrate(self, speed: float, yaw_rate: float, dt: float) -> None:
+        """Move the vehicle at the given speed (metres per second) and yaw rate (radians per second) for dt seconds."""
+        with self.lock:
+            heading = self.heading + yaw_rate * dt / 2  # Midpoint heading, for accuracy on curves.
+            self.x += speed * dt * cos(heading)
+            self.y += speed * dt * sin(heading)
+            self.heading += yaw_rate * dt
+            self.distance += abs(speed * dt)
+
+    def record_frame(self, x: float, y: float) -> None:
+        """Count a frame rendered with the vehicle at (x, y), and record its lane error."""
+        error = self.track.lane_error(x, y)
+
+        with self.lock:
+            self.frames += 1
+            self.errors.append(error)
+
+    def record_latency(self, now: float) -> None:
+        """Record the time between the last frame and a new motion command."""
+        last_render = self.camera.last_render
+        if last_render is not None:
+            with self.lock:
+                self.latencies.append(now - last_render)
+
+    def stats(self) -> dict:
+        """Statistics of the simulation so far.
+
+        Returns
+        -------
+        dict
+            duration : seconds since the simulator was created.
+            frames, frame_rate : frames rendered, and their rate per second.
+            distance : metres driven.
+            mean_error, rms_error, max_error : absolute distance from the centre of the lane, in metres.
+            mean_latency, max_latency : seconds from a frame being rendered to the motion command following it.
+        """
+        duration = time.monotonic() - self.start
+
+        with self.lock:
+            errors = np.abs(self.errors) if len(self.errors) > 0 else np.zeros(1)
+            latencies = np.array(self.latencies) if len(self.latencies) > 0 else np.zeros(1)
+
+            return {
+                "duration": duration,
+                "frames": self.frames,
+                "frame_rate": self.frames / duration,
+                "distance": self.distance,
+                "mean_error": errors.mean(),
+                "rms_error": np.sqrt(np.mean(errors ** 2)),
+                "max_error": errors.max(),
+                "mean_latency": latencies.mean(),
+                "max_latency": latencies.max(),
+            }
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""Telemetry module.
+
+A flight recorder which stores what the system saw and did on every tick, so a bad run can be reconstructed
+ afterwards. Records are a fixed size, and are written into a preallocated, memory mapped file used as a ring buffer,
+ so recording a tick is a struct.pack_into with no system calls, and the records survive the program crashing.
+
+Usage:
+    manager.mainloop(recorder=FlightRecorder("flight.bin"))
+    ...
+    records = read_flight_log("flight.bin")
+    records["steering"]  # Steering on each tick, oldest first.
+"""
+
+import mmap
+import struct
+
+import numpy as np
+
+# Fields of each record, and their struct/numpy type codes, all little endian.
+FIELDS = [
+    ("timestamp", "d"),  # time.monotonic() the tick started.
+    ("frame_seq", "q"),  # Sequence number of the frame used, or -1.
+    ("lane_t", "d"),  # Lane angle and intercept, as from LineDetector.lane_slope, or nan.
+    ("lane_c", "d"),
+    ("left_lines", "i"),  # Lines found on each side of the lane, or -1 if the detector wasn't run.
+    ("right_lines", "i"),
+    ("steering", "d"),  # Motion command, or nan.
+    ("power", "d"),
+    ("duration", "d"),  # Seconds the tick took.
+]
+RECORD = struct.Struct("<" + "".join(code for _, code in FIELDS))
+DTYPE = np.dtype([(name, "<" + code) for name, code in FIELDS])
+
+# File header: magic, format version, record size, capacity and records written. Padded to HEADER_SIZE bytes.
+HEADER = struct.Struct("<4sHHIQ")
+HEADER_SIZE = 64
+MAGIC = b"APFR"
+VERSION = 1
+
+
+class FlightRecorder:
+    """Records one telemetry record per tick into a memory mapped ring buffer file.
+
+    The file is created at its full size when the recorder is created, replacing any earlier log at the same path.
+     Once it is full, the oldest records are overwritten. The number of records written is kept in the header, and
+     only updated after each record is complete, so a reader never sees a partly written record as the newest.
+    """
+
+    def __init__(self, path: str, capacity: int = 65536):
+        """Create the recorder and its file.
+
+        Parameters
+        ----------
+        path : str
+            File to record to.
+        capacity : int, default 65536
+            Number of records kept. 65536 is 4MB, about 11 minutes at 100 ticks per second.
+        """
+        self.path = path
+        self.capacity = capacity
+        self.count = 0  # Records written.
+
+        with open(path, "wb") as f:
+            f.truncate(HEADER_SIZE + capacity * RECORD.size)
+
+        self.file = open(path, "r+b")  # Kept open while mapped, closed by close().
+        self.mmap = mmap.mmap(self.file.fileno(), 0)
+        HEADER.pack_into(self.mmap, 0, MAGIC, VERSION, RECORD.size, capacity, 0)
+
+    def record(self,
+               timestamp: float,
+               duration: float,
+               frame_seq: int = -1,
+               lane_t: float = float("nan"),
+               lane_c: float = float("nan"),
+               left_lines: int = -1,
+               right_lines: int = -1,
+               steering: float = float("nan"),
+               power: float = float("nan"),
+               ) -> None:
+        """Record a tick. Fields which aren't known are left as their defaults, or may be given as None, see FIELDS."""
+        # None, eg the angle of a lane which has been lost, is stored as the field's default.
+        frame_seq, left_lines, right_lines = (-1 if value is None else value for value in
+                                              (frame_seq, left_lines, right_lines))
+        lane_t, lane_c, steering, power = (float("nan") if value is None else value for value in
+                                           (lane_t, lane_c, steering, power))
+
+        offset = HEADER_SIZE + (self.count % self.capacity) * RECORD.size
+        RECORD.pack_into(self.mmap, offset, timestamp, frame_seq, lane_t, lane_c, left_lines, right_lines, steering,
+                         power, duration)
+
+        self.count += 1
+        HEADER.pack_into(self.mmap, 0, MAGIC, VERSION, RECORD.size, self.capacity, self.count)
+
+    def flush(self) -> None:
+        """Write the records to disk. Not needed to survive a crash of the program, only of the system."""
+        self.mmap.flush()
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        if self.mmap.closed:
+            return
+
+        self.mmap.flush()
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self) -> "FlightRecorder":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def read_flight_log(path: str) -> np.ndarray:
+    """Load the records from a FlightRecorder file, oldest first.
+
+    Returns
+    -------
+    np.ndarray
+        Structured array with one element per record, and the fields in FIELDS, eg records["lane_t"].
+    """
+    with open(path, "rb") as f:
+        magic, version, record_size, capacity, count = HEADER.unpack(f.read(HEADER.size))
+
+    if magic != MAGIC or version != VERSION or record_size != DTYPE.itemsize:
+        raise ValueError("{} isn't a version {} flight log".format(path, VERSION))
+
+    records = np.fromfile(path, dtype=DTYPE, count=capacity, offset=HEADER_SIZE)
+    if count <= capacity:
+        return records[:count]
+
+    # Once the buffer has wrapped, the oldest record is the one after the newest.
+    return np.roll(records, -(count % capacity))
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""Tracing module.
+
+Records when parts of the system start and finish, so that slow frames or stalls can be found after a run. Tracing is
+ disabled by default, in which case it costs one attribute check per traced call. When enabled, spans are stored in a
+ preallocated ring buffer, and can be exported in the Chrome trace format, which can be opened in Perfetto
+ (https://ui.perfetto.dev) or chrome://tracing.
+
+Usage:
+    from autonopi import tracing
+
+    tracing.tracer.enable()
+    ...  # Run the system
+    tracing.tracer.export("trace.json")
+"""
+
+import functools
+import itertools
+import json
+import os
+import threading as thr
+import time
+from array import array
+
+
+class Tracer:
+    """Records spans (a name, a start and an end time) into a ring buffer.
+
+    Once the buffer is full, the oldest spans are overwritten.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.enabled = False
+        self.capacity = capacity
+
+        # Ring buffer, one entry per span. Arrays from the standard library, so importing this module (which most
+        #  others do) doesn't import numpy.
+        self.starts = array("d", [0.0]) * capacity
+        self.ends = array("d", [0.0]) * capacity
+        self.name_ids = array("i", [0]) * capacity
+        self.thread_ids = array("Q", [0]) * capacity
+
+        self.names = []  # Names are stored once, and referred to by their index in this list.
+        self.name_index = {}
+        self.threads = {}  # Thread names, by thread ID.
+
+        self.counter = itertools.count()  # next() on this is atomic, so threads can record without a lock.
+        self.count = 0  # Number of spans recorded.
+
+    def enable(self) -> None:
+        """Start recording spans."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording spans. Spans already recorded are kept."""
+        self.enabled = False
+
+    def clear(self) -> None:
+        """Forget all recorded spans."""
+        self.counter = itertools.count()
+        self.count = 0
+
+    def name_id(self, name: str) -> int:
+        """Get the ID for a span name, adding it if it's new."""
+        try:
+            return self.name_index[name]
+        except KeyError:
+            self.names.append(name)
+            return self.name_index.setdefault(name, len(self.names) - 1)
+
+    def record(self, name_id: int, start: float, end: float) -> None:
+        """Record a span in the current thread, with times from time.perf_counter()."""
+        n = next(self.counter)
+        i = n % self.capacity
+
+        thread_id = thr.get_ident()
+        if thread_id not in self.threads:
+            self.threads[thread_id] = thr.current_thread().name
+
+        self.starts[i] = start
+        self.ends[i] = end
+        self.name_ids[i] = name_id
+        self.thread_ids[i] = thread_id
+
+        self.count = max(self.count, n + 1)
+
+    def span(self, name: str) -> "Span":
+        """Context manager which records a span around the code inside it."""
+        return Span(self, name) if self.enabled else NULL_SPAN
+
+    def traced(self, name: str = None) -> callable:
+        """Decorator which records a span each time the function is called.
+
+        If name isn't given, the function's qualified name is used, eg "LineDetector.canny".
+        """
+        def decorator(func: callable) -> callable:
+            name_id = self.name_id(func.__qualname__ if name is None else name)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs) -> object:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name_id, start, time.perf_counter())
+
+            return wrapper
+
+        return decorator
+
+    def spans(self) -> list[tuple]:
+        """Get the recorded spans, oldest first, as (name, start, end, thread ID)."""
+        count = min(self.count, self.capacity)
+        # Once the buffer has wrapped, the oldest span is the one after the newest.
+        order = (n % self.capacity for n in range(self.count - count, self.count))
+
+        return [(self.names[self.name_ids[i]], self.starts[i], self.ends[i], self.thread_ids[i]) for i in order]
+
+    def chrome_trace(self) -> dict:
+        """Convert the recorded spans to the Chrome trace event format."""
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in self.threads.items()]
+
+        for name, start, end, tid in self.spans():
+            events.append({
+                "name": name,
+                "ph": "X",  # Complete event, with a start and duration.
+                "ts": start * 1e6,  # Microseconds
+                "dur": (end - start) * 1e6,
+                "pid": pid,
+                "tid": tid,
+            })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> None:
+        """Save the recorded spans to a file in the Chrome trace format."""
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+class Span:
+    """Context manager returned by Tracer.span, which records the time spent inside it."""
+
+    __slots__ = ("tracer", "name_id", "start")
+
+    def __init__(self, tracer: Tracer, name: str):
+        self.tracer = tracer
+        self.name_id = tracer.name_id(name)
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.tracer.record(self.name_id, self.start, time.perf_counter())
+
+
+class NullSpan:
+    """Context manager which does nothing, returned by Tracer.span while tracing is disabled."""
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+# Tracer used throughout autonoPi.
+tracer = Tracer()
+traced = tracer.traced
+span = tracer.span
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+"""Lane tracking module.
+
+LineDetector.lane_slope only uses the current frame, so the lane has to be detected in full on every control tick. The
+ tracker here filters its results over time, so the lane can be predicted between detections.
+"""
+
+from math import isfinite
+
+import numpy as np
+
+
+class LaneTracker:
+    """Alpha-beta filter on the angle and intercept of the lane, as returned by LineDetector.lane_slope.
+
+    The filter keeps an estimate of the lane and the rate it is changing at. Each detection corrects the estimate by a
+     fraction (alpha) of the difference between the detection and the prediction, and the rate by a fraction (beta)
+     of it. Between detections, the lane is predicted by extrapolating at the estimated rate.
+
+    This allows the detector to run only every few ticks (see should_detect), and covers brief periods where no lane
+     is detected.
+    """
+
+    def __init__(self,
+                 alpha: float = 0.6,
+                 beta: float = 0.1,
+                 interval: int = 1,
+                 max_error: float = 0.1,
+                 max_dropout: float = 0.5,
+                 ):
+        """Create the tracker.
+
+        Parameters
+        ----------
+        alpha : float, default 0.6
+            Fraction of the error in each detection used to correct the estimate, 0.0 - 1.0.
+        beta : float, default 0.1
+            Fraction of the error in each detection used to correct the rate of change, 0.0 - 1.0.
+        interval : int, default 1
+            Run the detector every this many ticks, while it is tracking well. 1 detects on every tick.
+        max_error : float, default 0.1
+            If a detection's angle differs from the prediction by more than this (in radians), the prediction isn't
+             trusted, and the detector is run every tick until it is again.
+        max_dropout : float, default 0.5
+            How long (in seconds) to keep predicting the lane for after the last successful detection.
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.interval = interval
+        self.max_error = max_error
+        self.max_dropout = max_dropout
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the current estimate."""
+        self.state = None  # Estimated [angle, intercept]
+        self.rate = np.zeros(2)  # Estimated rate of change of state, per second
+        self.time = None  # Time state was estimated at.
+
+        self.last_detection = None  # Time of the last successful detection.
+        self.error = 0.0  # Angle error of the last detection against the prediction.
+        self.lost = False  # Whether the last time the detector ran, it failed.
+        self.ticks = 0  # Ticks since the detector was last run.
+
+    def predict(self, t: float) -> tuple[float]:
+        """Predict the angle and intercept of the lane at time t.
+
+        Returns None, None if there is no estimate, or the last detection is older than max_dropout.
+        """
+        if self.state is None or t - self.last_detection > self.max_dropout:
+            return None, None
+
+        theta, intercept = self.state + self.rate * (t - self.time)
+
+        return theta, intercept
+
+    def update(self, theta: float, intercept: float, t: float) -> tuple[float]:
+        """Correct the estimate with a detection at time t.
+
+        If the detection failed (eg lane_slope returned -inf) use miss() instead, this is done automatically for
+         non-finite values.
+
+        Returns
+        -------
+        float, float
+            The new estimate of the angle and intercept.
+        """
+        if not (isfinite(theta) and isfinite(intercept)):
+            return self.miss(t)
+
+        self.ticks = 0
+        self.lost = False
+        measurement = np.array([theta, intercept])
+
+        if self.state is None or t - self.last_detection > self.max_dropout:  # Start tracking from scratch
+            self.state = measurement
+            self.rate = np.zeros(2)
+            self.error = 0.0
+        else:
+            dt = t - self.time
+            prediction = self.state + self.rate * dt
+            residual = measurement - prediction
+
+            self.state = prediction + self.alpha * residual
+            if dt > 0:
+                self.rate = self.rate + self.beta * residual / dt
+
+            self.error = abs(residual[0])
+
+        self.time = t
+        self.last_detection = t
+
+        return tuple(self.state)
+
+    def miss(self, t: float) -> tuple[float]:
+        """Record that the detector ran at time t, but didn't find the lane.
+
+        Returns
+        -------
+        float, float
+            The predicted angle and intercept, see predict.
+        """
+        self.ticks = 0
+        self.lost = True
+
+        return self.predict(t)
+
+    def should_detect(self, t: float) -> bool:
+        """Whether the detector should be run on this tick.
+
+        The detector should be run if there is no current estimate, the last detection failed or was too far from the
+         prediction, or it has been self.interval ticks since it last ran. Otherwise, use predict.
+        Each call counts as a tick, so this should be called once per tick.
+        """
+        self.ticks += 1
+
+        return (self.state is None
+                or self.lost
+                or t - self.last_detection > self.max_dropout
+                or self.error > self.max_error
+                or self.ticks >= self.interval
+                )
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+"""Offline tuning of the lane detection parameters.
+
+Configurations of the HSV, Canny and Hough parameters are run over a set of frames in a pool of processes. Each is
+ scored on how far its lane angles are from the labelled angles, and how long it takes per frame, and the Pareto set
+ (the configurations which no other is both more accurate and cheaper than) is kept. The cheapest configuration in
+ the set which is still accurate enough can then be used on the vehicle.
+
+Frames can be images, or recordings made with hardware.camera.recording.FrameRecorder. If no labels are given, the
+ angles found by the hand-picked parameters used by examples/edukit3.py are used instead, so the tuning finds
+ cheaper configurations which agree with them.
+"""
+
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import pi
+
+import cv2
+import numpy as np
+
+from .cv import LineDetector
+from .hardware.camera.recording import ReplayCapture
+
+# Candidate values for each parameter.
+PARAMETERS = {
+    "hue_tol": [10, 15, 20, 25],
+    "sat_min": [25, 38, 60, 90],
+    "val_min": [25, 38, 60, 90],
+    "lwr": [50, 100, 150],
+    "upr": [150, 200, 250],
+    "thresh": [5, 10, 20],
+    "minL": [8, 16, 32],
+    "maxG": [2, 4, 8],
+    "scale": [1.0, 0.5, 0.25],
+}
+# Hand-picked parameters, as used by examples/edukit3.py.
+BASELINE = {"hue_tol": 15, "sat_min": 38, "val_min": 38, "lwr": 100, "upr": 200, "thresh": 10, "minL": 16, "maxG": 4,
+            "scale": 1.0}
+# Parameters which aren't tuned.
+FIXED = {"hue": 105, "top": 0.35, "bottom": 0.01, "bounds": [0, 0.4]}
+
+MISS_ERROR = pi / 4  # Error counted for a frame where no lane is found, in radians.
+
+# Frames and labels used by evaluate, loaded once in each worker process by init_worker.
+worker_data = {}
+
+
+def load_frames(paths: list[str]) -> list[np.ndarray]:
+    """Load frames from images, and recordings made by FrameRecorder."""
+    frames = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is not None:
+            frames.append(image)
+            continue
+
+        replay = ReplayCapture(path)
+        while True:
+            ret, frame = replay.read()
+            if not ret:
+                break
+            frames.append(frame)
+        replay.release()
+
+    return frames
+
+
+def lane_angles(frames: list[np.ndarray], config: dict, fixed: dict = FIXED, repeats: int = 1) -> tuple[np.ndarray]:
+    """Find the lane angle in each frame with a configuration.
+
+    Returns
+    -------
+    np.ndarray, np.ndarray
+        The lane angle of each frame in radians, nan where no lane is found, and the fastest time taken for each
+         frame out of repeats, in seconds.
+    """
+    ld = LineDetector(None, scale=config["scale"])
+    params = {"hue": fixed["hue"], "sat": [config["sat_min"], 255], "val": [config["val_min"], 255],
+              "hue_tol": config["hue_tol"], "top": fixed["top"], "bottom": fixed["bottom"], "lwr": config["lwr"],
+              "upr": config["upr"], "thresh": config["thresh"], "minL": config["minL"], "maxG": config["maxG"]}
+
+    angles = np.full(len(frames), np.nan)
+    times = np.full(len(frames), np.inf)
+    for n, frame in enumerate(frames):
+        for _ in range(repeats):
+            start = time.perf_counter()
+            lines = ld.process_frame(frame, **params)
+            lane_t, _ = ld.lane_slope(*ld.split_lines(lines, frame.shape[1], bounds=fixed["bounds"]))
+            times[n] = min(times[n], time.perf_counter() - start)
+
+        if np.isfinite(lane_t):
+            angles[n] = lane_t
+
+    return angles, times
+
+
+def score(angles: np.ndarray, labels: np.ndarray) -> dict:
+    """Compare lane angles to labels. Frames with no label are ignored, and missed frames count as MISS_ERROR."""
+    labelled = np.isfinite(labels)
+    errors = np.abs(angles[labelled] - labels[labelled])
+    errors[~np.isfinite(errors)] = MISS_ERROR
+
+    return {
+        "error": float(np.mean(np.minimum(errors, MISS_ERROR))) if len(errors) > 0 else MISS_ERROR,
+        "misses": int(np.sum(~np.isfinite(angles[labelled]))),
+    }
+
+
+def init_worker(paths: list[str], labels: np.ndarray, fixed: dict, repeats: int) -> None:
+    """Load the frames in a worker process, so they aren't sent with every configuration."""
+    worker_data["frames"] = load_frames(paths)
+    worker_data["labels"] = labels
+    worker_data["fixed"] = fixed
+    worker_data["repeats"] = repeats
+
+
+def evaluate(config: dict) -> dict:
+    """Score a configuration on the worker's frames, see init_worker.
+
+    Returns
+    -------
+    dict
+        The configuration, its error (mean absolute lane angle error in radians), misses (frames where no lane was
+         found) and cost (median milliseconds per frame).
+    """
+    angles, times = lane_angles(worker_data["frames"], config, worker_data["fixed"], worker_data["repeats"])
+
+    return {"config": config, **score(angles, worker_data["labels"]), "cost": float(np.median(times) * 1000)}
+
+
+def pareto(results: list[dict]) -> list[dict]:
+    """Find the results which no other result has both a lower error and a lower cost than, cheapest first."""
+    front = []
+    for result in sorted(results, key=lambda r: (r["cost"], r["error"])):
+        if len(front) == 0 or result["error"] < front[-1]["error"]:
+            front.append(result)
+
+    return front
+
+
+def configurations(samples: int = None, seed: int = 0, parameters: dict = PARAMETERS) -> list[dict]:
+    """List configurations to try: every combination of parameters, or a random sample of them.
+
+    The baseline is always included, so the results can be compared with it.
+    """
+    grid = [dict(zip(parameters, values)) for values in itertools.product(*parameters.values())]
+    grid = [config for config in grid if config["lwr"] < config["upr"]]
+
+    if samples is not None and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+
+    if BASELINE not in grid:
+        grid.insert(0, dict(BASELINE))
+
+    return grid
+
+
+def tune(paths: list[str],
+         labels: list[float] = None,
+         samples: int = 200,
+         workers: int = None,
+         seed: int = 0,
+         repeats: int = 3,
+         fixed: dict = FIXED,
+         ) -> dict:
+    """Search for the best configurations of the lane detection parameters.
+
+    Parameters
+    ----------
+    paths : list[str]
+        Images and recordings to tune on.
+    labels : list[float], optional
+        The true lane angle of each frame, in radians, or None/nan for frames without one. If not given, the angles
+         found with BASELINE are used.
+    samples : int, default 200
+        Number of configurations to try, picked at random. If None, every configuration is tried.
+    workers : int, optional
+        Number of processes to evaluate configurations in. Defaults to the number of CPUs. Note that per frame
+         costs are measured while the other workers are running, so are only comparable between configurations.
+    seed : int, default 0
+        Seed for picking configurations.
+    repeats : int, default 3
+        Times each frame is processed, taking the fastest as its cost.
+    fixed : dict, default FIXED
+        Parameters which aren't tuned.
+
+    Returns
+    -------
+    dict
+        frames : number of frames tuned on.
+        baseline : result of BASELINE, see evaluate.
+        pareto : results in the Pareto set, cheapest first.
+        results : results of every configuration tried.
+    """
+    frames = load_frames(paths)
+
+    if labels is None:
+        labels, _ = lane_angles(frames, BASELINE, fixed)
+    labels = np.array([np.nan if label is None else label for label in labels], dtype=np.float64)
+
+    if len(labels) != len(frames):
+        raise ValueError("Got {} labels for {} frames".format(len(labels), len(frames)))
+
+    configs = configurations(samples, seed)
+    workers = os.cpu_count() if workers is None else workers
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(paths, labels, fixed, repeats)) as pool:
+        results = list(pool.map(evaluate, configs, chunksize=max(1, len(configs) // (workers * 4))))
+
+    baseline = next(result for result in results if result["config"] == BASELINE)
+
+    return {"frames": len(frames), "baseline": baseline, "pareto": pareto(results), "results": results}
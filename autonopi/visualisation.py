@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+"""Visualisation module.
+
+Draws what the CV system has found onto its frames, and serves them as an MJPEG stream over HTTP, so a running
+ vehicle can be watched from a browser without a display attached to it. Drawing and encoding are done in a separate
+ thread, and frames are dropped rather than queued if it falls behind, so watching never slows down the control loop.
+
+Usage:
+    visualiser = Visualiser(port=8080)
+    visualiser.start()
+    ...
+    visualiser.submit(frame, left, right, (lane_t, lane_c))  # In the control loop
+    ...
+    visualiser.stop()
+
+Then open http://localhost:8080 in a browser. The stream is only served to the vehicle itself unless another host
+ is given, eg Visualiser(host="0.0.0.0") to watch it from another machine.
+"""
+
+import queue
+import threading as thr
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import floor
+
+import cv2
+import numpy as np
+
+
+def draw_lanes(frame: np.ndarray, left: np.ndarray, right: np.ndarray, lane: tuple[float] = None) -> np.ndarray:
+    """Draw lane lines onto a frame, in place.
+
+    Parameters
+    ----------
+    frame : np.ndarray
+        BGR image to draw on.
+    left, right : np.ndarray
+        Left and right lane lines, as passed to LineDetector.lane_slope. Drawn in blue and red.
+    lane : tuple[float], optional
+        The (angle, intercept) of the lane, as returned by LineDetector.lane_slope. Drawn in green.
+
+    Returns
+    -------
+    np.ndarray
+        The frame.
+    """
+    for lines, colour in [(left, (255, 0, 0)), (right, (0, 0, 255))]:
+        for x1, y1, x2, y2 in np.rint(np.reshape(lines, (-1, 4))).astype(int):
+            cv2.line(frame, (x1, y1), (x2, y2), colour, 2)
+
+    if lane is not None and np.all(np.isfinite(lane)):
+        lane_t, lane_c = lane
+        with np.errstate(divide="ignore", invalid="ignore"):  # Lanes which can't be drawn give non finite points.
+            lane_m = 1 / np.tan(lane_t)
+            bottom_x, bottom_y = (frame.shape[0] - lane_c) / lane_m, frame.shape[0]
+            top_x, top_y = - lane_c / lane_m, 0
+
+        if np.isfinite(bottom_x) and np.isfinite(top_x):
+            cv2.line(frame, (floor(bottom_x), bottom_y), (floor(top_x), top_y), (0, 255, 0), 5)
+
+    return frame
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """Serves the visualiser's frames. The visualiser is found through the server, see Visualiser.start."""
+
+    boundary = "frame"
+
+    def do_GET(self) -> None:  # Named by BaseHTTPRequestHandler
+        """Serve a page showing the stream, the stream itself, or a single frame."""
+        visualiser = self.server.visualiser
+
+        if self.path == "/":
+            body = b"<html><body style='margin:0'><img src='/stream' style='width:100%'></body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        elif self.path == "/frame.jpg":
+            jpeg, _ = visualiser.wait_jpeg(-1)
+            if jpeg is None:
+                self.send_error(503, "No frames yet")
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(jpeg)))
+            self.end_headers()
+            self.wfile.write(jpeg)
+
+        elif self.path == "/stream":
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=" + self.boundary)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+            seq = -1
+            try:
+                while visualiser.running:
+                    jpeg, seq = visualiser.wait_jpeg(seq)
+                    if jpeg is None:  # Timed out, or stopping.
+                        continue
+
+                    self.wfile.write("--{}\r\nContent-Type: image/jpeg\r\nContent-Length: {}\r\n\r\n".format(
+                        self.boundary, len(jpeg)).encode())
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):  # Viewer closed the stream.
+                pass
+
+        else:
+            self.send_error(404)
+
+    def log_message(self, format: str, *args) -> None:
+        """Don't log every request."""
+        pass
+
+
+class Visualiser:
+    """Draws lane detections onto frames in a background thread, and serves them as an MJPEG stream.
+
+    Frames are passed to the thread through a bounded queue. If the queue is full, the frame is dropped rather than
+     waiting, and only every nth frame is submitted at all, so the control loop never blocks on visualisation.
+    """
+
+    def __init__(self,
+                 every: int = 2,
+                 queue_size: int = 2,
+                 quality: int = 70,
+                 host: str = "127.0.0.1",
+                 port: int = 8080,
+                 ):
+        """Create the visualiser.
+
+        Parameters
+        ----------
+        every : int, default 2
+            Only every nth frame submitted is visualised.
+        queue_size : int, default 2
+            Number of frames which can wait to be drawn before new frames are dropped.
+        quality : int, default 70
+            JPEG quality, from 0 to 100.
+        host : str, default "127.0.0.1"
+            Address to serve the stream on. Only the vehicle itself can watch it by default, "0.0.0.0" serves it to
+             other machines too.
+        port : int, default 8080
+            Port to serve the stream on. Port 0 picks a free port, which is stored in self.port once started.
+        """
+        self.every = every
+        self.quality = quality
+        self.host = host
+        self.port = port
+
+        self.queue = queue.Queue(maxsize=queue_size)
+
+        # Newest encoded frame, and its sequence number. Stream handlers wait on new_jpeg for the next one.
+        self.jpeg = None
+        self.seq = -1
+        self.new_jpeg = thr.Condition()
+
+        self.submitted = 0  # Frames passed to submit.
+        self.dropped = 0  # Frames dropped because the queue was full.
+        self.errors = 0  # Frames which couldn't be drawn or encoded.
+
+        self.running = False
+        self.server = None
+        self.draw_thread = None
+        self.server_thread = None
+
+    def start(self) -> None:
+        """Start the drawing thread and the HTTP server."""
+        self.running = True
+
+        self.server = ThreadingHTTPServer((self.host, self.port), StreamHandler)
+        self.server.daemon_threads = True
+        self.server.visualiser = self
+        self.port = self.server.server_address[1]
+
+        # Daemons, for the same reason as the movement thread, see hardware.motion.Motion.
+        self.draw_thread = thr.Thread(target=self.draw, daemon=True)
+        self.server_thread = thr.Thread(target=self.server.serve_forever, daemon=True)
+        self.draw_thread.start()
+        self.server_thread.start()
+
+    def stop(self) -> None:
+        """Stop the drawing thread and the HTTP server."""
+        if not self.running:
+            return
+
+        self.running = False
+        with self.new_jpeg:
+            self.new_jpeg.notify_all()
+
+        try:
+            self.queue.put_nowait(None)  # Wake the drawing thread.
+        except queue.Full:
+            pass
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.draw_thread.join()
+
+    def submit(self, frame: np.ndarray, left: np.ndarray = (), right: np.ndarray = (), lane: tuple[float] = None,
+               ) -> bool:
+        """Pass a frame and what was found in it to be visualised, without waiting.
+
+        The frame is drawn on later, so it must not be changed after it is submitted.
+
+        Returns
+        -------
+        bool
+            Whether the frame will be visualised. False if it was skipped, or dropped because the queue was full.
+        """
+        self.submitted += 1
+        if (self.submitted - 1) % self.every != 0:
+            return False
+
+        try:
+            self.queue.put_nowait((frame, left, right, lane))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def draw(self) -> None:
+        """Drawing thread function. Draws and encodes each frame from the queue.
+
+        A frame which can't be drawn is reported and skipped, rather than stopping the thread.
+        """
+        while self.running:
+            item = self.queue.get()
+            if item is None:
+                continue
+
+            try:
+                frame, left, right, lane = item
+                ret, jpeg = cv2.imencode(".jpg", draw_lanes(frame, left, right, lane),
+                                         [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            except Exception:
+                self.errors += 1
+                traceback.print_exc()
+                continue
+
+            if ret:
+                with self.new_jpeg:
+                    self.jpeg = jpeg.tobytes()
+                    self.seq += 1
+                    self.new_jpeg.notify_all()
+
+    def wait_jpeg(self, seq: int, timeout: float = 1.0) -> tuple[bytes, int]:
+        """Wait for a newer frame than seq, returning it as JPEG and its sequence number.
+
+        Returns (None, seq) if there isn't one within timeout, or the visualiser is stopping.
+        """
+        with self.new_jpeg:
+            self.new_jpeg.wait_for(lambda: self.seq > seq or not self.running, timeout)
+
+            if self.seq > seq and self.jpeg is not None:
+                return self.jpeg, self.seq
+
+            return None, seq
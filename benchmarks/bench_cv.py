@@ -0,0 +1,171 @@
+"""Benchmark each stage of the CV system, and the full lane detection chain.
+
+Each stage is run on the test images in tests/manual_tests, and on synthetic frames at several resolutions. Frame
+ rate and 50th/95th/99th percentile latency are reported for each, and the results saved as JSON so that versions can
+ be compared.
+
+Usage: python benchmarks/bench_cv.py [--output results.json] [--compare previous.json] [--iterations N]
+                                     [--resolutions 320x240 640x480 ...]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess  # noqa: S404 - Only used to find the git version.
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# noqa required here as there's no way I can comply with E402.
+from autonopi import cv  # noqa: E402
+
+IMAGES = [os.path.join(os.path.dirname(__file__), "../tests/manual_tests/CV_test.jpg"),
+          os.path.join(os.path.dirname(__file__), "../tests/manual_tests/CV_test2.jpg"),
+          ]
+RESOLUTIONS = ["320x240", "640x480", "1280x720"]
+# Parameters used by examples/edukit3.py
+HSV = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15}
+CROP = {"top": 0.35, "bottom": 0.01}
+
+
+def synthetic_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Draw a frame containing two blue lane lines converging towards the top, on a noisy floor."""
+    rng = np.random.default_rng(seed)
+    frame = rng.normal(110, 8, size=(height, width, 3)).clip(0, 255).astype(np.uint8)
+    colour = cv2.cvtColor(np.array([[[105, 220, 200]]], dtype=np.uint8), cv2.COLOR_HSV2BGR)[0, 0].tolist()
+    thickness = max(2, width // 40)
+
+    cv2.line(frame, (width // 10, height - 1), (width * 2 // 5, height // 3), colour, thickness)
+    cv2.line(frame, (width * 9 // 10, height - 1), (width * 3 // 5, height // 3), colour, thickness)
+
+    return frame
+
+
+def measure(func: callable, iterations: int) -> dict:
+    """Time a function, returning the frame rate and latency percentiles in milliseconds."""
+    func()  # Warm up, so buffers and tables are allocated before timing.
+
+    times = np.empty(iterations)
+    for n in range(iterations):
+        start = time.perf_counter()
+        func()
+        times[n] = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1000
+
+    return {"fps": 1 / times.mean(), "mean_ms": times.mean() * 1000, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+
+
+def stages(ld: cv.LineDetector, frame: np.ndarray) -> dict:
+    """Create a function for each stage to benchmark, with inputs prepared from the previous stage."""
+    mask = ld.filter_hsv(frame, **HSV)
+    edges = ld.canny(mask)
+    cropped = ld.v_crop(edges, blkbar=True, **CROP)
+    hough = ld.houghP(cropped)
+    lines = np.empty((0, 4), dtype=np.int32) if hough is None else hough.reshape(-1, 4)
+    left, right = ld.split_lines(lines, frame.shape[1], bounds=[0, 0.4])
+
+    def separate_chain() -> tuple[float]:
+        """The chain of stages used before process_frame."""
+        edges = ld.v_crop(ld.canny(ld.filter_hsv(frame, **HSV)), blkbar=True, **CROP)
+        hough = ld.houghP(edges)
+        lines = np.empty((0, 4), dtype=np.int32) if hough is None else hough.reshape(-1, 4)
+        return ld.lane_slope(*ld.split_lines(lines, frame.shape[1], bounds=[0, 0.4]))
+
+    def lane_angle() -> tuple[float]:
+        """The chain used by EduKit3Manager.get_lane_angle."""
+        lines = ld.process_frame(frame, **HSV, **CROP)
+        return ld.lane_slope(*ld.split_lines(lines, frame.shape[1], bounds=[0, 0.4]))
+
+    def lane_angle_windows() -> tuple[float]:
+        """The same chain, using the sliding window engine instead of Canny and Hough."""
+        return ld.lane_slope(*ld.sliding_windows(frame, **HSV, **CROP))
+
+    return {
+        "filter_hsv": lambda: ld.filter_hsv(frame, **HSV),
+        "filter_hsv_lut": lambda: ld.filter_hsv(frame, lut=True, **HSV),
+        "canny": lambda: ld.canny(mask),
+        "v_crop": lambda: ld.v_crop(edges, blkbar=True, **CROP),
+        "houghP": lambda: ld.houghP(cropped),
+        "arrange_lines": lambda: ld.arrange_lines(lines),
+        "split_lines": lambda: ld.split_lines(lines, frame.shape[1], bounds=[0, 0.4]),
+        "lane_slope": lambda: ld.lane_slope(left, right),
+        "process_frame": lambda: ld.process_frame(frame, **HSV, **CROP),
+        "separate_chain": separate_chain,
+        "lane_angle": lane_angle,
+        "sliding_windows": lambda: ld.sliding_windows(frame, **HSV, **CROP),
+        "lane_angle_windows": lane_angle_windows,
+    }
+
+
+def environment() -> dict:
+    """Describe the versions and platform the benchmark was run on."""
+    try:
+        version = subprocess.run(["git", "describe", "--always", "--dirty"],  # noqa: S603, S607
+                                 capture_output=True, text=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        version = None
+
+    return {
+        "version": version,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def main() -> None:
+    """Run the benchmark, printing a table of results and saving them as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_cv.json", help="File to save the results to.")
+    parser.add_argument("--compare", help="Results from a previous run, to show the change in p50 latency against.")
+    parser.add_argument("--iterations", type=int, default=100, help="Times to run each stage.")
+    parser.add_argument("--resolutions", nargs="*", default=RESOLUTIONS, help="Synthetic frame sizes, eg 640x480.")
+    args = parser.parse_args()
+
+    frames = {os.path.basename(path): cv2.imread(path) for path in IMAGES}
+    for resolution in args.resolutions:
+        width, height = (int(x) for x in resolution.split("x"))
+        frames["synthetic_" + resolution] = synthetic_frame(width, height)
+
+    results = {"environment": environment(), "iterations": args.iterations, "frames": {}}
+
+    previous = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            previous = json.load(f)["frames"]
+
+    header = ["frame", "stage", "fps", "p50", "p95", "p99", "change"]
+    print("{:>22} {:>18} | {:>9} {:>9} {:>9} {:>9} | {:>7}".format(*header))
+    for name, frame in frames.items():
+        ld = cv.LineDetector(None)
+        results["frames"][name] = {"shape": frame.shape, "stages": {}}
+
+        for stage, func in stages(ld, frame).items():
+            result = measure(func, args.iterations)
+            results["frames"][name]["stages"][stage] = result
+
+            try:  # Change in p50 latency since the previous results, negative is faster.
+                change = "{:+.1%}".format(result["p50_ms"] / previous[name]["stages"][stage]["p50_ms"] - 1)
+            except KeyError:
+                change = ""
+
+            print("{:>22} {:>18} | {:>9.1f} {:>7.3f}ms {:>7.3f}ms {:>7.3f}ms | {:>7}".format(
+                name, stage, result["fps"], result["p50_ms"], result["p95_ms"], result["p99_ms"], change))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print("Saved results to {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
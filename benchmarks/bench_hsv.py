@@ -0,0 +1,55 @@
+"""Benchmark LineDetector.filter_hsv(), converting to HSV against looking results up in a table.
+
+Which is faster depends on how well OpenCV's colour conversion is optimised for the platform, so this should be run on
+ the target device before choosing one. Agreement between the two masks is also reported, since the lookup table
+ quantises colours.
+"""
+
+import os
+import sys
+import timeit
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# noqa required here as there's no way I can comply with E402.
+from autonopi import cv  # noqa: E402
+
+IMAGES = [os.path.join(os.path.dirname(__file__), "../tests/manual_tests/CV_test.jpg"),
+          os.path.join(os.path.dirname(__file__), "../tests/manual_tests/CV_test2.jpg"),
+          ]
+PARAMS = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15}
+
+
+def bench(func: callable, number: int = 50) -> float:
+    """Time a function, returning the best time of a few repeats in milliseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main() -> None:
+    """Run the benchmark, printing a table of timings."""
+    ld = cv.LineDetector(None)
+
+    print("{:>16} {:>10} | {:>10} {:>10} {:>10} | {:>9}".format("image", "size", "cvtColor", "lut", "lut build",
+                                                                "agreement"))
+    for path in IMAGES:
+        frame = cv2.imread(path)
+
+        build = bench(lambda: cv.hsv_lut.__wrapped__(PARAMS["hue"], (38, 255), (38, 255), 15, ld.lut_bits), 1)
+
+        mask = ld.filter_hsv(frame, **PARAMS)
+        lut_mask = ld.filter_hsv(frame, lut=True, **PARAMS)
+        agreement = np.mean(mask == lut_mask) * 100
+
+        times = [bench(lambda: ld.filter_hsv(frame, **PARAMS)),
+                 bench(lambda: ld.filter_hsv(frame, lut=True, **PARAMS)),
+                 ]
+
+        print("{:>16} {:>10} | {:>8.3f}ms {:>8.3f}ms {:>8.3f}ms | {:>8.2f}%".format(
+            os.path.basename(path), "{}x{}".format(frame.shape[1], frame.shape[0]), *times, build, agreement))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark LineDetector.split_lines() and LineDetector.arrange_lines() against the number of lines.
+
+Noisy frames, or a low houghP threshold, can produce hundreds of lines, so these need to scale well.
+The per-line loops these functions used to use are included for comparison.
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# noqa required here as there's no way I can comply with E402.
+from autonopi import cv  # noqa: E402
+
+WIDTH = 640
+COUNTS = [10, 100, 1000, 5000]
+
+
+def loop_split_lines(lines: np.ndarray, width: float, bounds: list[float]) -> tuple[np.ndarray]:
+    """Split lines one at a time, as split_lines used to."""
+    l_bounds = [width * x for x in bounds]
+    r_bounds = [width * (1 - x) for x in bounds]
+
+    l_mask = np.zeros(len(lines), dtype=bool)
+    r_mask = np.zeros(len(lines), dtype=bool)
+
+    for n, line in enumerate(lines):
+        if l_bounds[0] <= line[0] < l_bounds[1]:
+            l_mask[n] = True
+        elif r_bounds[1] < line[0] <= r_bounds[0]:
+            r_mask[n] = True
+
+    return lines[l_mask], lines[r_mask]
+
+
+def loop_arrange_lines(lines: np.ndarray) -> np.ndarray:
+    """Arrange lines one at a time, as arrange_lines used to."""
+    result = lines.copy()
+
+    for line in result:
+        if line[1] > line[3]:
+            line[0], line[1], line[2], line[3] = line[2], line[3], line[0], line[1]
+
+    return result
+
+
+def bench(func: callable, number: int = 20) -> float:
+    """Time a function, returning the best time of a few repeats in milliseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main() -> None:
+    """Run the benchmark, printing a table of timings."""
+    ld = cv.LineDetector(None)
+    rng = np.random.default_rng(0)
+
+    print("{:>6} | {:>12} {:>12} | {:>12} {:>12}".format("lines", "split loop", "split", "arrange loop", "arrange"))
+    for count in COUNTS:
+        lines = rng.integers(0, WIDTH, size=(count, 4), dtype=np.int32)
+
+        times = [bench(lambda: loop_split_lines(lines, WIDTH, [0, 0.4])),
+                 bench(lambda: ld.split_lines(lines, WIDTH, bounds=[0, 0.4])),
+                 bench(lambda: loop_arrange_lines(lines)),
+                 bench(lambda: ld.arrange_lines(lines)),
+                 ]
+
+        print("{:>6} | {:>10.3f}ms {:>10.3f}ms | {:>10.3f}ms {:>10.3f}ms".format(count, *times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark Navigation.floyds with the Python and NumPy engines, against the number of nodes.
+
+Usage: python benchmarks/bench_navigation.py
+
+The Python engine is only timed up to PYTHON_MAX nodes, since it takes minutes beyond that.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# noqa required here as there's no way I can comply with E402.
+from autonopi.navigation import Navigation, Node  # noqa: E402
+
+SIZES = [25, 50, 100, 200, 400, 1000]
+PYTHON_MAX = 200
+
+
+def random_navigation(size: int, engine: str, seed: int = 0) -> Navigation:
+    """Navigation graph of size nodes, with each pair connected with probability 0.1."""
+    rng = random.Random(seed)
+    dists = [[-1] * size for _ in range(size)]
+    for y in range(size):
+        for x in range(y + 1, size):
+            if rng.random() < 0.1:
+                dists[y][x] = dists[x][y] = rng.uniform(1, 20)
+
+    nav = Navigation(engine)
+    for x in range(size):
+        nav.add_node(Node(nav, x))
+    nav.setup_edges(dists)
+
+    return nav
+
+
+def bench(nav: Navigation) -> float:
+    """Time one run of floyds, in seconds."""
+    start = time.perf_counter()
+    nav.floyds()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Time both engines at each size."""
+    print("{:>6} | {:>10} {:>10} | {:>7}".format("nodes", "python", "numpy", "speedup"))
+    for size in SIZES:
+        numpy_s = bench(random_navigation(size, "numpy"))
+
+        if size <= PYTHON_MAX:
+            python_s = bench(random_navigation(size, "python"))
+            print("{:>6} | {:>9.3f}s {:>9.3f}s | {:>6.1f}x".format(size, python_s, numpy_s, python_s / numpy_s))
+        else:
+            print("{:>6} | {:>10} {:>9.3f}s |".format(size, "-", numpy_s))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark the throughput and latency of PipelineRunner with different numbers of worker processes."""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# noqa required here as there's no way I can comply with E402.
+from autonopi import cv, pipeline  # noqa: E402
+
+IMAGE = os.path.join(os.path.dirname(__file__), "../tests/manual_tests/CV_test.jpg")
+PARAMS = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15, "top": 0.35, "bottom": 0.01}
+FRAMES = 200
+
+
+def serial(frame: np.ndarray) -> float:
+    """Process frames one after the other in this process, returning the frame rate."""
+    ld = cv.LineDetector(None)
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        ld.process_frame(frame, **PARAMS)
+
+    return FRAMES / (time.perf_counter() - start)
+
+
+def parallel(frame: np.ndarray, workers: int) -> tuple[float]:
+    """Process frames using a pipeline, keeping it full, returning the frame rate and mean latency in ms."""
+    with pipeline.PipelineRunner(frame.shape, workers=workers, **PARAMS) as runner:
+        submitted = {}
+        latency = 0
+
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            submitted[runner.submit(frame)] = time.perf_counter()
+
+            if runner.pending >= workers:
+                seq, _ = runner.get()
+                latency += time.perf_counter() - submitted.pop(seq)
+
+        while runner.pending > 0:
+            seq, _ = runner.get()
+            latency += time.perf_counter() - submitted.pop(seq)
+
+        return FRAMES / (time.perf_counter() - start), latency / FRAMES * 1000
+
+
+def main() -> None:
+    """Run the benchmark, printing a table of results."""
+    frame = cv2.imread(IMAGE)
+
+    fps = serial(frame)
+    print("{:>8} | {:>8} {:>10}".format("workers", "fps", "latency"))
+    print("{:>8} | {:>8.1f} {:>8.2f}ms".format("serial", fps, 1000 / fps))
+
+    for workers in range(1, os.cpu_count() + 1):
+        print("{:>8} | {:>8.1f} {:>8.2f}ms".format(workers, *parallel(frame, workers)))
+
+
+if __name__ == "__main__":
+    main()
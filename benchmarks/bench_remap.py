@@ -0,0 +1,53 @@
+"""Benchmark correcting a frame with FrameRemap, against running each transform separately.
+
+Usage: python benchmarks/bench_remap.py
+"""
+
+import os
+import sys
+import timeit
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# noqa required here as there's no way I can comply with E402.
+from autonopi.geometry import Calibration, FrameRemap  # noqa: E402
+
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 720)]
+# Trapezium along the lane lines in examples/edukit3.py's view, stretched to a rectangle.
+SRC = [[0.3, 0.35], [0.7, 0.35], [1.0, 0.99], [0.0, 0.99]]
+DST = [[0.2, 0.0], [0.8, 0.0], [0.8, 1.0], [0.2, 1.0]]
+
+
+def main() -> None:
+    """Time both methods at each resolution."""
+    print("{:>10} | {:>10} {:>10} | {:>7}".format("size", "separate", "remap", "speedup"))
+    for width, height in RESOLUTIONS:
+        frame = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+        matrix = np.array([[0.8 * width, 0, width / 2], [0, 0.8 * width, height / 2], [0, 0, 1]])
+        calibration = Calibration(matrix, [-0.25, 0.08, 0, 0], (width, height))
+        remap = FrameRemap(calibration, SRC, DST, cache_dir=None)
+        remap.get_maps(width, height, cv2.ROTATE_180)  # Build before timing.
+
+        # Separate passes, with the undistortion maps built once as the remap's are.
+        undistort = cv2.initUndistortRectifyMap(matrix, calibration.dist_coeffs, None, matrix, (width, height),
+                                                cv2.CV_16SC2)
+        size = np.float32([width, height])
+        warp = cv2.getPerspectiveTransform(np.float32(SRC) * size, np.float32(DST) * size)
+
+        def separate() -> np.ndarray:
+            rotated = cv2.rotate(cv2.remap(frame, *undistort, cv2.INTER_LINEAR), cv2.ROTATE_180)
+            return cv2.warpPerspective(rotated, warp, (width, height))
+
+        n = 200
+        separate_ms = timeit.timeit(separate, number=n) / n * 1000
+        remap_ms = timeit.timeit(lambda: remap.apply(frame, cv2.ROTATE_180), number=n) / n * 1000
+
+        print("{:>10} | {:>8.3f}ms {:>8.3f}ms | {:>6.2f}x".format(
+            "{}x{}".format(width, height), separate_ms, remap_ms, separate_ms / remap_ms))
+
+
+if __name__ == "__main__":
+    main()
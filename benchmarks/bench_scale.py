@@ -0,0 +1,62 @@
+"""Compare the accuracy and speed of LineDetector.process_frame at different processing scales.
+
+Accuracy is measured as the difference in lane angle from processing the full resolution frame, and the number of
+ left and right lines found is shown alongside it. Note CV_test.jpg isn't taken from the vehicle's camera, so the lane
+ fit is poorly conditioned and small changes in the lines found can move the angle a long way.
+"""
+
+import os
+import sys
+import timeit
+from math import degrees, isfinite
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# noqa required here as there's no way I can comply with E402.
+from autonopi import cv  # noqa: E402
+
+IMAGES = [os.path.join(os.path.dirname(__file__), "../tests/manual_tests/CV_test.jpg"),
+          os.path.join(os.path.dirname(__file__), "../tests/manual_tests/CV_test2.jpg"),
+          ]
+PARAMS = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15, "top": 0.5, "bottom": 0.0}
+SCALES = [1.0, 0.5, 0.25]
+
+
+def lane_angle(ld: cv.LineDetector, frame: np.ndarray) -> tuple[float, int, int]:
+    """Find the lane angle in a frame in degrees, and the number of left and right lines it was found from."""
+    lines = ld.process_frame(frame, **PARAMS)
+    left, right = ld.split_lines(lines, frame.shape[1], bounds=[0, 0.5])
+    lane_t, _ = ld.lane_slope(left, right)
+
+    return degrees(lane_t), len(left), len(right)
+
+
+def main() -> None:
+    """Run the comparison, printing a table of results."""
+    print("{:>16} {:>6} | {:>8} {:>10} | {:>9} {:>9} {:>6}".format("image", "scale", "fps", "speedup",
+                                                                   "angle", "error", "lines"))
+    for path in IMAGES:
+        frame = cv2.imread(path)
+
+        reference = None
+        for scale in SCALES:
+            ld = cv.LineDetector(None, scale=scale)
+
+            number = 50
+            fps = number / min(timeit.repeat(lambda: ld.process_frame(frame, **PARAMS), number=number, repeat=5))
+            angle, left, right = lane_angle(ld, frame)
+
+            if reference is None:
+                reference = fps, angle
+
+            error = abs(angle - reference[1]) if isfinite(angle) and isfinite(reference[1]) else float("nan")
+
+            print("{:>16} {:>6} | {:>8.1f} {:>9.2f}x | {:>8.2f}° {:>8.2f}° {:>6}".format(
+                os.path.basename(path), scale, fps, fps / reference[0], angle, error, "{}/{}".format(left, right)))
+
+
+if __name__ == "__main__":
+    main()
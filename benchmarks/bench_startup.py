@@ -0,0 +1,59 @@
+"""Benchmark how long importing each part of autonoPi takes, in a fresh interpreter, using python -X importtime.
+
+Usage: python benchmarks/bench_startup.py [module] [--top N]
+
+Prints the median import time of each module over several runs, and the slowest imports (by their own time, not
+ including what they import) of the given module, autonopi.management by default.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess  # noqa: S404 - Only used to run python -X importtime.
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+MODULES = ["autonopi", "autonopi.management", "autonopi.concurrency", "autonopi.tracing", "autonopi.navigation",
+           "autonopi.cv", "autonopi.simulation", "examples.edukit3"]
+RUNS = 5
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """Import a module in a fresh interpreter, returning (name, self µs, cumulative µs) of everything it imports."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],  # noqa: S603
+                            capture_output=True, text=True, cwd=ROOT, check=True)
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if own.strip().isdigit():  # Skip the header.
+            times.append((name.strip(), int(own), int(cumulative)))
+
+    return times
+
+
+def main() -> None:
+    """Time each module, then break down the given one."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("module", nargs="?", default="autonopi.management", help="Module to break down.")
+    parser.add_argument("--top", type=int, default=10, help="Number of the slowest imports to show.")
+    args = parser.parse_args()
+
+    print("{:>24} | {:>9} | {}".format("module", "import", "heavy dependencies"))
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(RUNS)]
+        total = statistics.median(run[-1][2] for run in runs) / 1000
+        heavy = [name for name in ["cv2", "numpy", "networkx", "asyncio"] if any(t[0] == name for t in runs[0])]
+
+        print("{:>24} | {:>7.1f}ms | {}".format(module, total, " ".join(heavy)))
+
+    print("\nSlowest imports of {}:".format(args.module))
+    for name, own, cumulative in sorted(import_times(args.module), key=lambda t: -t[1])[:args.top]:
+        print("{:>32} | {:>7.1f}ms own | {:>7.1f}ms total".format(name, own / 1000, cumulative / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,30 +10,61 @@ Hardware:
 - Custom 3D printed chassis
 """
 
-from math import floor
+import asyncio
+import time
 
 import cv2
 import numpy as np
 
-from autonopi.cv import LineDetector, camera
+from autonopi.concurrency import AsyncManager
+from autonopi.cv import LineDetector
+from autonopi.hardware.camera import FrameGrabber, open_camera
 from autonopi.hardware.motion.edukit import EduKit3 as EK3Motion
 from autonopi.management import Manager
 from autonopi.navigation import Navigation
+from autonopi.tracking import LaneTracker
+from autonopi.visualisation import Visualiser
 
 
 class EduKit3Manager(Manager):
     """This is the implementation of the management system that will run on this hardware."""
 
-    def __init__(self, vis: bool = False):
+    engine = "hough"  # Lane finding engine, see LineDetector.find_lanes. "windows" skips Canny and Hough.
+    # Undistortion and bird's-eye correction, see autonopi.geometry.FrameRemap. The crop in get_lane_angle is tuned
+    #  for the uncorrected view, so needs changing if this is set.
+    remap = None
+
+    def __init__(self, vis: bool = False, vis_port: int = 8080, vis_host: str = "127.0.0.1"):
         super().__init__()
 
-        self.visualise = vis  # Whether or not to display CV Visualisations.
+        self.visualise = vis  # Whether or not to stream CV Visualisations.
+        self.visualiser = None
+        if vis:
+            self.setup_visualiser(vis_port, vis_host)
 
     def setup_components(self) -> None:
         """Setup the components this implementation uses."""
         self.navigation = Navigation()
-        self.line_detector = LineDetector(camera, rotate=cv2.ROTATE_180)
+        # Capture frames in the background, so the control loop doesn't block on the camera.
+        # The camera is opened when capture starts, see start_capture.
+        self.frame_grabber = FrameGrabber(open_camera(0, buffer_size=1))
+        self.line_detector = LineDetector(self.frame_grabber, rotate=cv2.ROTATE_180, engine=self.engine,
+                                          remap=self.remap)
         self.motion = EK3Motion()
+        # Filters the detected lane over time, and predicts it when the detector is skipped or fails.
+        self.lane_tracker = LaneTracker(interval=2)
+
+    def setup_visualiser(self, port: int, host: str = "127.0.0.1") -> None:
+        """Start streaming CV visualisations, which can be watched at http://<host>:<port>.
+
+        Only served to the vehicle itself by default. Pass host="0.0.0.0" to watch from another machine.
+        """
+        self.visualiser = Visualiser(host=host, port=port)
+        self.visualiser.start()
+
+    def start_capture(self) -> None:
+        """Start capturing frames in the background."""
+        self.frame_grabber.start()
 
     def setup_variables(self) -> None:
         """Setup variables the class will use."""
@@ -41,51 +72,86 @@ class EduKit3Manager(Manager):
         # Equal to 210 degrees hue, halfway between cyan and blue.
         self.target_hue = 105
 
+        # What the last tick saw and did, recorded by the flight recorder if there is one. See telemetry.
+        self.last_tick = {}
+
     def get_lane_angle(self) -> float:
         """Get the angle of the lane in front of the camera.
 
-        Uses the Computer Vision component.
+        Uses the Computer Vision component. The lane tracker decides whether to run the detector on this tick, or
+         predict the lane from previous detections.
         """
+        now = time.monotonic()
+
+        if not self.lane_tracker.should_detect(now):
+            lane_t, lane_c = self.lane_tracker.predict(now)
+            self.last_tick.update(frame_seq=-1, lane_t=lane_t, lane_c=lane_c, left_lines=-1, right_lines=-1)
+            return lane_t
+
+        frame, now, frame_seq = self.capture_frame()
+
+        return self.track_lane(frame, *self.find_lane(frame), now, frame_seq)
+
+    def capture_frame(self) -> tuple[np.ndarray, float, int]:
+        """Fetch a frame from the camera, with the time it was captured and its sequence number.
+
+        The time is the current time, and the sequence number -1, if the camera doesn't give them. They are returned
+         with the frame, rather than read from the line detector later, as the detector may have fetched another frame
+         by the time this one is used.
+        """
+        now = time.monotonic()
+
         frame = self.line_detector.fetch_image()
+        if self.line_detector.frame_time is not None:  # Use the time the frame was captured, if available.
+            now = self.line_detector.frame_time
 
-        mask = self.line_detector.filter_hsv(frame,
-                                             hue=self.target_hue,
-                                             sat=[38, 255],
-                                             val=[38, 255],
-                                             hue_tol=15,
-                                             )
+        frame_seq = self.line_detector.frame_seq if self.line_detector.frame_seq is not None else -1
 
-        edges = self.line_detector.canny(mask)
-        cropped = self.line_detector.v_crop(edges, 0.35, 0.01, True)
-        hough_lines = self.line_detector.houghP(cropped)
+        return frame, now, frame_seq
 
-        if hough_lines is not None:  # Ensure some lines have been detected
-            hough_lines = hough_lines.reshape(1, -1, 4)[0]
-            l_split, r_split = self.line_detector.split_lines(hough_lines, frame.shape[1], bounds=[0, 0.4])
+    def find_lane(self, frame: np.ndarray) -> tuple:
+        """Find the lane lines in a frame.
 
-            lane_t, lane_c = self.line_detector.lane_slope(l_split, r_split)
+        Returns
+        -------
+        np.ndarray, np.ndarray, tuple[float]
+            The left and right lane lines, and the (angle, intercept) of the lane, or None if no lines were found.
+        """
+        l_split, r_split = self.line_detector.find_lanes(frame,
+                                                         hue=self.target_hue,
+                                                         sat=[38, 255],
+                                                         val=[38, 255],
+                                                         hue_tol=15,
+                                                         top=0.35,
+                                                         bottom=0.01,
+                                                         bounds=[0, 0.4],
+                                                         )
 
-            if self.visualise:
-                if len(l_split) > 0:
-                    for x1, y1, x2, y2 in l_split:
-                        cv2.line(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
+        lane = None
+        if len(l_split) > 0 or len(r_split) > 0:  # Ensure some lines have been detected
+            lane = self.line_detector.lane_slope(l_split, r_split)
 
-                if len(r_split) > 0:
-                    for x1, y1, x2, y2 in r_split:
-                        cv2.line(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        return l_split, r_split, lane
 
-                lane_m = 1 / np.tan(lane_t)
-                bottom_x, bottom_y = (frame.shape[0] - lane_c) / lane_m, frame.shape[0]
-                top_x, top_y = - lane_c / lane_m, 0
+    def track_lane(self, frame: np.ndarray, l_split: np.ndarray, r_split: np.ndarray, lane: tuple[float], now: float,
+                   frame_seq: int = -1) -> float:
+        """Update the lane tracker with what find_lane found in a frame, returning the lane angle.
 
-                cv2.line(frame, (floor(bottom_x), bottom_y), (floor(top_x), top_y), (0, 255, 0), 5)
+        now and frame_seq are the frame's capture time and sequence number, as returned with it by capture_frame.
+        """
+        if lane is not None:
+            lane_t, lane_c = self.lane_tracker.update(*lane, now)
         else:
-            lane_t = 0.0
-            l_split, r_split = [], []
+            lane_t, lane_c = self.lane_tracker.miss(now)
 
-        if self.visualise:
-            cv2.imshow("CV Visualisation", frame)
-            cv2.waitKey(20)
+        if self.visualiser is not None:  # Drawn and streamed in the visualiser's thread, see setup_visualiser.
+            self.visualiser.submit(frame, l_split, r_split, lane)
+
+        self.last_tick.update(frame_seq=frame_seq, lane_t=lane_t, lane_c=lane_c, left_lines=len(l_split),
+                              right_lines=len(r_split))
+
+        if lane_t is None:  # Lane lost for longer than the tracker can cover.
+            lane_t = 0.0
 
         return lane_t
 
@@ -107,10 +173,127 @@ class EduKit3Manager(Manager):
         angle = self.get_lane_angle()
         steering = self.angle_to_steering(angle)
 
+        self.motion.command(0.3, steering)
         self.motion.start_move()
-        self.motion.power = 0.3
-        self.motion.direction = steering
+        self.last_tick.update(steering=steering, power=0.3)
+
+    def telemetry(self) -> dict:
+        """What the last tick saw and did."""
+        return self.last_tick
+
+    def degrade(self) -> None:
+        """Switch to the cheaper sliding window engine, since the loop can't keep up."""
+        self.line_detector.engine = "windows"
+
+    def recover(self) -> None:
+        """Switch back to the usual engine."""
+        self.line_detector.engine = self.engine
 
     def exit(self) -> None:
         """Ran when the program exists to ensure vehicle is stopped."""
         self.motion.stop_move()
+        self.frame_grabber.stop()
+
+        if self.visualiser is not None:
+            self.visualiser.stop()
+
+
+class AsyncEduKit3Manager(EduKit3Manager, AsyncManager):
+    """EduKit3Manager, with capture, lane finding, driving and navigation run concurrently. See AsyncManager.
+
+    Frames flow from capture to detect to drive through bounded queues, so the camera, the CV system and the motors
+     all work at the same time, and the CV runs in the executor while the next frame is being captured.
+    """
+
+    def components(self) -> list:
+        """Create the queues between the components, and the components themselves."""
+        self.frames = asyncio.Queue(self.queue_size)  # (frame, capture time, sequence number)
+        self.angles = asyncio.Queue(self.queue_size)  # Lane angles
+
+        return [self.capture(), self.detect(), self.drive(), self.navigate()]
+
+    async def capture(self) -> None:
+        """Fetch frames from the camera, waiting while detect is behind."""
+        while True:
+            await self.frames.put(await self.offload(self.capture_frame))
+
+    async def detect(self) -> None:
+        """Find the lane in each frame. The lane tracker is only used from the event loop, so needs no lock."""
+        while True:
+            frame, now, frame_seq = await self.frames.get()
+            found = await self.offload(self.find_lane, frame)
+            await self.angles.put(self.track_lane(frame, *found, now, frame_seq))
+
+    async def drive(self) -> None:
+        """Steer along each lane angle found. This is the main component, which runs once per tick."""
+        while await self.tick():
+            start = time.monotonic()
+            angle = await self.angles.get()
+            steering = self.angle_to_steering(angle)
+
+            self.motion.command(0.3, steering)
+            self.motion.start_move()
+            self.last_tick.update(steering=steering, power=0.3)
+
+            if self.recorder is not None:
+                self.record_tick(start)
+
+    async def navigate(self) -> None:
+        """Recalculate the shortest routes when the navigation graph changes."""
+        while True:
+            if len(self.navigation.nodes) > 0 and not self.navigation.routes_current:
+                await self.offload(self.navigation.floyds)
+
+            await asyncio.sleep(1.0)
+
+
+class MultiRateEduKit3Manager(EduKit3Manager, AsyncManager):
+    """EduKit3Manager, with each component run at its own rate. See AsyncManager.
+
+    The motors are updated at 100Hz, lanes are found at 30Hz, and routes are planned once a second, or as soon as the
+     destination changes. Components share their newest results through the blackboard:
+    - "lane_angle": the lane angle from detect, timestamped with its frame's capture time.
+    - "steering": the steering amount sent to the motors by drive.
+    - "destination": the (start, end) nodes to plan a route between, see set_destination.
+    - "route": the list of nodes from plan.
+    """
+
+    rates = {"drive": 100.0, "detect": 30.0, "plan": 1.0}
+    lane_timeout = 0.5  # Seconds after which a lane angle is too old to steer by. The motion watchdog then stops.
+
+    def detect(self) -> None:
+        """Find the lane in the newest frame."""
+        frame, now, frame_seq = self.capture_frame()
+        angle = self.track_lane(frame, *self.find_lane(frame), now, frame_seq)
+
+        self.blackboard.set("lane_angle", angle, now)
+
+    def drive(self) -> None:
+        """Steer along the newest lane angle."""
+        angle = self.blackboard.get("lane_angle", max_age=self.lane_timeout)
+        if angle is None:
+            return
+
+        steering = self.angle_to_steering(angle)
+        self.blackboard.set("steering", steering)
+
+        self.motion.command(0.3, steering)
+        self.motion.start_move()
+        self.last_tick.update(steering=steering, power=0.3)
+
+    def plan(self) -> None:
+        """Recalculate the shortest routes if the graph has changed, and the route to the destination."""
+        if len(self.navigation.nodes) == 0:
+            return
+
+        if not self.navigation.routes_current:
+            self.navigation.floyds()
+
+        destination = self.blackboard.get("destination")
+        if destination is not None:
+            self.blackboard.set("route", self.navigation.shortest_path(*destination))
+
+    def set_destination(self, start: int, end: int) -> None:
+        """Plan a route between two navigation nodes, straight away rather than at plan's next deadline."""
+        self.blackboard.set("destination", (start, end))
+        self.request("plan")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+"""Record footage from the camera, for replaying through the CV system later.
+
+Usage: python examples/record_camera.py <path> [seconds]
+
+The recording can be replayed with autonopi.hardware.camera.recording.ReplayCapture, which can be passed to
+ LineDetector in place of a camera.
+"""
+
+import sys
+import time
+
+from autonopi.hardware.camera import open_camera
+from autonopi.hardware.camera.recording import FrameRecorder
+
+
+def main(path: str, seconds: float = 30) -> None:
+    """Record from the camera for the given number of seconds."""
+    recorder = FrameRecorder(open_camera(), path)
+
+    end = time.monotonic() + seconds
+    try:
+        while time.monotonic() < end:
+            ret, frame = recorder.read()
+            if not ret:
+                raise ValueError("Frame not Available.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.release()
+
+    print("Recorded {} frames of {} to {}".format(recorder.count, recorder.shape, path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    main(sys.argv[1], *[float(x) for x in sys.argv[2:3]])
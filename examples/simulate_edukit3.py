@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""Run the EduKit3 implementation in the simulator, with no Raspberry Pi, camera or motors.
+
+Usage: python -m examples.simulate_edukit3 [ticks] [--trace trace.json] [--period seconds] [--policy skip]
+                                           [--async] [--multirate] [--record flight.bin]
+
+Prints the loop rate, motion statistics, control latency and lane keeping error at the end of the run. If a trace path
+ is given, the run is traced and saved in the Chrome trace format, which can be opened in https://ui.perfetto.dev. If
+ a period is given, the loop is run at that rate, see Manager.mainloop, and its scheduling statistics are printed.
+ With --async, capture, lane finding and driving run concurrently, see AsyncEduKit3Manager, and with --multirate
+ each runs at its own rate, see MultiRateEduKit3Manager. With --record, each tick is recorded by a FlightRecorder,
+ which can be loaded with autonopi.telemetry.read_flight_log.
+"""
+
+import argparse
+import time
+
+from autonopi.cv import LineDetector
+from autonopi.hardware.camera import FrameGrabber
+from autonopi.navigation import Navigation
+from autonopi.simulation import Simulator
+from autonopi.telemetry import FlightRecorder, read_flight_log
+from autonopi.tracing import tracer
+from autonopi.tracking import LaneTracker
+from examples.edukit3 import (AsyncEduKit3Manager, EduKit3Manager,
+                              MultiRateEduKit3Manager)
+
+
+class SimulatedEduKit3Manager(EduKit3Manager):
+    """EduKit3Manager, with the hardware replaced by the simulator."""
+
+    def setup_components(self) -> None:
+        """Setup the same components as EduKit3Manager, using the simulated camera and motion."""
+        self.simulator = Simulator()
+
+        self.navigation = Navigation()
+        self.frame_grabber = FrameGrabber(self.simulator.camera)
+        # The simulated camera isn't mounted upside down, so there is no need to rotate it.
+        self.line_detector = LineDetector(self.frame_grabber, engine=self.engine)
+        self.motion = self.simulator.motion
+        self.lane_tracker = LaneTracker(interval=2)
+
+
+class SimulatedAsyncEduKit3Manager(SimulatedEduKit3Manager, AsyncEduKit3Manager):
+    """AsyncEduKit3Manager, with the hardware replaced by the simulator."""
+
+    pass
+
+
+class SimulatedMultiRateEduKit3Manager(SimulatedEduKit3Manager, MultiRateEduKit3Manager):
+    """MultiRateEduKit3Manager, with the hardware replaced by the simulator."""
+
+    pass
+
+
+def main(ticks: int = 1000,
+         trace: str = None,
+         period: float = None,
+         policy: str = "skip",
+         concurrent: bool = False,
+         multirate: bool = False,
+         record: str = None,
+         ) -> None:
+    """Run the simulation for a number of ticks, and print its statistics. If trace is given, save a trace there.
+
+    If concurrent, the components are run concurrently by AsyncEduKit3Manager. If multirate, each component is run at
+     its own rate by MultiRateEduKit3Manager, and ticks counts motor updates. If record is given, each tick is
+     recorded there by a FlightRecorder.
+    """
+    if trace is not None:
+        tracer.enable()
+
+    if multirate:
+        manager = SimulatedMultiRateEduKit3Manager()
+    elif concurrent:
+        manager = SimulatedAsyncEduKit3Manager()
+    else:
+        manager = SimulatedEduKit3Manager()
+
+    recorder = FlightRecorder(record) if record is not None else None
+
+    start = time.monotonic()
+    manager.mainloop(ticks, period, policy, recorder)
+    duration = time.monotonic() - start
+
+    if manager.scheduler is not None:
+        schedule = manager.scheduler.stats()
+        print("Schedule: {} overruns, {} skipped, jitter mean {:.2f}ms, p99 {:.2f}ms, {:.0%} utilisation{}".format(
+            schedule["overruns"], schedule["skipped"], schedule["mean_jitter"] * 1000,
+            schedule["p99_jitter"] * 1000, schedule["utilisation"], ", degraded" if schedule["degraded"] else ""))
+
+    stats = manager.simulator.stats()
+    print("Loop rate: {:.1f}Hz, camera: {:.1f}fps".format(ticks / duration, stats["frame_rate"]))
+    motion = manager.motion.stats()
+    print("Motion: {:.1f} moves per second, command to move latency mean {:.2f}ms, {} watchdog stops".format(
+        motion["move_rate"], motion["mean_latency"] * 1000, motion["watchdog_stops"]))
+    print("Control latency: mean {:.1f}ms, max {:.1f}ms".format(
+        stats["mean_latency"] * 1000, stats["max_latency"] * 1000))
+    print("Lane error: mean {:.3f}m, RMS {:.3f}m, max {:.3f}m over {:.2f}m".format(
+        stats["mean_error"], stats["rms_error"], stats["max_error"], stats["distance"]))
+
+    if recorder is not None:
+        recorder.close()
+        records = read_flight_log(record)
+        print("Saved {} ticks to {}, taking mean {:.2f}ms, max {:.2f}ms".format(
+            len(records), record, records["duration"].mean() * 1000, records["duration"].max() * 1000))
+
+    if trace is not None:
+        tracer.export(trace)
+        print("Saved trace to {}".format(trace))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("ticks", type=int, nargs="?", default=1000, help="Number of times to run the loop.")
+    parser.add_argument("--trace", help="File to save a trace of the run to.")
+    parser.add_argument("--period", type=float, help="Seconds between ticks. By default, ticks run back to back.")
+    parser.add_argument("--policy", default="skip", help="What to do when a tick overruns: skip, catchup or degrade.")
+    parser.add_argument("--async", dest="concurrent", action="store_true",
+                        help="Run the components concurrently, with AsyncEduKit3Manager.")
+    parser.add_argument("--multirate", action="store_true",
+                        help="Run each component at its own rate, with MultiRateEduKit3Manager.")
+    parser.add_argument("--record", help="File to record each tick to, with a FlightRecorder.")
+    args = parser.parse_args()
+
+    main(args.ticks, args.trace, args.period, args.policy, args.concurrent, args.multirate, args.record)
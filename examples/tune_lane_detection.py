@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""Tune the lane detection parameters used by edukit3.py, on images or recordings from the vehicle's camera.
+
+Usage: python -m examples.tune_lane_detection <frames...> [--labels labels.json] [--samples N] [--workers N]
+                                                           [--output tuning.json]
+
+Labels are a JSON list of the true lane angle of each frame in radians, with null for frames without one. Prints the
+ Pareto set of configurations, cheapest first, and saves every result as JSON.
+"""
+
+import argparse
+import json
+from math import degrees
+
+from autonopi.tuning import tune
+
+
+def main() -> None:
+    """Run the tuning, printing the Pareto set and saving the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("frames", nargs="+", help="Images, or recordings made with FrameRecorder.")
+    parser.add_argument("--labels", help="JSON list of lane angles. Defaults to those from the current parameters.")
+    parser.add_argument("--samples", type=int, default=200, help="Number of configurations to try.")
+    parser.add_argument("--workers", type=int, help="Number of processes. Defaults to the number of CPUs.")
+    parser.add_argument("--output", default="tuning.json", help="File to save the results to.")
+    args = parser.parse_args()
+
+    labels = None
+    if args.labels is not None:
+        with open(args.labels) as f:
+            labels = json.load(f)
+
+    results = tune(args.frames, labels, samples=args.samples, workers=args.workers)
+
+    baseline = results["baseline"]
+    print("Baseline: error {:.2f}°, {} misses, {:.3f}ms per frame, over {} frames".format(
+        degrees(baseline["error"]), baseline["misses"], baseline["cost"], results["frames"]))
+    print("{:>9} {:>7} {:>9} | {}".format("error", "misses", "cost", "configuration"))
+    for result in results["pareto"]:
+        print("{:>8.2f}° {:>7} {:>7.3f}ms | {}".format(
+            degrees(result["error"]), result["misses"], result["cost"],
+            " ".join("{}={}".format(*item) for item in result["config"].items())))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print("Saved results to {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
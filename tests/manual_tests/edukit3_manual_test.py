@@ -1,3 +1,10 @@
+"""Run the EduKit3 implementation on the vehicle, streaming CV visualisations.
+
+Usage: python tests/manual_tests/edukit3_manual_test.py [host]
+
+The stream is served on host, 127.0.0.1 by default. Pass 0.0.0.0 to watch it from another machine.
+"""
+
 import os
 import sys
 
@@ -5,6 +12,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 import examples.edukit3 as ek3  # noqa: E402
 
-m = ek3.EduKit3Manager(vis=True)
+host = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+
+m = ek3.EduKit3Manager(vis=True, vis_host=host)
 m.motion.pol = [True, True]
-m.mainloop()
+m.mainloop(period=1 / 30, policy="degrade")
@@ -0,0 +1,55 @@
+"""Test blackboard.py."""
+
+import threading as thr
+import time
+import unittest
+
+from autonopi.blackboard import Blackboard
+
+
+class TestBlackboard(unittest.TestCase):
+    """Test the Blackboard class."""
+
+    def test_values(self) -> None:
+        """Test reading and writing values, their timestamps, sequence numbers and ages."""
+        # Setup
+        blackboard = Blackboard()
+
+        # Code to Test
+        empty = blackboard.read("lane_angle")
+        blackboard.set("lane_angle", 0.1)
+        seq = blackboard.set("lane_angle", 0.2, time.monotonic() - 1.0)
+        blackboard.set("steering", -0.5)
+
+        # Testing
+        self.assertEqual(empty, (None, None, 0))
+        self.assertEqual(seq, 2)
+        self.assertEqual(blackboard.read("lane_angle")[2], 2)
+        self.assertEqual(blackboard.get("lane_angle"), 0.2)
+        self.assertIsNone(blackboard.get("lane_angle", max_age=0.5))  # Too old.
+        self.assertEqual(blackboard.get("route", default=[]), [])
+        self.assertEqual(blackboard.snapshot(), {"lane_angle": 0.2, "steering": -0.5})
+
+    def test_threads(self) -> None:
+        """Test that writes from several threads are all counted."""
+        # Setup
+        blackboard = Blackboard()
+
+        def write() -> None:
+            for n in range(1000):
+                blackboard.set("count", n)
+
+        threads = [thr.Thread(target=write) for _ in range(4)]
+
+        # Code to Test
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Testing
+        self.assertEqual(blackboard.read("count")[2], 4000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+"""Test hardware/camera."""
+
+import os
+import tempfile
+import threading as thr
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from autonopi import cv
+from autonopi.hardware import camera
+from autonopi.hardware.camera import recording
+
+
+class FakeCamera:
+    """Stand-in for cv2.VideoCapture, producing numbered frames."""
+
+    def __init__(self, delay: float = 0.001):
+        self.delay = delay
+        self.count = 0
+
+    def read(self) -> tuple[bool, np.ndarray]:
+        """Produce a frame filled with the number of frames read so far."""
+        time.sleep(self.delay)
+        frame = np.full((4, 4), self.count % 256, dtype=np.uint8)
+        self.count += 1
+        return True, frame
+
+    def release(self) -> None:
+        """Nothing to release."""
+        pass
+
+
+class FailingCamera(FakeCamera):
+    """FakeCamera which fails a number of reads before producing frames, like a camera which won't open at first."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.reads = 0
+
+    def read(self) -> tuple[bool, np.ndarray]:
+        """Fail, until the given number of reads have failed."""
+        self.reads += 1
+        if self.reads <= self.failures:
+            return False, None
+
+        return super().read()
+
+
+class TestCameraSource(unittest.TestCase):
+    """Test the CameraSource class and its registry."""
+
+    def test_open_camera(self) -> None:
+        """Test that sources are shared between users with the same settings, and not opened until read."""
+        # Setup
+        missing = 99  # Device index which doesn't exist.
+
+        # Code to Test
+        source = camera.open_camera(missing, width=320, height=240)
+        same = camera.open_camera(missing, width=320, height=240)
+        other = camera.open_camera(missing, width=640, height=480)
+        opened_early = source.capture is not None
+
+        ret, frame = source.read()
+
+        # Testing
+        self.assertIs(source, same)
+        self.assertIsNot(source, other)
+        self.assertEqual(source.key, (missing, cv2.CAP_ANY, 320, 240, None, None))
+        self.assertFalse(opened_early)
+        self.assertIs(cv.camera, camera.open_camera())  # Old module level camera, now from the registry.
+
+        self.assertFalse(ret)  # Device doesn't exist, so reading fails rather than raising.
+        self.assertIsNone(frame)
+        self.assertFalse(source.isOpened())
+        self.assertIsNone(source.capture)  # A failed open isn't kept, so it is tried again on the next read.
+        self.assertIsNotNone(source.open_time)
+
+        camera.release_cameras()
+        self.assertIsNone(source.capture)
+
+    def test_release_while_reading(self) -> None:
+        """Test that releasing a source waits for a read already under way, rather than closing the device under it."""
+        # Setup
+        source = camera.CameraSource(99)
+        source.capture = FakeCamera(delay=0.1)  # As if opened.
+        source.capture.isOpened = lambda: True
+        reads = []
+
+        def read() -> None:
+            reads.append((*source.read(), time.monotonic()))
+
+        # Code to Test
+        reader = thr.Thread(target=read)
+        reader.start()
+        time.sleep(0.05)  # Part way through the read.
+        source.release()
+        released = time.monotonic()
+        reader.join()
+
+        # Testing
+        ret, frame, read_time = reads[0]
+        self.assertTrue(ret)
+        self.assertLessEqual(read_time, released)  # The read finished before the release.
+        self.assertIsNone(source.capture)
+
+
+class TestFrameGrabber(unittest.TestCase):
+    """Test the FrameGrabber class."""
+
+    def test_read_latest(self) -> None:
+        """Test that frames are handed out newest first, in order, and that skipped frames are counted."""
+        # Setup
+        grabber = camera.FrameGrabber(FakeCamera())
+        grabber.start()
+
+        # Code to Test
+        seqs = []
+        for _ in range(5):
+            frame, timestamp, seq = grabber.read_latest()
+            seqs.append(seq)
+            time.sleep(0.01)  # Let the capture thread get ahead, so frames are dropped.
+
+        grabber.release()
+
+        # Testing
+        self.assertEqual(seqs, sorted(set(seqs)))  # Strictly increasing, so no frame is handed out twice.
+        self.assertGreater(grabber.dropped, 0)
+        self.assertEqual(grabber.dropped, seqs[-1] + 1 - len(seqs))
+        self.assertEqual(frame[0, 0], seq % 256)  # Frame matches its sequence number.
+
+    def test_read_stopped(self) -> None:
+        """Test that reading from a grabber which isn't running fails, rather than blocking."""
+        # Setup
+        grabber = camera.FrameGrabber(FakeCamera())
+
+        # Code to Test
+        ret, frame = grabber.read()
+
+        # Testing
+        self.assertFalse(ret)
+        self.assertIsNone(frame)
+
+    def test_backoff(self) -> None:
+        """Test that a camera which fails is retried with a growing delay, rather than constantly, until it works."""
+        # Setup
+        failing = camera.FrameGrabber(FailingCamera(1000), max_backoff=0.1)
+        recovering = camera.FrameGrabber(FailingCamera(3))
+        recovering.min_backoff = recovering.backoff = 0.01
+
+        # Code to Test
+        failing.start()
+        recovering.start()
+        ret, frame = recovering.read()
+        time.sleep(0.5)
+        failing.stop()
+        recovering.stop()
+
+        # Testing
+        # Waits of 1/30, 1/15, then 0.1s, so about 7 reads in 0.5s, rather than one every millisecond.
+        self.assertGreaterEqual(failing.cam.reads, 2)
+        self.assertLess(failing.cam.reads, 20)
+        self.assertEqual(failing.failures, failing.cam.reads)
+        self.assertEqual(failing.backoff, 0.1)
+
+        self.assertTrue(ret)
+        self.assertEqual(recovering.failures, 3)
+        self.assertEqual(recovering.backoff, 0.01)  # Reset once a frame was read.
+
+    def test_restart(self) -> None:
+        """Test that a grabber can be started again after it has been stopped."""
+        # Setup
+        grabber = camera.FrameGrabber(FakeCamera())
+        grabber.start()
+        _, _, first = grabber.read_latest()
+        grabber.stop()
+        stopped = not grabber.capture_thread.is_alive()
+
+        # Code to Test
+        grabber.start()
+        frame, _, seq = grabber.read_latest()
+        grabber.release()
+
+        # Testing
+        self.assertTrue(stopped)
+        self.assertIsNotNone(frame)
+        self.assertGreater(seq, first)  # Sequence numbers carry on from before the restart.
+        self.assertFalse(grabber.capture_thread.is_alive())
+
+
+class TestRecording(unittest.TestCase):
+    """Test the FrameRecorder and ReplayCapture classes."""
+
+    def setUp(self) -> None:
+        """Create a directory for recordings."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "recording.frames")
+
+    def tearDown(self) -> None:
+        """Delete the recordings."""
+        self.directory.cleanup()
+
+    def test_replay(self) -> None:
+        """Test that frames are replayed as recorded, and the end of the recording is handled."""
+        # Setup
+        recorder = recording.FrameRecorder(FakeCamera(0), self.path)
+        recorded = [recorder.read()[1] for _ in range(5)]
+        recorder.release()
+
+        # Code to Test
+        replay = recording.ReplayCapture(self.path)
+        replayed = [replay.read() for _ in range(6)]
+
+        looped = recording.ReplayCapture(self.path, loop=True)
+        looped_frames = [looped.read()[1] for _ in range(7)]
+
+        # Testing
+        self.assertEqual(len(replay), 5)
+        for (ret, frame), expected in zip(replayed, recorded):
+            self.assertTrue(ret)
+            np.testing.assert_array_equal(frame, expected)
+
+        self.assertEqual(replayed[-1], (False, None))
+        np.testing.assert_array_equal(looped_frames[5], recorded[0])
+
+    def test_realtime(self) -> None:
+        """Test that realtime replay keeps the recorded frame timing."""
+        # Setup
+        recorder = recording.FrameRecorder(None, self.path)
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        for n in range(4):
+            recorder.record(frame, 10.0 + 0.05 * n)
+        recorder.close()
+        recorder.close()  # Closing again does nothing.
+
+        self.assertRaises(ValueError, recorder.record, np.zeros((2, 2, 3), dtype=np.uint8))
+        with self.assertRaisesRegex(ValueError, "closed"):
+            recorder.record(frame)  # The recording isn't reopened and overwritten.
+
+        # Code to Test
+        replay = recording.ReplayCapture(self.path, realtime=True)
+        start = time.monotonic()
+        while replay.read()[0]:
+            pass
+        duration = time.monotonic() - start
+
+        # Testing
+        np.testing.assert_allclose(replay.timestamps, [10.0, 10.05, 10.1, 10.15])
+        self.assertIsNone(recorder.frames_file)
+        self.assertGreaterEqual(duration, 0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
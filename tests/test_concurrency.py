@@ -0,0 +1,208 @@
+"""Test concurrency.py."""
+
+import asyncio
+import threading as thr
+import time
+import unittest
+
+from autonopi.concurrency import AsyncManager
+
+
+class CountingAsyncManager(AsyncManager):
+    """AsyncManager with no components, which counts how many times it is run, and records the thread it is run in."""
+
+    def setup_components(self) -> None:
+        """No components needed."""
+        pass
+
+    def setup_variables(self) -> None:
+        """Setup counters."""
+        self.runs = 0
+        self.thread = None
+        self.exited = False
+
+    def run(self) -> None:
+        """Count the run, and record its thread."""
+        self.runs += 1
+        self.thread = thr.current_thread()
+
+    def exit(self) -> None:
+        """Record the exit."""
+        self.exited = True
+
+
+class PipelineManager(AsyncManager):
+    """AsyncManager with a fast producer and a slow consumer, connected by a bounded queue."""
+
+    queue_size = 1
+
+    def setup_components(self) -> None:
+        """No components needed."""
+        pass
+
+    def setup_variables(self) -> None:
+        """Setup counters."""
+        self.produced = 0
+        self.consumed = []
+        self.max_ahead = 0  # Most items produced but not yet consumed.
+        self.exited = False
+
+    def components(self) -> list:
+        """Create the queue and components."""
+        self.items = asyncio.Queue(self.queue_size)
+        return [self.produce(), self.consume()]
+
+    async def produce(self) -> None:
+        """Produce items as fast as the queue allows."""
+        while True:
+            await self.items.put(self.produced)
+            self.produced += 1
+            self.max_ahead = max(self.max_ahead, self.produced - len(self.consumed))
+
+    async def consume(self) -> None:
+        """Consume an item each tick, slowly, in the executor."""
+        while await self.tick():
+            item = await self.items.get()
+            await self.offload(time.sleep, 0.005)
+            if item == 3:
+                raise ValueError("Test error")
+            self.consumed.append(item)
+
+    def exit(self) -> None:
+        """Record the exit."""
+        self.exited = True
+
+
+class ShutdownManager(AsyncManager):
+    """AsyncManager with a component which fails while another's offloaded call is still running."""
+
+    def setup_components(self) -> None:
+        """No components needed."""
+        pass
+
+    def setup_variables(self) -> None:
+        """Setup the record of events."""
+        self.events = []
+
+    def components(self) -> list:
+        """The failing and slow components."""
+        return [self.fail(), self.slow()]
+
+    async def fail(self) -> None:
+        """Raise an error once slow's call has started."""
+        await asyncio.sleep(0.05)
+        raise ValueError("Test error")
+
+    async def slow(self) -> None:
+        """Offload a call which outlasts the other component."""
+        await self.offload(self.drive)
+
+    def drive(self) -> None:
+        """Blocking call, standing in for one which commands the motors."""
+        time.sleep(0.2)
+        self.events.append("drive")
+
+    def exit(self) -> None:
+        """Record the exit."""
+        self.events.append("exit")
+
+
+class MultiRateManager(AsyncManager):
+    """AsyncManager with a fast and a slow component, sharing values through the blackboard."""
+
+    rates = {"fast": 20.0, "slow": 4.0}
+
+    def setup_components(self) -> None:
+        """No components needed."""
+        pass
+
+    def setup_variables(self) -> None:
+        """Setup counters."""
+        self.fast_runs = 0
+        self.slow_runs = 0
+        self.seen = set()  # Values of "slow" seen by fast.
+
+    def fast(self) -> None:
+        """Count the run, and read the slow component's newest value."""
+        self.fast_runs += 1
+        self.seen.add(self.blackboard.get("slow"))
+
+        if self.fast_runs == 10:
+            self.request("slow")
+
+    def slow(self) -> None:
+        """Count the run, taking longer than the fast component's period."""
+        self.slow_runs += 1
+        time.sleep(0.1)
+        self.blackboard.set("slow", self.slow_runs)
+
+
+class TestAsyncManager(unittest.TestCase):
+    """Test the AsyncManager class."""
+
+    def test_mainloop_ticks(self) -> None:
+        """Test that by default, run is run in the executor for a fixed number of ticks."""
+        # Setup
+        manager = CountingAsyncManager()
+
+        # Code to Test
+        manager.mainloop(25, period=0.002)
+
+        # Testing
+        self.assertEqual(manager.runs, 25)
+        self.assertTrue(manager.exited)
+        self.assertIsNot(manager.thread, thr.main_thread())
+        self.assertEqual(manager.scheduler.stats()["ticks"], 25)
+
+    def test_backpressure(self) -> None:
+        """Test that a full queue holds back the component putting into it, and that errors are reraised."""
+        # Setup
+        manager = PipelineManager()
+
+        # Code to Test
+        manager.mainloop(3)
+        produced = manager.produced
+
+        manager.setup_variables()
+        with self.assertRaises(ValueError):
+            manager.mainloop(10)
+
+        # Testing
+        self.assertEqual(manager.consumed, [0, 1, 2])
+        self.assertLessEqual(produced, 3 + manager.queue_size + 1)  # The queue, plus the one waiting to be put.
+        self.assertLessEqual(manager.max_ahead, manager.queue_size + 2)  # Plus the one being consumed.
+        self.assertTrue(manager.exited)
+
+    def test_shutdown(self) -> None:
+        """Test that calls already running in the executor finish before the system is exited."""
+        # Setup
+        manager = ShutdownManager()
+
+        # Code to Test
+        with self.assertRaises(ValueError):
+            manager.mainloop()
+
+        # Testing
+        self.assertEqual(manager.events, ["drive", "exit"])
+
+    def test_rates(self) -> None:
+        """Test that components run at their own rates, and a slow component doesn't hold up a fast one."""
+        # Setup
+        manager = MultiRateManager()
+
+        # Code to Test
+        manager.mainloop(20)  # 1s of the fast component.
+
+        # Testing
+        self.assertEqual(manager.fast_runs, 20)
+        self.assertAlmostEqual(manager.scheduler.period, 1 / 20)
+        # At least its first run and the one requested, but fewer than the fast component.
+        self.assertGreaterEqual(manager.slow_runs, 2)
+        self.assertLess(manager.slow_runs, manager.fast_runs)
+        # The fast component saw nothing, then the slow component's values as they were written.
+        self.assertIn(None, manager.seen)
+        self.assertGreater(len(manager.seen), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+"""Test cv.py."""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from autonopi import cv
+
+
+def lane_frame(width: int = 320, height: int = 240) -> np.ndarray:
+    """Draw a synthetic frame, containing two blue lane lines on a grey background, converging towards the top."""
+    frame = np.full((height, width, 3), 90, dtype=np.uint8)
+    colour = cv2.cvtColor(np.array([[[105, 255, 255]]], dtype=np.uint8), cv2.COLOR_HSV2BGR)[0, 0].tolist()
+
+    cv2.line(frame, (width // 10, height - 1), (width * 2 // 5, height // 3), colour, max(2, width // 40))
+    cv2.line(frame, (width * 9 // 10, height - 1), (width * 3 // 5, height // 3), colour, max(2, width // 40))
+
+    return frame
+
+
+class TestLineDetector(unittest.TestCase):
+    """Test the LineDetector class."""
+
+    def test_process_frame(self) -> None:
+        """Test the fused pipeline matches running each stage separately."""
+        # Setup
+        ld = cv.LineDetector(None)
+        frame = lane_frame()
+        params = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15}
+        top_pix, bottom_pix = ld.crop_rows(frame.shape[0], 0.35, 0.01)
+
+        mask = ld.filter_hsv(frame, **params)
+        edges = ld.v_crop(ld.canny(mask), 0.35, 0.01, True)
+
+        # Code to Test
+        lines = ld.process_frame(frame, top=0.35, bottom=0.01, **params)
+        buffer = ld.buffers["edges0"]
+        ld.process_frame(frame, top=0.35, bottom=0.01, **params)
+
+        # Testing
+        # Edges should be identical, apart from the rows on the border of the crop.
+        np.testing.assert_array_equal(ld.buffers["edges0"][1:-1], edges[top_pix + 1:bottom_pix - 1])
+        self.assertIs(ld.buffers["edges0"], buffer)  # Buffers are reused between frames.
+
+        self.assertEqual(lines.shape[1], 4)
+        self.assertGreater(len(lines), 0)
+        self.assertTrue(np.all((lines[:, 1::2] >= top_pix) & (lines[:, 1::2] < bottom_pix)))  # Frame coordinates
+
+    def test_process_frame_scaled(self) -> None:
+        """Test that processing a downscaled frame finds the same lane, in full frame coordinates."""
+        # Setup
+        frame = lane_frame(640, 480)
+        params = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15, "top": 0.6, "bottom": 0.01}
+        thetas = []
+
+        # Code to Test
+        for scale in [1.0, 0.5, 0.25]:
+            ld = cv.LineDetector(None, scale=scale)
+            lines = ld.process_frame(frame, **params)
+            thetas.append(ld.lane_slope(*ld.split_lines(lines, frame.shape[1], bounds=[0, 0.5]))[0])
+
+            # Testing
+            self.assertGreater(len(lines), 0)
+            self.assertTrue(np.all((lines[:, 0::2] >= 0) & (lines[:, 0::2] < 640)))
+            self.assertTrue(np.all((lines[:, 1::2] >= 191) & (lines[:, 1::2] < 476)))
+
+        self.assertAlmostEqual(thetas[1], thetas[0], delta=0.05)
+        self.assertAlmostEqual(thetas[2], thetas[0], delta=0.05)
+
+    def test_filter_hsv_wrap(self) -> None:
+        """Test that the range of hues wraps around past 0/180."""
+        # Setup
+        ld = cv.LineDetector(None)
+        hues = np.array([[[175, 200, 200], [0, 200, 200], [15, 200, 200], [30, 200, 200], [90, 200, 200]]],
+                        dtype=np.uint8)
+        frame = cv2.cvtColor(hues, cv2.COLOR_HSV2BGR)
+
+        # Code to Test
+        mask = ld.filter_hsv(frame, hue=5, sat=[38, 255], val=[38, 255], hue_tol=15)
+        mask_high = ld.filter_hsv(frame, hue=175, sat=[38, 255], val=[38, 255], hue_tol=15)
+        mask_all = ld.filter_hsv(frame, hue=0, sat=[38, 255], val=[38, 255], hue_tol=90)
+
+        # Testing
+        self.assertEqual(mask[0].tolist(), [255, 255, 255, 0, 0])
+        self.assertEqual(mask_high[0].tolist(), [255, 255, 0, 0, 0])
+        self.assertEqual(mask_all[0].tolist(), [255] * 5)
+
+    def test_filter_hsv_lut(self) -> None:
+        """Test that filtering with a lookup table closely matches converting to HSV, and that tables are cached."""
+        # Setup
+        ld = cv.LineDetector(None)
+        frame = cv2.GaussianBlur(lane_frame(), (9, 9), 0)  # Blur, so there are colours near the edge of the range.
+        params = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15}
+
+        # Code to Test
+        mask = ld.filter_hsv(frame, **params)
+        lut_mask = ld.filter_hsv(frame, lut=True, **params)
+        lines = ld.process_frame(frame, lut=True, **params)
+
+        # Testing
+        self.assertGreater(np.mean(mask == lut_mask), 0.99)
+        self.assertGreater(len(lines), 0)
+        self.assertIs(cv.hsv_lut(105, (38, 255), (38, 255), 15, ld.lut_bits),
+                      cv.hsv_lut(105, (38, 255), (38, 255), 15, ld.lut_bits))
+
+    def test_process_frame_empty(self) -> None:
+        """Test the fused pipeline on a frame with no lines."""
+        # Setup
+        ld = cv.LineDetector(None)
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+
+        # Code to Test
+        lines = ld.process_frame(frame, hue=105, sat=[38, 255], val=[38, 255])
+
+        # Testing
+        self.assertEqual(lines.shape, (0, 4))
+
+    def test_tracking(self) -> None:
+        """Test that tracking mode searches a corridor around the last lane estimate, and falls back when lost."""
+        # Setup
+        ld = cv.LineDetector(None, track=True)
+        frame = lane_frame()
+        params = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15, "top": 0.6, "bottom": 0.01}
+
+        # Code to Test
+        full_lines = ld.process_frame(frame, **params)
+        full_tracked = ld.tracked
+        ld.lane_slope(*ld.split_lines(full_lines, frame.shape[1], bounds=[0, 0.5]))
+
+        windows = ld.track_windows(frame.shape[1], *ld.crop_rows(frame.shape[0], 0.6, 0.01))
+        tracked_lines = ld.process_frame(frame, **params)
+        tracked = ld.tracked
+
+        ld.lane_slope([], [])
+        ld.process_frame(frame, **params)
+
+        # Testing
+        self.assertFalse(full_tracked)  # No previous estimate, so the first frame is searched in full.
+        self.assertTrue(tracked)
+        self.assertFalse(ld.tracked)  # Lost both sides, so fall back to a full search.
+
+        # Windows cover much less of the frame than the full crop.
+        area = sum((y1 - y0) * (x1 - x0) for y0, y1, x0, x1 in windows)
+        self.assertLess(area, 0.6 * frame.shape[1] * frame.shape[0] * 0.59)
+
+        # The same lane is found from the windows.
+        full_theta, _ = ld.lane_slope(*ld.split_lines(full_lines, frame.shape[1], bounds=[0, 0.5]))
+        tracked_theta, _ = ld.lane_slope(*ld.split_lines(tracked_lines, frame.shape[1], bounds=[0, 0.5]))
+        self.assertAlmostEqual(full_theta, tracked_theta, delta=0.05)
+
+    def test_tracking_buffers(self) -> None:
+        """Test that tracked frames reuse their buffers, as the windows move and change size."""
+        for lut in [False, True]:
+            # Setup
+            ld = cv.LineDetector(None, track=True)
+            frames = [lane_frame(), np.roll(lane_frame(), 12, axis=1), np.roll(lane_frame(), -8, axis=1)]
+            params = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15, "top": 0.6, "bottom": 0.01,
+                      "lut": lut}
+            crop = ld.crop_rows(240, 0.6, 0.01)
+
+            # Code to Test
+            for _ in range(2):  # A full search, then the first tracked frame, which allocates the windows' buffers.
+                ld.lane_slope(*ld.split_lines(ld.process_frame(frames[0], **params), 320, bounds=[0, 0.5]))
+            buffers = dict(ld.buffers)
+
+            windows = []
+            thetas = []
+            for frame in frames * 2:
+                windows.append(ld.track_windows(320, *crop))
+                lines = ld.process_frame(frame, **params)
+                thetas.append(ld.lane_slope(*ld.split_lines(lines, 320, bounds=[0, 0.5]))[0])
+
+            # Testing
+            self.assertTrue(ld.tracked)
+            self.assertGreater(len(set(map(tuple, windows))), 1)  # The windows changed between frames.
+            self.assertIn("edges1", buffers)
+            for name, buffer in buffers.items():
+                self.assertIs(ld.buffers[name], buffer, name)
+
+            # Each frame's lane is still found, at a different position to the last.
+            self.assertAlmostEqual(thetas[3], thetas[0], delta=0.02)
+            self.assertNotEqual(thetas[0], thetas[1])
+
+    def test_sliding_windows(self) -> None:
+        """Test that the sliding window engine follows both lane lines, and finds the same lane as Hough."""
+        # Setup
+        frame = lane_frame(640, 480)
+        params = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15, "top": 0.6, "bottom": 0.01}
+        hough = cv.LineDetector(None)
+        windows = cv.LineDetector(None, engine="windows")
+
+        # Code to Test
+        left, right = windows.find_lanes(frame, **params, bounds=[0, 0.5])
+        windows_theta, _ = windows.lane_slope(left, right)
+        hough_theta, _ = hough.lane_slope(*hough.find_lanes(frame, **params, bounds=[0, 0.5]))
+        empty = windows.find_lanes(np.zeros_like(frame), **params)
+
+        # Testing
+        self.assertGreaterEqual(len(left), windows.track_min_lines)
+        self.assertGreaterEqual(len(right), windows.track_min_lines)
+
+        # Points are on the lines drawn by lane_frame, which run from (64, 479) to (256, 160), and mirrored.
+        left_points, right_points = left.reshape(-1, 2), right.reshape(-1, 2)
+        np.testing.assert_allclose(left_points[:, 0], 64 + (479 - left_points[:, 1]) * 192 / 319, atol=3)
+        np.testing.assert_allclose(right_points[:, 0], 639 - (64 + (479 - right_points[:, 1]) * 192 / 319), atol=3)
+
+        self.assertAlmostEqual(windows_theta, hough_theta, delta=0.05)
+        self.assertEqual([side.shape for side in empty], [(0, 4), (0, 4)])
+
+        with self.assertRaises(ValueError):
+            cv.LineDetector(None, engine="unknown")
+
+    def test_arrange_lines(self) -> None:
+        """Test that the points of each line are swapped where needed, for arrays and lists."""
+        # Setup
+        ld = cv.LineDetector(None)
+        lines = [[0, 10, 5, 2], [3, 1, 4, 8], [7, 5, 9, 5]]
+        expected = [[5, 2, 0, 10], [3, 1, 4, 8], [7, 5, 9, 5]]
+
+        # Code to Test
+        arranged_list = ld.arrange_lines(lines)
+        arranged_array = ld.arrange_lines(np.array(lines))
+
+        # Testing
+        self.assertEqual(arranged_list, expected)
+        np.testing.assert_array_equal(arranged_array, expected)
+        self.assertEqual(lines[0], [0, 10, 5, 2])  # Input is unchanged
+
+    def test_split_lines(self) -> None:
+        """Test splitting lines into left, right and out of bounds, for arrays and lists."""
+        # Setup
+        ld = cv.LineDetector(None)
+        rng = np.random.default_rng(0)
+        lines = rng.integers(0, 100, size=(500, 4))
+        bounds = [0.1, 0.4]
+
+        # Classify each line individually, to check the result against.
+        expected = [[], [], []]
+        for line in lines.tolist():
+            if 10 <= line[0] < 40:
+                expected[0].append(line)
+            elif 60 < line[0] <= 90:
+                expected[1].append(line)
+            else:
+                expected[2].append(line)
+
+        # Code to Test
+        split_array = ld.split_lines(lines, 100, bounds=bounds, keep_oob=True)
+        split_list = ld.split_lines(lines.tolist(), 100, bounds=bounds, keep_oob=True)
+        split_empty = ld.split_lines([], 100, bounds=bounds)
+
+        # Testing
+        for n in range(3):
+            np.testing.assert_array_equal(split_array[n].reshape(-1, 4), np.array(expected[n]).reshape(-1, 4))
+            self.assertEqual(split_list[n], expected[n])
+
+        self.assertEqual(split_empty, ([], []))
+        self.assertRaises(TypeError, ld.split_lines, {1, 2}, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Test geometry.py."""
+
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from autonopi import cv
+from autonopi.geometry import Calibration, FrameRemap
+
+
+class StillCamera:
+    """Stand-in for cv2.VideoCapture, producing the same frame every time."""
+
+    def __init__(self, frame: np.ndarray):
+        self.frame = frame
+
+    def read(self) -> tuple[bool, np.ndarray]:
+        """Produce the frame."""
+        return True, self.frame.copy()
+
+
+class TestFrameRemap(unittest.TestCase):
+    """Test the FrameRemap class."""
+
+    def setUp(self) -> None:
+        """Create a random frame, and a calibration for it."""
+        self.frame = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+        self.calibration = Calibration([[60, 0, 32], [0, 60, 24], [0, 0, 1]], [-0.2, 0.05, 0, 0], (64, 48))
+
+    def test_rotation(self) -> None:
+        """Test that every rotation matches cv2.rotate."""
+        # Setup
+        remap = FrameRemap(cache_dir=None)
+
+        for rotation in [cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_180, cv2.ROTATE_90_COUNTERCLOCKWISE]:
+            # Code to Test
+            result = remap.apply(self.frame, rotation)
+
+            # Testing
+            np.testing.assert_array_equal(result, cv2.rotate(self.frame, rotation))
+
+    def test_undistort(self) -> None:
+        """Test that undistortion, composed with a rotation, matches cv2.undistort followed by cv2.rotate."""
+        # Setup
+        remap = FrameRemap(self.calibration, cache_dir=None)
+        expected = cv2.rotate(cv2.undistort(self.frame, self.calibration.camera_matrix,
+                                            self.calibration.dist_coeffs), cv2.ROTATE_180)
+
+        # Code to Test
+        result = remap.apply(self.frame, cv2.ROTATE_180)
+
+        # Testing
+        np.testing.assert_array_equal(result[1:-1, 1:-1], expected[1:-1, 1:-1])
+
+    def test_perspective(self) -> None:
+        """Test that the corners of the bird's-eye view come from the src points of the frame."""
+        # Setup
+        src = [[0.25, 0.5], [0.75, 0.5], [1.0, 1.0], [0.0, 1.0]]
+        dst = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]
+        remap = FrameRemap(src=src, dst=dst, out_scale=0.5, cache_dir=None)
+
+        # Code to Test
+        map_x, map_y = remap.build(64, 48)
+
+        # Testing
+        self.assertEqual(map_x.shape, (24, 32))
+        self.assertAlmostEqual(map_x[0, 0], 16, places=3)
+        self.assertAlmostEqual(map_y[0, 0], 24, places=3)
+        self.assertAlmostEqual(map_x[0, 16], 32, places=3)  # Top centre is half way along the top of the trapezium.
+
+        with self.assertRaises(ValueError):
+            FrameRemap(src=src)
+
+    def test_cache(self) -> None:
+        """Test that maps are saved to disk, reloaded by a new instance, and rebuilt when the transforms change."""
+        with tempfile.TemporaryDirectory() as tmp:
+            # Setup
+            remap = FrameRemap(self.calibration, cache_dir=tmp)
+
+            # Code to Test
+            result = remap.apply(self.frame, cv2.ROTATE_180)
+            files = os.listdir(tmp)
+            cached = FrameRemap(self.calibration, cache_dir=tmp).apply(self.frame, cv2.ROTATE_180)
+            FrameRemap(self.calibration, out_scale=0.5, cache_dir=tmp).apply(self.frame, cv2.ROTATE_180)
+
+            # Testing
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].startswith("camera0_64x48_"))
+            np.testing.assert_array_equal(cached, result)
+            self.assertEqual(len(os.listdir(tmp)), 2)
+
+    def test_fetch_image(self) -> None:
+        """Test that LineDetector.fetch_image applies the remap, with its rotation."""
+        # Setup
+        remap = FrameRemap(self.calibration, cache_dir=None)
+        ld = cv.LineDetector(StillCamera(self.frame), rotate=cv2.ROTATE_180, remap=remap)
+
+        # Code to Test
+        result = ld.fetch_image()
+
+        # Testing
+        np.testing.assert_array_equal(result, remap.apply(self.frame, cv2.ROTATE_180))
+        self.assertIn((64, 48, cv2.ROTATE_180), remap.maps)
+
+
+if __name__ == "__main__":
+    unittest.main()
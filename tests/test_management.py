@@ -0,0 +1,119 @@
+"""Test management.py."""
+
+import os
+import subprocess  # noqa: S404 - Only used to import the package in a fresh interpreter.
+import sys
+import tempfile
+import time
+import unittest
+
+from autonopi import management
+from autonopi.telemetry import FlightRecorder, read_flight_log
+
+
+class CountingManager(management.Manager):
+    """Manager with no components, which counts how many times it is run."""
+
+    def setup_components(self) -> None:
+        """No components needed."""
+        pass
+
+    def setup_variables(self) -> None:
+        """Setup counters."""
+        self.runs = 0
+        self.exited = False
+
+    def run(self) -> None:
+        """Count the run."""
+        self.runs += 1
+
+    def telemetry(self) -> dict:
+        """Record the run count as the frame sequence number."""
+        return {"frame_seq": self.runs}
+
+    def exit(self) -> None:
+        """Record the exit."""
+        self.exited = True
+
+
+class TestManager(unittest.TestCase):
+    """Test the Manager class."""
+
+    def test_mainloop_ticks(self) -> None:
+        """Test running the main loop for a fixed number of ticks."""
+        # Setup
+        manager = CountingManager()
+
+        # Code to Test
+        manager.mainloop(25)
+
+        # Testing
+        self.assertEqual(manager.runs, 25)
+        self.assertTrue(manager.exited)
+
+    def test_mainloop_period(self) -> None:
+        """Test running the main loop at a fixed rate."""
+        # Setup
+        manager = CountingManager()
+
+        # Code to Test
+        start = time.monotonic()
+        manager.mainloop(10, period=0.01)
+        duration = time.monotonic() - start
+
+        # Testing
+        self.assertEqual(manager.runs, 10)
+        self.assertGreaterEqual(duration, 0.09)  # The first tick runs straight away.
+        self.assertEqual(manager.scheduler.stats()["ticks"], 10)
+
+    def test_mainloop_recorder(self) -> None:
+        """Test that each tick is recorded, with the manager's telemetry."""
+        # Setup
+        manager = CountingManager()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "flight.bin")
+            with FlightRecorder(path, capacity=16) as recorder:
+
+                # Code to Test
+                manager.mainloop(5, recorder=recorder)
+
+            records = read_flight_log(path)
+
+        # Testing
+        self.assertEqual(list(records["frame_seq"]), [1, 2, 3, 4, 5])
+        self.assertTrue((records["duration"] >= 0).all())
+        self.assertTrue((records["timestamp"][1:] >= records["timestamp"][:-1]).all())
+
+    def test_lazy_components(self) -> None:
+        """Test that the base components are only created when first used."""
+        # Setup
+        manager = CountingManager()
+
+        # Code to Test
+        created = set(vars(manager))
+        navigation = manager.navigation
+
+        # Testing
+        self.assertFalse(created & {"line_detector", "motion", "navigation"})
+        self.assertIs(manager.navigation, navigation)
+        self.assertEqual(navigation.nodes, [])
+        self.assertNotIn("line_detector", vars(manager))
+
+    def test_lazy_imports(self) -> None:
+        """Test that importing the package and the manager doesn't import the components' dependencies."""
+        # Setup
+        code = ("import sys, autonopi, autonopi.management; "
+                "print(' '.join(m for m in ['cv2', 'numpy', 'networkx', 'asyncio'] if m in sys.modules))")
+
+        # Code to Test
+        imported = subprocess.run([sys.executable, "-c", code],  # noqa: S603
+                                  capture_output=True, text=True, check=True).stdout
+
+        # Testing
+        self.assertEqual(imported.strip(), "")
+        self.assertIs(management.AsyncManager, sys.modules["autonopi.concurrency"].AsyncManager)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+"""Test hardware/motion."""
+
+import threading as thr
+import time
+import unittest
+
+from autonopi.hardware.motion import Motion
+
+
+class CountingMotion(Motion):
+    """Motion interface with no hardware, which records the target applied by each move."""
+
+    def __init__(self, *args, **kwargs):
+        self.applied = []
+        self.moved = thr.Event()
+        self.halts = 0
+        self.halted = thr.Event()
+        self.on_halt = None  # Called on each halt, if set.
+
+        super().__init__(*args, **kwargs)
+
+    def move(self) -> None:
+        """Record the target."""
+        self.applied.append(self.target)
+        self.moved.set()
+
+    def halt(self) -> None:
+        """Count the halt."""
+        self.halts += 1
+        self.halted.set()
+        if self.on_halt is not None:
+            self.on_halt()
+
+
+class SlowMotion(CountingMotion):
+    """CountingMotion whose moves take a while, recording when each move and halt starts and finishes."""
+
+    def __init__(self, *args, **kwargs):
+        self.events = []
+        self.moving = thr.Event()
+
+        super().__init__(*args, **kwargs)
+
+    def move(self) -> None:
+        """Record the move, taking 0.1s."""
+        self.events.append("move")
+        self.moving.set()
+        time.sleep(0.1)
+        super().move()
+        self.events.append("moved")
+
+    def halt(self) -> None:
+        """Record the halt."""
+        self.events.append("halt")
+        super().halt()
+
+
+class TestMotion(unittest.TestCase):
+    """Test the Motion base class."""
+
+    def test_event_driven(self) -> None:
+        """Test that the movement thread sleeps until the target changes, rather than spinning."""
+        # Setup
+        motion = CountingMotion(rate=None)
+
+        # Code to Test
+        motion.power = 0.5  # Not moving, so this isn't applied.
+        time.sleep(0.05)
+        idle_moves = motion.moves
+
+        motion.start_move()
+        motion.moved.wait(1)
+        motion.moved.clear()
+        motion.direction = -0.2
+        motion.moved.wait(1)
+        motion.direction = -0.2  # No change, so the thread isn't woken.
+        time.sleep(0.05)
+
+        motion.stop_move()
+
+        # Testing
+        self.assertEqual(idle_moves, 0)
+        self.assertEqual(motion.applied, [(0.5, 0), (0.5, -0.2)])
+        self.assertEqual(motion.stats()["moves"], 2)
+
+    def test_control_rate(self) -> None:
+        """Test that moves are repeated at the control rate while moving."""
+        # Setup
+        motion = CountingMotion(rate=20)
+
+        # Code to Test
+        motion.start_move()
+        time.sleep(0.5)
+        motion.stop_move()
+        moves = motion.moves
+        time.sleep(0.1)
+
+        # Testing
+        self.assertGreaterEqual(moves, 2)  # Repeated, rather than applied once.
+        self.assertLess(moves, 100)  # About 10, without spinning.
+        self.assertLessEqual(motion.moves, moves + 1)  # Stopped, apart from a move already under way.
+
+    def test_command(self) -> None:
+        """Test that commands are applied as a pair, and their latency recorded."""
+        # Setup
+        motion = CountingMotion(rate=None)
+        motion.start_move()
+        motion.moved.wait(1)
+        motion.moved.clear()
+
+        # Code to Test
+        start = time.monotonic()
+        motion.command(0.3, 0.1)
+        motion.moved.wait(1)
+        duration = time.monotonic() - start
+        motion.stop_move()
+
+        # Testing
+        self.assertEqual(motion.applied[-1], (0.3, 0.1))
+        self.assertEqual((motion.power, motion.direction), (0.3, 0.1))
+        self.assertEqual(len(motion.latencies), 1)
+        self.assertGreaterEqual(motion.stats()["max_latency"], 0)
+        self.assertLessEqual(motion.stats()["max_latency"], duration)
+
+    def test_watchdog(self) -> None:
+        """Test that movement stops when commands go stale, and restarts with a fresh command."""
+        # Setup
+        motion = CountingMotion(rate=20, deadline=0.25)
+
+        # Code to Test
+        motion.command(0.3, 0.0)
+        motion.start_move()
+        motion.halted.wait(2)
+        stopped = not motion.inmotion
+        moves = motion.moves
+        time.sleep(0.1)
+        moves_stopped = motion.moves
+
+        motion.moved.clear()
+        motion.command(0.3, 0.0)
+        motion.start_move()
+        motion.moved.wait(1)
+        restarted = motion.inmotion
+        motion.stop_move()
+
+        # Testing
+        self.assertTrue(stopped)
+        self.assertEqual(motion.watchdog_stops, 1)
+        self.assertGreaterEqual(moves, 1)
+        self.assertEqual(moves_stopped, moves)  # No moves once stopped.
+        self.assertTrue(restarted)
+        self.assertGreater(motion.moves, moves)
+
+    def test_watchdog_fresh_command(self) -> None:
+        """Test that a command arriving as the watchdog stops the motors isn't overridden by the stop."""
+        # Setup
+        motion = CountingMotion(rate=20, deadline=0.25)
+        restarted = thr.Event()
+
+        def command() -> None:  # A fresh command, arriving just after the watchdog decided to stop.
+            if not restarted.is_set():
+                motion.command(0.3, 0.1)
+                motion.start_move()
+                restarted.set()
+
+        motion.on_halt = command
+
+        # Code to Test
+        motion.command(0.3, 0.0)
+        motion.start_move()
+        restarted.wait(1)
+        motion.moved.clear()
+        motion.moved.wait(1)
+        inmotion = motion.inmotion
+        motion.stop_move()
+
+        # Testing
+        self.assertTrue(restarted.is_set())
+        self.assertTrue(inmotion)
+        self.assertEqual(motion.watchdog_stops, 1)
+        self.assertEqual(motion.applied[-1], (0.3, 0.1))
+
+    def test_stop_during_move(self) -> None:
+        """Test that stopping while a move is under way halts the hardware after the move, not before it."""
+        # Setup
+        motion = SlowMotion(rate=20)
+        motion.command(0.3, 0.0)
+
+        # Code to Test
+        motion.start_move()
+        motion.moving.wait(1)
+        motion.stop_move()
+        events = list(motion.events)
+        time.sleep(0.2)
+
+        # Testing
+        self.assertEqual(events, ["move", "moved", "halt"])
+        self.assertEqual(motion.events, events)  # No moves after the halt.
+        self.assertEqual(motion.halts, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
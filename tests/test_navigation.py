@@ -130,12 +130,47 @@ class TestNavigation(unittest.TestCase):
 
         n.setup_edges(dists)
 
-        # Code to Test
-        n.floyds()
-
-        # Testing
-        self.assertEqual(n.floyds_distances, expected_distances)
-        self.assertEqual(n.floyds_routes, expected_routes)
+        for engine in nav.Navigation.engines:
+            with self.subTest(engine=engine):
+                n.engine = engine
+
+                # Code to Test
+                n.floyds()
+
+                # Testing
+                self.assertEqual(n.floyds_distances, expected_distances)
+                self.assertEqual(n.floyds_routes, expected_routes)
+
+    def test_floyds_engines(self) -> None:
+        """Test that the NumPy engine gives the same results as the Python engine on random graphs."""
+        rng = random.Random(0)
+
+        for size in [1, 2, 10, 40]:
+            # Setup
+            navs = [nav.Navigation(engine) for engine in nav.Navigation.engines]
+            # Some edges missing, so some nodes are unreachable, and whole number weights, so some paths tie.
+            dists = [[rng.choice([-1, -1, rng.randint(1, 20), rng.random() * 20]) for _ in range(size)]
+                     for _ in range(size)]
+            dists = [[dists[min(x, y)][max(x, y)] for x in range(size)] for y in range(size)]  # Symmetric
+
+            for n in navs:
+                for x in range(size):
+                    n.add_node(nav.Node(n, x))
+                n.setup_edges(dists)
+
+                # Code to Test
+                n.floyds()
+
+            # Testing
+            with self.subTest(size=size):
+                numpy_nav, python_nav = navs
+                self.assertEqual(numpy_nav.floyds_distances, python_nav.floyds_distances)
+                self.assertEqual(numpy_nav.floyds_routes, python_nav.floyds_routes)
+                for a in range(size):
+                    self.assertEqual(numpy_nav.shortest_path(0, a), python_nav.shortest_path(0, a))
+
+        with self.assertRaises(ValueError):
+            nav.Navigation("unknown")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+"""Test pipeline.py."""
+
+import unittest
+
+import numpy as np
+
+from autonopi import cv, pipeline
+
+from .test_cv import lane_frame
+
+
+class TestPipelineRunner(unittest.TestCase):
+    """Test the PipelineRunner class."""
+
+    def test_results(self) -> None:
+        """Test that results match running process_frame directly, and are returned in order."""
+        # Setup
+        params = {"hue": 105, "sat": [38, 255], "val": [38, 255], "hue_tol": 15, "top": 0.6}
+        frames = [lane_frame(320 - 8 * n, 240)[:, :240] for n in range(6)]  # Differing frames of the same shape.
+        ld = cv.LineDetector(None)
+        expected = [ld.process_frame(frame, **params) for frame in frames]
+
+        # Code to Test
+        with pipeline.PipelineRunner((240, 240, 3), workers=2, slots=3, **params) as runner:
+            results = []
+            for frame in frames:
+                runner.submit(frame)
+                if runner.pending >= 2:
+                    results.append(runner.get(timeout=10))
+
+            while runner.pending > 0:
+                results.append(runner.get(timeout=10))
+
+        # Testing
+        self.assertEqual([seq for seq, _ in results], list(range(len(frames))))
+        for (_, lines), expected_lines in zip(results, expected):
+            np.testing.assert_array_equal(lines, expected_lines)
+
+        self.assertRaises(ValueError, runner.get)  # Nothing left in the pipeline.
+
+    def test_errors(self) -> None:
+        """Test that errors in workers are reraised by get, and that dead workers are reported rather than hanging."""
+        # Setup
+        frame = lane_frame(240, 240)
+
+        # Code to Test
+        with pipeline.PipelineRunner((240, 240, 3), workers=1, slots=1, hue=105, unknown=1) as runner:
+            runner.submit(frame)
+            with self.assertRaises(TypeError):  # process_frame doesn't take unknown.
+                runner.get(timeout=10)
+
+            # The slot was freed, so another frame can be submitted without blocking.
+            runner.submit(frame)
+            self.assertRaises(TypeError, runner.get, timeout=10)
+
+            runner.workers[0].terminate()
+            runner.workers[0].join()
+            runner.submit(frame)
+            with self.assertRaises(RuntimeError):
+                runner.get()
+
+
+if __name__ == "__main__":
+    unittest.main()
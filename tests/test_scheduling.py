@@ -0,0 +1,138 @@
+"""Test scheduling.py."""
+
+import time
+import unittest
+
+from autonopi.scheduling import DeadlineScheduler
+
+
+class FakeClock:
+    """Simulated clock, which only moves when slept on or advanced, so scheduling can be tested exactly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self) -> float:
+        """The current time."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Move the clock on."""
+        self.now += max(0.0, seconds)
+
+
+def run_ticks(scheduler: DeadlineScheduler, clock: FakeClock, durations: list[float]) -> list[float]:
+    """Run ticks taking the given number of periods each, returning when each started, in periods from the first."""
+    starts = []
+    for duration in durations:
+        scheduler.wait()
+        starts.append(clock.time())
+        clock.sleep(duration * scheduler.period)
+
+    return [(start - starts[0]) / scheduler.period for start in starts]
+
+
+def fake_scheduler(*args, **kwargs) -> tuple[DeadlineScheduler, FakeClock]:
+    """Create a DeadlineScheduler with a period of 1 second on a FakeClock, where the test's times are exact."""
+    clock = FakeClock()
+    return DeadlineScheduler(1.0, *args, spin=0.0, clock=clock.time, sleep=clock.sleep, **kwargs), clock
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+    """Test the DeadlineScheduler class."""
+
+    def test_rate(self) -> None:
+        """Test that ticks start on their deadlines."""
+        # Setup
+        scheduler, clock = fake_scheduler()
+
+        # Code to Test
+        starts = run_ticks(scheduler, clock, [0.25] * 10)
+
+        # Testing
+        self.assertEqual(starts, list(range(10)))
+        self.assertEqual(scheduler.overruns, 0)
+        self.assertEqual(scheduler.stats()["max_jitter"], 0.0)
+        self.assertEqual(scheduler.stats()["utilisation"], 0.25 * 9 / 9.25)  # The last tick hasn't finished.
+
+    def test_skip(self) -> None:
+        """Test that deadlines missed by an overrun are skipped, staying on the grid."""
+        # Setup
+        scheduler, clock = fake_scheduler("skip")
+
+        # Code to Test
+        starts = run_ticks(scheduler, clock, [0.5, 2.5, 0.5, 0.5])
+
+        # Testing
+        self.assertEqual(starts, [0, 1, 4, 5])  # The overrun ended at 3.5, skipping 2 and 3.
+        self.assertEqual(scheduler.overruns, 1)
+        self.assertEqual(scheduler.skipped, 2)
+
+    def test_catchup(self) -> None:
+        """Test that ticks missed by an overrun are run back to back."""
+        # Setup
+        scheduler, clock = fake_scheduler("catchup")
+
+        # Code to Test
+        starts = run_ticks(scheduler, clock, [0.5, 2.5, 0.25, 0.25, 0.25, 0.25])
+
+        # Testing
+        # Straight after the overrun for 2, straight after that for 3, then back on the grid.
+        self.assertEqual(starts, [0, 1, 3.5, 3.75, 4, 5])
+        self.assertEqual(scheduler.overruns, 1)
+        self.assertEqual(scheduler.skipped, 0)
+
+    def test_catchup_limit(self) -> None:
+        """Test that ticks are skipped rather than caught up once the loop is more than max_catchup behind."""
+        # Setup
+        scheduler, clock = fake_scheduler("catchup", max_catchup=2)
+
+        # Code to Test
+        starts = run_ticks(scheduler, clock, [0.5, 4.5, 0.5])
+
+        # Testing
+        self.assertEqual(starts, [0, 1, 6])  # 4 behind at 5.5, so 2 - 5 are skipped.
+        self.assertEqual(scheduler.skipped, 4)
+
+    def test_degrade(self) -> None:
+        """Test that the degrade and recover callbacks are called after overruns and fast ticks in a row."""
+        # Setup
+        calls = []
+        scheduler, clock = fake_scheduler("degrade", on_degrade=lambda: calls.append("degrade"),
+                                          on_recover=lambda: calls.append("recover"), degrade_after=2,
+                                          recover_after=3)
+
+        # Code to Test
+        run_ticks(scheduler, clock, [1.5, 1.5, 1.5])  # The last wait ends the second overrun.
+        degraded = scheduler.degraded
+        calls_degraded = list(calls)
+        run_ticks(scheduler, clock, [0.25] * 5)
+
+        # Testing
+        self.assertTrue(degraded)
+        self.assertEqual(calls_degraded, ["degrade"])
+        self.assertFalse(scheduler.degraded)
+        self.assertEqual(calls, ["degrade", "recover"])
+
+        with self.assertRaises(ValueError):
+            DeadlineScheduler(0.01, "unknown")
+
+    def test_real_clock(self) -> None:
+        """Test that the scheduler paces a loop on the real clock, checking only the order and count of ticks."""
+        # Setup
+        scheduler = DeadlineScheduler(0.05)
+
+        # Code to Test
+        starts = []
+        for _ in range(4):
+            scheduler.wait()
+            starts.append(time.monotonic())
+
+        # Testing
+        self.assertEqual(scheduler.ticks, 4)
+        self.assertGreaterEqual(starts[-1] - starts[0], 3 * 0.05 - 0.001)  # Never early.
+        self.assertEqual(starts, sorted(starts))
+
+
+if __name__ == "__main__":
+    unittest.main()
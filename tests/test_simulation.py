@@ -0,0 +1,68 @@
+"""Test simulation.py."""
+
+import time
+import unittest
+from math import pi
+
+from autonopi import cv, simulation
+
+
+class TestSimulator(unittest.TestCase):
+    """Test the Simulator class, and its camera and motion interfaces."""
+
+    def test_camera(self) -> None:
+        """Test that the lane is visible to the line detector from the start of the track."""
+        # Setup
+        sim = simulation.Simulator()
+        ld = cv.LineDetector(sim.camera)
+
+        # Code to Test
+        frame = ld.fetch_image()
+        lines = ld.process_frame(frame, hue=105, sat=[38, 255], val=[38, 255], hue_tol=15, top=0.35, bottom=0.01)
+        left, right = ld.split_lines(lines, frame.shape[1], bounds=[0, 0.4])
+
+        # Testing
+        self.assertEqual(frame.shape, (240, 320, 3))
+        self.assertGreater(len(left), 0)
+        self.assertGreater(len(right), 0)
+        self.assertEqual(sim.stats()["frames"], 1)
+
+    def test_integrate(self) -> None:
+        """Test moving the vehicle."""
+        # Setup
+        sim = simulation.Simulator(simulation.Track(radius=2.0))
+
+        # Code to Test
+        sim.integrate(0.5, 0.0, 2.0)  # 1m straight ahead.
+        straight = sim.pose()
+        sim.integrate(0.0, pi / 2, 1.0)  # Turn 90° left on the spot.
+        turned = sim.pose()
+
+        # Testing
+        for value, expected in zip(straight, (2.0, 1.0, pi / 2)):
+            self.assertAlmostEqual(value, expected)
+        self.assertAlmostEqual(turned[2], pi)
+        self.assertAlmostEqual(sim.distance, 1.0)
+
+    def test_motion(self) -> None:
+        """Test that the motion interface moves the vehicle forwards."""
+        # Setup
+        sim = simulation.Simulator()
+        start = sim.pose()
+
+        # Code to Test
+        sim.motion.power = 1.0
+        sim.motion.direction = 0.0
+        sim.motion.move()
+        time.sleep(0.1)
+        sim.motion.move()
+
+        # Testing
+        x, y, heading = sim.pose()
+        self.assertAlmostEqual(x, start[0])
+        self.assertGreater(y, start[1])  # Facing anticlockwise from (radius, 0), so forwards is +y.
+        self.assertAlmostEqual(heading, start[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Test telemetry.py."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from autonopi.telemetry import FlightRecorder, read_flight_log
+
+
+class TestFlightRecorder(unittest.TestCase):
+    """Test the FlightRecorder class and read_flight_log."""
+
+    def setUp(self) -> None:
+        """Create a directory for the flight logs."""
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "flight.bin")
+
+    def tearDown(self) -> None:
+        """Delete the flight logs."""
+        self.dir.cleanup()
+
+    def test_record(self) -> None:
+        """Test that records are read back as written, with unknown fields left as their defaults."""
+        # Setup
+        recorder = FlightRecorder(self.path, capacity=8)
+
+        # Code to Test
+        recorder.record(1.0, 0.01, frame_seq=5, lane_t=0.1, lane_c=-200.0, left_lines=2, right_lines=3,
+                        steering=-0.2, power=0.3)
+        recorder.record(2.0, 0.02)
+        unclosed = read_flight_log(self.path)  # Readable while still recording, as after a crash.
+        recorder.close()
+
+        # Testing
+        self.assertEqual(len(unclosed), 2)
+        self.assertEqual(os.path.getsize(self.path), 64 + 8 * 64)  # Preallocated.
+        records = read_flight_log(self.path)
+        self.assertEqual(records[0]["frame_seq"], 5)
+        self.assertEqual(records[0]["right_lines"], 3)
+        self.assertAlmostEqual(records[0]["steering"], -0.2)
+        np.testing.assert_array_equal(records["timestamp"], [1.0, 2.0])
+        self.assertEqual(records[1]["left_lines"], -1)
+        self.assertTrue(np.isnan(records[1]["lane_t"]))
+
+    def test_record_unknown(self) -> None:
+        """Test that fields given as None, as for a tick where the lane was lost, are recorded as their defaults."""
+        # Setup
+        recorder = FlightRecorder(self.path, capacity=8)
+
+        # Code to Test
+        recorder.record(1.0, 0.01, frame_seq=None, lane_t=None, lane_c=None, left_lines=0, right_lines=None,
+                        steering=0.0, power=0.3)
+        recorder.close()
+
+        # Testing
+        records = read_flight_log(self.path)
+        self.assertEqual(len(records), 1)
+        self.assertTrue(np.isnan(records[0]["lane_t"]))
+        self.assertTrue(np.isnan(records[0]["lane_c"]))
+        self.assertEqual(records[0]["frame_seq"], -1)
+        self.assertEqual(records[0]["left_lines"], 0)
+        self.assertEqual(records[0]["right_lines"], -1)
+        self.assertEqual(records[0]["steering"], 0.0)
+
+    def test_ring_buffer(self) -> None:
+        """Test that the oldest records are overwritten once the file is full, and read oldest first."""
+        # Setup
+        with FlightRecorder(self.path, capacity=4) as recorder:
+
+            # Code to Test
+            for n in range(10):
+                recorder.record(float(n), 0.0, frame_seq=n)
+
+        # Testing
+        np.testing.assert_array_equal(read_flight_log(self.path)["frame_seq"], [6, 7, 8, 9])
+
+    def test_invalid(self) -> None:
+        """Test that files which aren't flight logs are rejected."""
+        # Setup
+        with open(self.path, "wb") as f:
+            f.write(bytes(128))
+
+        # Testing
+        with self.assertRaises(ValueError):
+            read_flight_log(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
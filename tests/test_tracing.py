@@ -0,0 +1,96 @@
+"""Test tracing module."""
+
+import json
+import os
+import tempfile
+import threading as thr
+import unittest
+
+from autonopi.tracing import NULL_SPAN, Tracer
+
+
+class TestTracing(unittest.TestCase):
+    """Test the tracer."""
+
+    def test_disabled(self) -> None:
+        """Test that nothing is recorded while tracing is disabled."""
+        # Setup
+        tracer = Tracer(capacity=16)
+
+        @tracer.traced()
+        def func(x: int) -> int:
+            return x * 2
+
+        # Code to Test
+        result = func(2)
+        span = tracer.span("span")
+
+        # Testing
+        self.assertEqual(result, 4)
+        self.assertIs(span, NULL_SPAN)
+        self.assertEqual(tracer.spans(), [])
+
+    def test_spans(self) -> None:
+        """Test that spans and traced functions are recorded, with their thread."""
+        # Setup
+        tracer = Tracer(capacity=16)
+        tracer.enable()
+
+        @tracer.traced("double")
+        def func(x: int) -> int:
+            return x * 2
+
+        # Code to Test
+        with tracer.span("outer"):
+            func(2)
+        thread = thr.Thread(target=func, args=(3, ), name="worker")
+        thread.start()
+        thread.join()
+
+        # Testing
+        spans = tracer.spans()
+        self.assertEqual([s[0] for s in spans], ["double", "outer", "double"])
+        self.assertLessEqual(spans[1][1], spans[0][1])  # Inner span is inside the outer span.
+        self.assertGreaterEqual(spans[1][2], spans[0][2])
+        self.assertEqual(tracer.threads[spans[2][3]], "worker")
+
+    def test_ring_buffer(self) -> None:
+        """Test that the oldest spans are overwritten once the buffer is full."""
+        # Setup
+        tracer = Tracer(capacity=4)
+        tracer.enable()
+
+        # Code to Test
+        for n in range(6):
+            tracer.record(tracer.name_id(str(n)), n, n + 0.5)
+
+        # Testing
+        self.assertEqual([s[0] for s in tracer.spans()], ["2", "3", "4", "5"])
+        self.assertEqual([s[1] for s in tracer.spans()], [2, 3, 4, 5])
+
+    def test_export(self) -> None:
+        """Test the Chrome trace exported."""
+        # Setup
+        tracer = Tracer(capacity=4)
+        tracer.enable()
+        tracer.record(tracer.name_id("span"), 1.0, 1.25)
+
+        # Code to Test
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            tracer.export(path)
+            with open(path) as f:
+                trace = json.load(f)
+
+        # Testing
+        events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["name"], "span")
+        self.assertAlmostEqual(events[0]["ts"], 1e6)
+        self.assertAlmostEqual(events[0]["dur"], 0.25e6)
+        self.assertEqual(events[0]["tid"], thr.get_ident())
+        self.assertTrue(any(e["ph"] == "M" and e["tid"] == thr.get_ident() for e in trace["traceEvents"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Test tracking.py."""
+
+import unittest
+from math import inf
+
+from autonopi import tracking
+
+
+class TestLaneTracker(unittest.TestCase):
+    """Test the LaneTracker class."""
+
+    def test_follow(self) -> None:
+        """Test that the tracker follows a steadily turning lane, and predicts it between detections."""
+        # Setup
+        tracker = tracking.LaneTracker()
+
+        # Code to Test
+        for n in range(50):  # Angle increasing by 0.1 rad/s, detected at 10Hz.
+            tracker.update(0.01 * n, 100.0, 0.1 * n)
+
+        theta, intercept = tracker.predict(5.0)
+
+        # Testing
+        self.assertAlmostEqual(theta, 0.5, delta=0.01)
+        self.assertAlmostEqual(intercept, 100.0)
+
+    def test_should_detect(self) -> None:
+        """Test that the detector is skipped while tracking well, but run when needed."""
+        # Setup
+        tracker = tracking.LaneTracker(interval=3)
+
+        # Code to Test & Testing
+        self.assertTrue(tracker.should_detect(0.0))  # No estimate yet.
+        tracker.update(0.1, 10.0, 0.0)
+
+        self.assertEqual([tracker.should_detect(0.1 * n) for n in range(1, 4)], [False, False, True])
+        tracker.update(0.1, 10.0, 0.3)
+
+        self.assertFalse(tracker.should_detect(0.4))
+        self.assertFalse(tracker.should_detect(0.5))
+        tracker.update(0.5, 10.0, 0.6)  # Large error against the prediction.
+        self.assertTrue(tracker.should_detect(0.7))
+
+        tracker.miss(0.7)
+        self.assertTrue(tracker.should_detect(0.8))  # Last detection failed.
+
+    def test_dropout(self) -> None:
+        """Test that the lane is predicted through short dropouts, but not long ones."""
+        # Setup
+        tracker = tracking.LaneTracker(max_dropout=0.5)
+        tracker.update(0.2, 10.0, 0.0)
+
+        # Code to Test
+        short = tracker.update(-inf, -inf, 0.3)
+        long = tracker.miss(0.6)
+
+        # Testing
+        self.assertEqual(short, (0.2, 10.0))
+        self.assertEqual(long, (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Test tuning.py."""
+
+import os
+import tempfile
+import unittest
+
+import cv2
+
+from autonopi import tuning
+
+from .test_cv import lane_frame
+
+
+class TestTuning(unittest.TestCase):
+    """Test the parameter tuner."""
+
+    def test_pareto(self) -> None:
+        """Test that only results which aren't beaten on both error and cost are kept, cheapest first."""
+        # Setup
+        results = [{"error": 0.1, "cost": 5.0}, {"error": 0.3, "cost": 1.0}, {"error": 0.2, "cost": 2.0},
+                   {"error": 0.25, "cost": 3.0}, {"error": 0.1, "cost": 6.0}]
+
+        # Code to Test
+        front = tuning.pareto(results)
+
+        # Testing
+        self.assertEqual(front, [results[1], results[2], results[0]])
+
+    def test_tune(self) -> None:
+        """Test tuning on synthetic frames, labelled with the baseline's angles."""
+        with tempfile.TemporaryDirectory() as tmp:
+            # Setup
+            paths = []
+            for n, (width, height) in enumerate([(320, 240), (640, 480)]):
+                paths.append(os.path.join(tmp, "frame{}.png".format(n)))
+                cv2.imwrite(paths[-1], lane_frame(width, height))
+
+            # Code to Test
+            results = tuning.tune(paths, samples=3, workers=2, repeats=1)
+
+            with self.assertRaises(ValueError):
+                tuning.tune(paths, labels=[0.0])
+
+        # Testing
+        self.assertEqual(results["frames"], 2)
+        self.assertEqual(len(results["results"]), 4)  # Samples plus the baseline.
+        self.assertEqual(results["baseline"]["config"], tuning.BASELINE)
+        self.assertEqual(results["baseline"]["error"], 0)
+        self.assertEqual(results["baseline"]["misses"], 0)
+
+        front = results["pareto"]
+        self.assertGreater(len(front), 0)
+        self.assertEqual(front[-1]["error"], 0)  # Nothing is more accurate than the labels' own configuration.
+        self.assertEqual([r["cost"] for r in front], sorted(r["cost"] for r in front))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Test visualisation.py."""
+
+import contextlib
+import io
+import unittest
+import urllib.request
+
+import cv2
+import numpy as np
+
+from autonopi.visualisation import Visualiser, draw_lanes
+
+
+class TestVisualiser(unittest.TestCase):
+    """Test the Visualiser class."""
+
+    def test_submit(self) -> None:
+        """Test that frames are decimated, and dropped rather than blocking when the queue is full."""
+        # Setup
+        visualiser = Visualiser(every=2, queue_size=2)  # Not started, so nothing takes frames off the queue.
+        frame = np.zeros((8, 8, 3), dtype=np.uint8)
+
+        # Code to Test
+        accepted = [visualiser.submit(frame) for _ in range(8)]
+
+        # Testing
+        self.assertEqual(accepted, [True, False, True, False, False, False, False, False])
+        self.assertEqual(visualiser.submitted, 8)
+        self.assertEqual(visualiser.dropped, 2)
+
+    def test_stream(self) -> None:
+        """Test that submitted frames are drawn on and served over HTTP."""
+        # Setup
+        visualiser = Visualiser(every=1, port=0)  # Served to this machine only, by default.
+        visualiser.start()
+        url = "http://127.0.0.1:{}".format(visualiser.port)
+        frame = np.zeros((60, 80, 3), dtype=np.uint8)
+        left = np.array([[10, 50, 20, 10]])
+
+        try:
+            # Code to Test
+            visualiser.submit(frame, left, [], None)
+            with urllib.request.urlopen(url + "/frame.jpg", timeout=5) as r:  # noqa: S310 - Local http URL.
+                content_type = r.headers["Content-Type"]
+                jpeg = r.read()
+
+            with urllib.request.urlopen(url + "/stream", timeout=5) as r:  # noqa: S310 - Local http URL.
+                stream_type = r.headers["Content-Type"]
+                boundary = r.readline()
+        finally:
+            visualiser.stop()
+
+        # Testing
+        self.assertEqual(content_type, "image/jpeg")
+        image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(image.shape, frame.shape)
+        self.assertGreater(image[30, 15, 0], 128)  # The left line is drawn in blue.
+
+        self.assertTrue(stream_type.startswith("multipart/x-mixed-replace"))
+        self.assertEqual(boundary, b"--frame\r\n")
+
+    def test_draw_error(self) -> None:
+        """Test that a frame which can't be drawn is skipped, and later frames are still drawn."""
+        # Setup
+        visualiser = Visualiser(every=1, port=0)
+        visualiser.start()
+        frame = np.zeros((60, 80, 3), dtype=np.uint8)
+        stderr = io.StringIO()
+
+        try:
+            # Code to Test
+            with contextlib.redirect_stderr(stderr):
+                visualiser.submit(None, [[0, 0, 1, 1]])  # No frame to draw the line on.
+                visualiser.submit(frame)
+                jpeg, seq = visualiser.wait_jpeg(-1, timeout=5)
+        finally:
+            visualiser.stop()
+
+        # Testing
+        self.assertEqual(visualiser.errors, 1)
+        self.assertIn("Traceback", stderr.getvalue())
+        self.assertIsNotNone(jpeg)
+        self.assertEqual(seq, 0)  # The first frame drawn is the second submitted.
+
+    def test_draw_lanes(self) -> None:
+        """Test drawing a lane, and that a lane which wasn't found isn't drawn."""
+        # Setup
+        frame = np.zeros((60, 80, 3), dtype=np.uint8)
+
+        # Code to Test
+        draw_lanes(frame, [], [], (-np.inf, -np.inf))  # As returned by lane_slope when there are no lines.
+        missing = frame.copy()
+        draw_lanes(frame, [], [], (np.pi / 4, 0.0))
+
+        # Testing
+        self.assertFalse(missing.any())
+        self.assertGreater(frame[30, 30, 1], 128)  # y = x, drawn in green.
+
+
+if __name__ == "__main__":
+    unittest.main()